@@ -5,3 +5,6 @@ class ApiConfig(AppConfig):
     """Название приложения"""
 
     name = "api"
+
+    def ready(self):
+        from . import checks  # noqa: F401
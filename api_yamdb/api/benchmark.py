@@ -0,0 +1,237 @@
+import random
+import time
+from contextlib import ExitStack
+from ipaddress import IPv4Address
+
+from django.core.cache import caches
+from django.db import connections
+from django.test.utils import override_settings
+from django.urls import resolve
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Review, Title, User
+from users.authentication import token_claims
+
+from .metrics import QueryTimer
+from .renderers import FastJSONRenderer
+from .v1.fast_serializers import FastReviewSerializer, FastTitleSerializer
+from .v1.serializers import ReviewSerializer, TitleGetSerializer
+from .v1.throttling import RouteThrottle, local_store
+
+# Имя замера и шаблон пути; {title} и {review} подставляются
+# для каждого запроса из случайного отзыва.
+ENDPOINTS = (
+    ("title-list", "/api/v1/titles/"),
+    ("title-list-cursor", "/api/v1/titles/?pagination=cursor"),
+    ("title-filter", "/api/v1/titles/?genre=genre-1&year_min=1950"),
+    ("title-detail", "/api/v1/titles/{title}/"),
+    ("search", "/api/v1/search/?q=звезда"),
+    ("review-list", "/api/v1/titles/{title}/reviews/"),
+    ("review-detail", "/api/v1/titles/{title}/reviews/{review}/"),
+    ("comment-list", "/api/v1/titles/{title}/reviews/{review}/comments/"),
+    ("category-list", "/api/v1/categories/"),
+    ("genre-list", "/api/v1/genres/"),
+    ("users-me", "/api/v1/users/me/"),
+)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(latencies, queries, errors, elapsed):
+    """Сводка замера одного эндпоинта, время в миллисекундах."""
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": (
+            round(sum(latencies) / len(latencies) * 1000, 2)
+            if latencies
+            else 0.0
+        ),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "queries_mean": (
+            round(sum(queries) / len(queries), 2) if queries else 0.0
+        ),
+        "queries_max": max(queries, default=0),
+    }
+
+
+def benchmark_client():
+    """Клиент от имени первого пользователя с токеном CreateToken."""
+    user = User.objects.order_by("id").first()
+    client = APIClient()
+    if user is not None:
+        token = AccessToken.for_user(user)
+        token.payload.update(token_claims(user))
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+def run_benchmark(
+    endpoints=ENDPOINTS, requests=200, warmup=10, cold=False, seed=0
+):
+    """Прогоняет запросы через настоящие маршруты в текущем процессе.
+
+    С cold=True кэши очищаются перед каждым запросом (вне замера),
+    иначе измеряется работа с прогретым кэшем каталога.
+    """
+    rng = random.Random(seed)
+    client = benchmark_client()
+    pairs = list(
+        Review.objects.order_by("?").values_list("id", "title_id")[:500]
+    )
+    results = {}
+    for name, template in endpoints:
+        latencies, queries, errors = [], [], 0
+        elapsed = 0.0
+        for number in range(warmup + requests):
+            review_id, title_id = rng.choice(pairs) if pairs else (0, 0)
+            path = template.format(title=title_id, review=review_id)
+            if cold:
+                for cache in caches.all():
+                    cache.clear()
+            timer = QueryTimer()
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                started = time.perf_counter()
+                response = client.get(path)
+                duration = time.perf_counter() - started
+            if number < warmup:
+                continue
+            elapsed += duration
+            if response.status_code != 200:
+                errors += 1
+            latencies.append(duration)
+            queries.append(timer.count)
+        results[name] = summarize(latencies, queries, errors, elapsed)
+    return results
+
+
+def serializer_cases():
+    """Страницы списков в виде (имя, queryset, DRF, быстрый)."""
+    return (
+        (
+            "titles",
+            Title.objects.select_related("category")
+            .prefetch_related("genre")
+            .order_by("id"),
+            TitleGetSerializer,
+            FastTitleSerializer,
+        ),
+        (
+            "reviews",
+            Review.objects.select_related("author").order_by("id"),
+            ReviewSerializer,
+            FastReviewSerializer,
+        ),
+    )
+
+
+def cpu_time(fn, repeat):
+    """Лучшее процессорное время вызова и его результат."""
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        result = fn()
+        spent = time.process_time() - started
+        best = spent if best is None else min(best, spent)
+    return best, result
+
+
+def benchmark_serializers(rows=500, repeat=5):
+    """Процессорное время на строку: DRF против быстрого пути.
+
+    Каждый путь целиком: выборка страницы, сериализация и JSON. Старый
+    путь — сериализатор DRF с JSONRenderer, новый — FastListSerializer
+    с FastJSONRenderer; ``identical`` сравнивает их вывод побайтно.
+    """
+    results = {}
+    for name, queryset, serializer_class, fast_class in serializer_cases():
+
+        def drf():
+            page = list(queryset[:rows])
+            data = serializer_class(page, many=True).data
+            return JSONRenderer().render(data)
+
+        def fast():
+            serializer = fast_class()
+            page = serializer.get_rows(queryset)[:rows]
+            data = serializer.to_representation(page)
+            return FastJSONRenderer().render(data)
+
+        drf_time, expected = cpu_time(drf, repeat)
+        fast_time, rendered = cpu_time(fast, repeat)
+        count = max(1, min(rows, queryset.count()))
+        results[name] = {
+            "rows": count,
+            "drf_us_per_row": round(drf_time / count * 1e6, 2),
+            "fast_us_per_row": round(fast_time / count * 1e6, 2),
+            "speedup": round(drf_time / fast_time, 2) if fast_time else None,
+            "identical": rendered == expected,
+        }
+    return results
+
+
+FIRST_ADDRESS = int(IPv4Address("10.0.0.1"))
+
+
+def signup_requests(count):
+    """Запросы регистрации с разными IP и username, тело уже разобрано."""
+    factory = APIRequestFactory()
+    path = "/api/v1/auth/signup/"
+    match = resolve(path)
+    requests = []
+    for number in range(count):
+        django_request = factory.post(
+            path,
+            {"username": f"user{number}", "email": f"{number}@yamdb.fake"},
+            format="json",
+            REMOTE_ADDR=str(IPv4Address(FIRST_ADDRESS + number)),
+        )
+        django_request.resolver_match = match
+        request = Request(django_request, parsers=[JSONParser()])
+        # Тело разбирается заранее, как до проверок в настоящем запросе.
+        request.data
+        requests.append(request)
+    return requests
+
+
+def benchmark_throttle(requests=10000):
+    """Время RouteThrottle.allow_request на запрос в микросекундах.
+
+    ``allowed`` — каждый запрос от нового клиента, ``rejected`` — один
+    клиент сверх лимита. Замер для обоих хранилищ корзин.
+    """
+    batch = signup_requests(requests)
+    results = {}
+    for backend in ("local", "cache"):
+        with override_settings(THROTTLE_BACKEND=backend):
+            local_store.clear()
+            caches["default"].clear()
+            throttle = RouteThrottle()
+            started = time.perf_counter()
+            for request in batch:
+                throttle.allow_request(request, None)
+            allowed = time.perf_counter() - started
+            rejected_request = batch[0]
+            started = time.perf_counter()
+            for _ in range(requests):
+                throttle.allow_request(rejected_request, None)
+            rejected = time.perf_counter() - started
+        results[backend] = {
+            "allowed_us": round(allowed / requests * 1e6, 2),
+            "rejected_us": round(rejected / requests * 1e6, 2),
+        }
+    local_store.clear()
+    return results
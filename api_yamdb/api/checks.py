@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    """Кэш, через который согласуются воркеры, не должен жить в процессе.
+
+    В нём хранятся версии каталога и ETag, корзины ограничения запросов
+    и закрепление клиентов за основной базой. С кэшем в памяти процесса
+    каждый воркер gunicorn видит только свои записи: остальные отдают
+    устаревшие ответы, а лимиты умножаются на число воркеров.
+    """
+    if not settings.REQUIRE_SHARED_CACHE:
+        return []
+    aliases = {"default", settings.CATALOG_CACHE_ALIAS}
+    if settings.THROTTLE_BACKEND == "cache":
+        aliases.add(settings.THROTTLE_CACHE_ALIAS)
+    errors = [
+        Error(
+            f'Кэш "{alias}" хранится в памяти процесса и не общий '
+            "для воркеров.",
+            hint="Укажите CACHE_BACKEND и CACHE_LOCATION общего кэша, "
+            "например Memcached, или REQUIRE_SHARED_CACHE=0 для "
+            "запуска в одном процессе.",
+            id="api.E001",
+        )
+        for alias in sorted(aliases)
+        if settings.CACHES[alias]["BACKEND"] in PROCESS_LOCAL_BACKENDS
+    ]
+    if settings.THROTTLE_ENABLED and settings.THROTTLE_BACKEND == "local":
+        errors.append(
+            Error(
+                'THROTTLE_BACKEND="local" держит корзины в памяти процесса:'
+                " лимиты умножаются на число воркеров.",
+                hint='Используйте THROTTLE_BACKEND="cache" с общим кэшем '
+                "или REQUIRE_SHARED_CACHE=0 для запуска в одном процессе.",
+                id="api.E002",
+            )
+        )
+    return errors
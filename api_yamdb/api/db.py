@@ -0,0 +1,173 @@
+import random
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.dispatch import receiver
+from django.utils.functional import SimpleLazyObject
+
+PIN_COOKIE = "yamdb_primary"
+PIN_KEY = "replica:pin:{}"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_reads = ContextVar("replica_reads", default=None)
+# Когда соединение последний раз отработало запрос (time.monotonic()).
+_last_used = weakref.WeakKeyDictionary()
+
+
+class ReplicaReads:
+    """Разрешение текущего запроса читать с реплики.
+
+    Клиент, который недавно писал, закреплён за основной базой:
+    по cookie, а после аутентификации DRF ещё и по ключу в кэше, чтобы
+    закрепление работало и для клиентов без cookie.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.pinned = PIN_COOKIE in request.COOKIES
+        self.user_checked = False
+
+    def allowed(self):
+        if self.pinned:
+            return False
+        if not self.user_checked:
+            # До аутентификации DRF здесь ленивый пользователь сессии:
+            # вычислять его нельзя, это само было бы чтением из базы.
+            user = self.request.__dict__.get("user")
+            if user is not None and not isinstance(user, SimpleLazyObject):
+                self.user_checked = True
+                if user.is_authenticated:
+                    self.pinned = bool(cache.get(PIN_KEY.format(user.pk)))
+        return not self.pinned
+
+
+@contextmanager
+def use_primary():
+    """Читать из основной базы внутри блока."""
+    token = _reads.set(None)
+    try:
+        yield
+    finally:
+        _reads.reset(token)
+
+
+class ReplicaRouter:
+    """Отправляет чтения безопасных запросов к api.v1 на реплики.
+
+    Реплики — алиасы из DATABASE_REPLICAS. Всё остальное, включая
+    чтения внутри транзакции основной базы, идёт в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        reads = _reads.get()
+        if (
+            not settings.DATABASE_REPLICAS
+            or reads is None
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+            or not reads.allowed()
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+def is_api_view(view_func):
+    view_class = getattr(view_func, "cls", None)
+    return view_class is not None and view_class.__module__.startswith(
+        "api.v1."
+    )
+
+
+class ReplicaMiddleware:
+    """Включает чтение с реплик для вьюх api.v1 и закрепляет писавших.
+
+    После успешного небезопасного запроса клиент на REPLICA_PIN_SECONDS
+    читает из основной базы и видит свои изменения, даже если реплика
+    отстаёт.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            token = getattr(request, "_replica_token", None)
+            if token is not None:
+                _reads.reset(token)
+        if (
+            request.method not in SAFE_METHODS
+            and getattr(request, "_api_view", False)
+            and response.status_code < 400
+        ):
+            self.pin(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._api_view = is_api_view(view_func)
+        if request._api_view and request.method in SAFE_METHODS:
+            request._replica_token = _reads.set(ReplicaReads(request))
+
+    def pin(self, request, response):
+        seconds = settings.REPLICA_PIN_SECONDS
+        response.set_cookie(
+            PIN_COOKIE, "1", max_age=seconds, httponly=True, samesite="Lax"
+        )
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            cache.set(PIN_KEY.format(user.pk), 1, seconds)
+
+
+def is_idle(connection, now):
+    used_at = _last_used.get(connection)
+    return used_at is None or now - used_at > settings.DB_HEALTH_CHECK_IDLE
+
+
+@receiver(request_started)
+def check_connections(**kwargs):
+    """Закрывает постоянные соединения, которые перестали отвечать.
+
+    Django 2.2 проверяет соединение только после ошибки в нём, и первый
+    запрос после перезапуска PostgreSQL падал бы. Проверка — SELECT 1,
+    и только для соединения, простоявшего дольше DB_HEALTH_CHECK_IDLE
+    секунд: соединение под нагрузкой не получает лишнего запроса к базе
+    на каждый запрос, включая ответы из кэша и 429. Новое соединение
+    откроется при обращении.
+    """
+    if not settings.DB_HEALTH_CHECKS:
+        return
+    now = time.monotonic()
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and not connection.in_atomic_block
+            and is_idle(connection, now)
+            and not connection.is_usable()
+        ):
+            connection.close()
+
+
+@receiver(request_finished)
+def mark_connections_used(**kwargs):
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            _last_used[connection] = now
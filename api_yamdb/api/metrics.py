@@ -0,0 +1,300 @@
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = "unmatched"
+
+
+class MetricsRegistry:
+    """Счётчики запросов, общие для всех процессов gunicorn.
+
+    Запрос только увеличивает счётчики процесса в памяти под
+    блокировкой. Фоновый поток раз в ``METRICS_FLUSH_INTERVAL`` секунд
+    атомарно перезаписывает ими файл процесса в ``METRICS_DIR``, так же
+    делают /metrics перед чтением и gunicorn при выходе воркера.
+    ``render`` суммирует файлы всех процессов, в том числе
+    завершившихся, поэтому счётчики не убывают при перезапуске
+    воркеров. Каталог очищается при старте gunicorn.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.pid = None
+        self.reset()
+
+    def reset(self):
+        self.routes = {}
+        self.requests = defaultdict(int)
+        self.dirty = False
+
+    def route_stats(self, route):
+        stats = self.routes.get(route)
+        if stats is None:
+            # Последняя ячейка гистограмм — дольше самой большой границы.
+            stats = self.routes[route] = {
+                "buckets": [0] * (len(BUCKETS) + 1),
+                "duration": 0.0,
+                "queries": 0,
+                "db_time": 0.0,
+                "render": 0.0,
+                "serialize_buckets": [0] * (len(BUCKETS) + 1),
+                "serialize": 0.0,
+            }
+        return stats
+
+    def ensure_process(self):
+        # После fork счётчики и поток записи родителя не годятся, а новый
+        # процесс с тем же pid не должен затереть файл прежнего.
+        if self.pid == os.getpid():
+            return
+        self.reset()
+        self.pid = os.getpid()
+        self.name = f"{self.pid}-{uuid.uuid4().hex}.json"
+        threading.Thread(
+            target=self.flush_loop, name="metrics-flush", daemon=True
+        ).start()
+
+    def observe(self, route, method, status, sample):
+        duration, queries, db_time, render, serialize = sample
+        with self.lock:
+            self.ensure_process()
+            stats = self.route_stats(route)
+            stats["buckets"][bisect_left(BUCKETS, duration)] += 1
+            stats["duration"] += duration
+            stats["queries"] += queries
+            stats["db_time"] += db_time
+            stats["render"] += render
+            if serialize is not None:
+                stats["serialize_buckets"][
+                    bisect_left(BUCKETS, serialize)
+                ] += 1
+                stats["serialize"] += serialize
+            self.requests[(route, method, status)] += 1
+            self.dirty = True
+
+    def flush_loop(self):
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        """Записывает счётчики процесса в его файл, если они менялись."""
+        with self.lock:
+            if self.pid != os.getpid() or not self.dirty:
+                return
+            snapshot = json.dumps(
+                {
+                    "routes": self.routes,
+                    "requests": [
+                        [*key, count] for key, count in self.requests.items()
+                    ],
+                }
+            )
+            self.dirty = False
+        path = os.path.join(settings.METRICS_DIR, self.name)
+        with self.write_lock:
+            try:
+                os.makedirs(settings.METRICS_DIR, exist_ok=True)
+                with open(f"{path}.tmp", "w") as file:
+                    file.write(snapshot)
+                os.replace(f"{path}.tmp", path)
+            except OSError:
+                # Счётчики остаются в памяти и попадут в файл позже.
+                with self.lock:
+                    self.dirty = True
+
+    def collect(self):
+        routes = {}
+        requests = defaultdict(int)
+        for name in glob.glob(os.path.join(settings.METRICS_DIR, "*.json")):
+            try:
+                with open(name) as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for route, values in snapshot["routes"].items():
+                stats = routes.setdefault(route, {})
+                for key, value in values.items():
+                    if isinstance(value, list):
+                        total = stats.setdefault(key, [0] * len(value))
+                        for index, count in enumerate(value):
+                            total[index] += count
+                    else:
+                        stats[key] = stats.get(key, 0) + value
+            for route, method, status, count in snapshot["requests"]:
+                requests[(route, method, status)] += count
+        return routes, requests
+
+    def clear(self):
+        """Обнуляет счётчики всех процессов."""
+        with self.lock:
+            self.reset()
+            for name in glob.glob(os.path.join(settings.METRICS_DIR, "*")):
+                os.remove(name)
+
+    def render(self):
+        self.flush()
+        routes, requests = self.collect()
+        lines = [
+            "# HELP yamdb_http_requests_total Обработанные запросы.",
+            "# TYPE yamdb_http_requests_total counter",
+        ]
+        for (route, method, status), count in sorted(requests.items()):
+            lines.append(
+                f'yamdb_http_requests_total{{route="{route}",'
+                f'method="{method}",status="{status}"}} {count}'
+            )
+        for name, buckets, total, help_text in (
+            (
+                "yamdb_http_request_duration_seconds",
+                "buckets",
+                "duration",
+                "Время ответа.",
+            ),
+            (
+                "yamdb_serialize_duration_seconds",
+                "serialize_buckets",
+                "serialize",
+                "Время сериализаторов без запросов к базе.",
+            ),
+        ):
+            lines += [
+                f"# HELP {name} {help_text}",
+                f"# TYPE {name} histogram",
+            ]
+            for route, stats in sorted(routes.items()):
+                if any(stats[buckets]):
+                    lines += self.histogram(
+                        name, route, stats[buckets], stats[total]
+                    )
+        for name, key, help_text in (
+            ("yamdb_db_queries_total", "queries", "Запросы к базе."),
+            ("yamdb_db_duration_seconds_total", "db_time", "Время в базе."),
+            (
+                "yamdb_render_duration_seconds_total",
+                "render",
+                "Время отрисовки ответа рендерером.",
+            ),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for route, stats in sorted(routes.items()):
+                lines.append(f'{name}{{route="{route}"}} {stats[key]}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def histogram(name, route, buckets, total):
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), buckets):
+            cumulative += count
+            lines.append(
+                f'{name}_bucket{{route="{route}",le="{bound}"}} {cumulative}'
+            )
+        lines.append(f'{name}_sum{{route="{route}"}} {total}')
+        lines.append(f'{name}_count{{route="{route}"}} {cumulative}')
+        return lines
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def serializing(request):
+    """Добавляет время блока к времени сериализации запроса.
+
+    Запросы к базе внутри блока (подгрузка связанных данных) уже
+    учтены во времени базы и из времени сериализации вычитаются.
+    """
+    request = getattr(request, "_request", request)
+    timer = getattr(request, "_metrics_timer", None)
+    db_before = timer.time if timer else 0.0
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if timer:
+            elapsed -= timer.time - db_before
+        request._metrics_serialize = (
+            getattr(request, "_metrics_serialize", 0.0) + elapsed
+        )
+
+
+class QueryTimer:
+    """Обёртка execute_wrapper: считает запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """Замеряет время ответа, запросы к базе, сериализацию и отрисовку
+    по маршрутам.
+
+    Сериализацию отмечают вьюхи блоком ``serializing``. Отрисовкой
+    считается время от возврата ответа вьюхой до готового тела, то есть
+    работа рендерера DRF.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = request._metrics_timer = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        finished = time.perf_counter()
+        view_done = getattr(request, "_metrics_view_done", finished)
+        render = finished - view_done
+        serialize = getattr(request, "_metrics_serialize", None)
+        match = request.resolver_match
+        registry.observe(
+            match.url_name if match and match.url_name else UNMATCHED,
+            request.method,
+            response.status_code,
+            (finished - started, timer.count, timer.time, render, serialize),
+        )
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = (
+                f"app;dur={(view_done - started) * 1000:.1f}, "
+                f"db;dur={timer.time * 1000:.1f};"
+                f'desc="{timer.count} queries", '
+                f"serialize;dur={(serialize or 0.0) * 1000:.1f}, "
+                f"render;dur={render * 1000:.1f}"
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # Вызывается после вьюхи, но до рендеринга ответа.
+        request._metrics_view_done = time.perf_counter()
+        return response
+
+
+def metrics_view(request):
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,273 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from reviews.leaderboards import refresh_rankings
+from reviews.models import Category, Genre, GenreTitle, Review, Title
+from reviews.search import reindex_titles
+from reviews.signals import change_activity, change_rating
+from reviews.versions import bump_version
+from users.models import User
+
+from .serializers import ReviewBatchItemSerializer, TitleBatchItemSerializer
+
+CREATED = "created"
+UPDATED = "updated"
+ERROR = "error"
+# Не больше параметров в одном запросе, чем допускает SQLite.
+DELETE_CHUNK = 500
+
+
+def validate_batch(data, item_serializer_class):
+    """Проверяет формат пакета и каждого элемента без запросов к базе.
+
+    Возвращает список результатов и словарь валидных элементов по индексу.
+    """
+    if not isinstance(data, list):
+        raise ValidationError("Ожидается список объектов.")
+    if len(data) > settings.BATCH_MAX_SIZE:
+        raise ValidationError(
+            f"В одном пакете не больше {settings.BATCH_MAX_SIZE} объектов."
+        )
+    results = [{"index": index} for index in range(len(data))]
+    valid = {}
+    for index, item in enumerate(data):
+        serializer = item_serializer_class(data=item)
+        if serializer.is_valid():
+            valid[index] = serializer.validated_data
+        else:
+            fail(results[index], serializer.errors)
+    return results, valid
+
+
+def fail(result, errors):
+    result["status"] = ERROR
+    result["errors"] = errors
+
+
+def save_title_batch(data):
+    """Создаёт и обновляет произведения пакетом в одной транзакции.
+
+    Категории, жанры и обновляемые произведения читаются одним запросом
+    на пакет, существующие связи с жанрами сверяются ещё одним.
+    """
+    results, valid = validate_batch(data, TitleBatchItemSerializer)
+    to_create, to_update, genre_ids = resolve_titles(valid, results)
+    titles = {**to_create, **to_update}
+
+    with transaction.atomic():
+        if connection.features.can_return_ids_from_bulk_insert:
+            Title.objects.bulk_create(to_create.values())
+        else:
+            for title in to_create.values():
+                title.save()
+        Title.objects.bulk_update(
+            to_update.values(), ["name", "year", "description", "category"]
+        )
+        sync_genre_links(
+            {titles[index].id: genre_ids[index] for index in titles},
+            [title.id for title in to_update.values()],
+        )
+        reindex_titles(title.id for title in titles.values())
+        # У новых произведений ещё нет отзывов и мест в рейтингах.
+        refresh_rankings(title.id for title in to_update.values())
+
+    for index, title in titles.items():
+        results[index]["status"] = CREATED if index in to_create else UPDATED
+        results[index]["id"] = title.id
+    if titles:
+        bump_version(Title)
+        bump_version(GenreTitle)
+    return results
+
+
+def resolve_titles(valid, results):
+    """Разрешает slug и id пакета, возвращает объекты для записи."""
+    categories = dict(
+        Category.objects.filter(
+            slug__in={item["category"] for item in valid.values()}
+        ).values_list("slug", "id")
+    )
+    genres = dict(
+        Genre.objects.filter(
+            slug__in={
+                slug for item in valid.values() for slug in item["genre"]
+            }
+        ).values_list("slug", "id")
+    )
+    existing = Title.objects.in_bulk(
+        [item["id"] for item in valid.values() if "id" in item]
+    )
+
+    to_create, to_update, genre_ids = {}, {}, {}
+    for index, item in valid.items():
+        errors = {}
+        if item["category"] not in categories:
+            errors["category"] = [f"Категория {item['category']} не найдена."]
+        missing = [slug for slug in item["genre"] if slug not in genres]
+        if missing:
+            errors["genre"] = [f"Жанр {slug} не найден." for slug in missing]
+        if "id" in item and item["id"] not in existing:
+            errors["id"] = [f"Произведение {item['id']} не найдено."]
+        if errors:
+            fail(results[index], errors)
+            continue
+        title = existing[item["id"]] if "id" in item else Title()
+        title.name = item["name"]
+        title.year = item["year"]
+        title.description = item.get("description")
+        title.category_id = categories[item["category"]]
+        target = to_update if "id" in item else to_create
+        target[index] = title
+        genre_ids[index] = {genres[slug] for slug in item["genre"]}
+    return to_create, to_update, genre_ids
+
+
+def sync_genre_links(wanted, updated_ids):
+    """Удаляет лишние и добавляет недостающие связи с жанрами."""
+    present = set()
+    stale = []
+    for link_id, title_id, genre_id in GenreTitle.objects.filter(
+        title_id__in=updated_ids
+    ).values_list("id", "title_id", "genre_id"):
+        if genre_id in wanted[title_id]:
+            present.add((title_id, genre_id))
+        else:
+            stale.append(link_id)
+    if stale:
+        # Сырой DELETE вместо QuerySet.delete(): тот отправил бы
+        # post_delete на каждую связь, а поиск и версии кэша обновляются
+        # один раз на пакет в save_title_batch.
+        table = connection.ops.quote_name(GenreTitle._meta.db_table)
+        with connection.cursor() as cursor:
+            while stale:
+                chunk, stale = stale[:DELETE_CHUNK], stale[DELETE_CHUNK:]
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE id IN "
+                    f"({', '.join(['%s'] * len(chunk))})",
+                    chunk,
+                )
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title_id=title_id, genre_id=genre_id)
+        for title_id, ids in wanted.items()
+        for genre_id in ids
+        if (title_id, genre_id) not in present
+    )
+
+
+def save_review_batch(data):
+    """Импортирует отзывы пакетом с учётом unique_author_title.
+
+    Конфликты с уже существующими отзывами и внутри пакета
+    возвращаются как ошибки элементов, а не 500.
+    """
+    results, valid = validate_batch(data, ReviewBatchItemSerializer)
+    authors = dict(
+        User.objects.filter(
+            username__in={item["author"] for item in valid.values()}
+        ).values_list("username", "id")
+    )
+    title_ids = set(
+        Title.objects.filter(
+            id__in={item["title"] for item in valid.values()}
+        ).values_list("id", flat=True)
+    )
+    taken = set(
+        Review.objects.filter(
+            title_id__in=title_ids, author_id__in=authors.values()
+        ).values_list("author_id", "title_id")
+    )
+
+    reviews = {}
+    for index, item in valid.items():
+        errors = {}
+        if item["author"] not in authors:
+            errors["author"] = [f"Пользователь {item['author']} не найден."]
+        if item["title"] not in title_ids:
+            errors["title"] = [f"Произведение {item['title']} не найдено."]
+        pair = (authors.get(item["author"]), item["title"])
+        if not errors and pair in taken:
+            errors["non_field_errors"] = [
+                "Пользователь уже оставил отзыв на это произведение."
+            ]
+        if errors:
+            fail(results[index], errors)
+            continue
+        taken.add(pair)
+        reviews[index] = Review(
+            author_id=pair[0],
+            title_id=pair[1],
+            text=item["text"],
+            score=item["score"],
+            pub_date=item.get("pub_date", timezone.now()),
+        )
+
+    saved = insert_reviews(reviews, results)
+    for index, review in saved.items():
+        results[index]["status"] = CREATED
+        results[index]["id"] = review.id
+    if saved:
+        bump_version(Review)
+    return results
+
+
+def insert_reviews(reviews, results):
+    """Пишет отзывы одним INSERT, при гонке — поштучно в savepoint."""
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                Review.objects.bulk_create(reviews.values())
+            saved = reviews
+        except IntegrityError:
+            saved = {}
+            for index, review in reviews.items():
+                try:
+                    with transaction.atomic():
+                        Review.objects.bulk_create([review])
+                except IntegrityError:
+                    fail(
+                        results[index],
+                        {
+                            "non_field_errors": [
+                                "Пользователь уже оставил отзыв на это "
+                                "произведение."
+                            ]
+                        },
+                    )
+                else:
+                    saved[index] = review
+        if any(review.id is None for review in saved.values()):
+            # Не все базы возвращают id из bulk_create.
+            ids = {
+                (author_id, title_id): review_id
+                for review_id, author_id, title_id in Review.objects.filter(
+                    title_id__in={r.title_id for r in saved.values()},
+                    author_id__in={r.author_id for r in saved.values()},
+                ).values_list("id", "author_id", "title_id")
+            }
+            for review in saved.values():
+                review.id = ids[(review.author_id, review.title_id)]
+        shift_counters(saved.values())
+    return saved
+
+
+def shift_counters(reviews):
+    """Сдвигает счётчики произведений и авторов на новые отзывы."""
+    scores, counts = Counter(), Counter()
+    author_scores, author_counts = Counter(), Counter()
+    for review in reviews:
+        scores[review.title_id] += review.score
+        counts[review.title_id] += 1
+        author_scores[review.author_id] += review.score
+        author_counts[review.author_id] += 1
+    for title_id in counts:
+        change_rating(title_id, scores[title_id], counts[title_id])
+    for author_id in author_counts:
+        change_activity(
+            author_id,
+            reviews=author_counts[author_id],
+            scores=author_scores[author_id],
+        )
+    refresh_rankings(counts)
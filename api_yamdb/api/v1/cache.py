@@ -0,0 +1,71 @@
+import hashlib
+
+from api.db import use_primary
+from django.conf import settings
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from reviews.versions import get_catalog_cache, get_versions
+
+RESPONSE_KEY = "catalog:response:{}"
+
+
+class CatalogCacheMixin:
+    """Кэш ответов каталога, ключом которого служат версии моделей.
+
+    Любая запись в модели из ``cache_models`` сдвигает её версию, и
+    ключи прежних ответов перестают совпадать. Тот же ключ служит
+    ETag, поэтому на ``If-None-Match`` ответ 304 отдаётся без обращения
+    к кэшу и базе.
+    """
+
+    cache_models = ()
+
+    def get_cache_fingerprint(self, request):
+        query = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        parts = [request.get_host(), request.path, repr(query)]
+        parts.extend(
+            str(version) for version in get_versions(self.cache_models)
+        )
+        return hashlib.md5("\n".join(parts).encode()).hexdigest()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        fingerprint = self.get_cache_fingerprint(request)
+        etag = quote_etag(fingerprint)
+        if etag in request.META.get("HTTP_IF_NONE_MATCH", ""):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        cache = get_catalog_cache()
+        key = RESPONSE_KEY.format(fingerprint)
+        data = cache.get(key)
+        if data is None:
+            # Ответ живёт в кэше до следующей версии: отставшая реплика
+            # закрепила бы в нём устаревшие данные.
+            with use_primary():
+                response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        else:
+            response = Response(data)
+        response["ETag"] = etag
+        return response
+
+
+class CachedListMixin(CatalogCacheMixin):
+    """Кэширует ответы action ``list``."""
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CatalogCacheMixin):
+    """Кэширует ответы action ``retrieve``."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,124 @@
+import csv
+import json
+
+from django.conf import settings
+from reviews.models import Comment, GenreTitle, Review, Title
+
+
+def title_rows(chunk_size):
+    """Произведения с рейтингом; жанры сливаются вторым курсором по id."""
+    titles = (
+        Title.objects.order_by("id")
+        .values_list(
+            "id",
+            "name",
+            "year",
+            "description",
+            "category__slug",
+            "rating_sum",
+            "rating_count",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    links = (
+        GenreTitle.objects.order_by("title_id", "genre_id")
+        .values_list("title_id", "genre__slug")
+        .iterator(chunk_size=chunk_size)
+    )
+    link = next(links, None)
+    for title_id, name, year, description, category, total, count in titles:
+        genres = []
+        while link is not None and link[0] <= title_id:
+            if link[0] == title_id:
+                genres.append(link[1])
+            link = next(links, None)
+        yield {
+            "id": title_id,
+            "name": name,
+            "year": year,
+            "description": description,
+            "category": category,
+            "genre": genres,
+            "rating": total // count if count else None,
+        }
+
+
+def review_rows(chunk_size):
+    fields = ("id", "title_id", "text", "author", "score", "pub_date")
+    rows = (
+        Review.objects.order_by("id")
+        .values_list(
+            "id", "title_id", "text", "author__username", "score", "pub_date"
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    return (dict(zip(fields, row)) for row in rows)
+
+
+def comment_rows(chunk_size):
+    fields = ("id", "review_id", "text", "author", "pub_date")
+    rows = (
+        Comment.objects.order_by("id")
+        .values_list("id", "review_id", "text", "author__username", "pub_date")
+        .iterator(chunk_size=chunk_size)
+    )
+    return (dict(zip(fields, row)) for row in rows)
+
+
+EXPORT_RESOURCES = {
+    "titles": (
+        title_rows,
+        (
+            "id",
+            "name",
+            "year",
+            "description",
+            "category",
+            "genre",
+            "rating",
+        ),
+    ),
+    "reviews": (
+        review_rows,
+        ("id", "title_id", "text", "author", "score", "pub_date"),
+    ),
+    "comments": (
+        comment_rows,
+        ("id", "review_id", "text", "author", "pub_date"),
+    ),
+}
+
+
+class Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def _plain(value):
+    if isinstance(value, list):
+        return " ".join(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def stream_ndjson(resource):
+    rows, _ = EXPORT_RESOURCES[resource]
+    for row in rows(settings.EXPORT_CHUNK_SIZE):
+        yield json.dumps(row, ensure_ascii=False, default=_plain) + "\n"
+
+
+def stream_csv(resource):
+    rows, columns = EXPORT_RESOURCES[resource]
+    writer = csv.writer(Echo(), lineterminator="\n")
+    yield writer.writerow(columns)
+    for row in rows(settings.EXPORT_CHUNK_SIZE):
+        yield writer.writerow([_plain(row[column]) for column in columns])
+
+
+EXPORT_FORMATS = {
+    "ndjson": (stream_ndjson, "application/x-ndjson"),
+    "csv": (stream_csv, "text/csv"),
+}
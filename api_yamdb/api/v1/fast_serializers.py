@@ -0,0 +1,156 @@
+from collections import defaultdict
+
+from api.metrics import serializing
+from django.conf import settings
+from rest_framework.fields import DateTimeField
+from rest_framework.response import Response
+from reviews.models import GenreTitle
+
+from .serializers import (
+    CommentSerializer,
+    ReviewSerializer,
+    TitleGetSerializer,
+)
+
+DATETIME = DateTimeField()
+
+
+class FastListSerializer:
+    """Сериализатор списков только для чтения, без полей DRF.
+
+    Строки читаются через ``.values()`` и сразу превращаются в словари
+    с теми же ключами и значениями, что у ``serializer_class``: ответ
+    совпадает побайтно. Поле, значение которого не равно одноимённой
+    колонке, описывается в ``columns`` и методе ``get_<поле>``.
+    """
+
+    serializer_class = None
+    columns = {}
+
+    def __init__(self, fieldset=None):
+        self.fields = [
+            name
+            for name in self.serializer_class.Meta.fields
+            if fieldset is None or name in fieldset
+        ]
+
+    def get_rows(self, queryset):
+        """Запрос строк для ``to_representation``."""
+        columns = {queryset.model._meta.pk.name}
+        for name in self.fields:
+            columns.update(self.columns.get(name, (name,)))
+        return queryset.prefetch_related(None).values(*columns)
+
+    def prepare(self, rows):
+        """Подгружает данные, которых нет в строках, одним запросом."""
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        self.prepare(rows)
+        getters = [
+            (name, getattr(self, f"get_{name}", None)) for name in self.fields
+        ]
+        return [
+            {
+                name: row[name] if getter is None else getter(row)
+                for name, getter in getters
+            }
+            for row in rows
+        ]
+
+
+class FastTitleSerializer(FastListSerializer):
+    serializer_class = TitleGetSerializer
+    columns = {
+        "genre": (),
+        "category": ("category_id", "category__name", "category__slug"),
+        "rating": ("rating_sum", "rating_count"),
+        "reviews_count": ("rating_count",),
+    }
+
+    def prepare(self, rows):
+        self.genres = defaultdict(list)
+        if "genre" not in self.fields:
+            return
+        for title_id, name, slug in (
+            GenreTitle.objects.filter(title_id__in=[row["id"] for row in rows])
+            .order_by("genre_id")
+            .values_list("title_id", "genre__name", "genre__slug")
+        ):
+            self.genres[title_id].append({"name": name, "slug": slug})
+
+    def get_genre(self, row):
+        return self.genres[row["id"]]
+
+    def get_category(self, row):
+        if row["category_id"] is None:
+            return None
+        return {"name": row["category__name"], "slug": row["category__slug"]}
+
+    def get_rating(self, row):
+        if not row["rating_count"]:
+            return None
+        return int(row["rating_sum"] / row["rating_count"])
+
+    def get_reviews_count(self, row):
+        return row["rating_count"]
+
+
+class FastReviewSerializer(FastListSerializer):
+    serializer_class = ReviewSerializer
+    columns = {"author": ("author__username",)}
+
+    def get_author(self, row):
+        return row["author__username"]
+
+    def get_pub_date(self, row):
+        return DATETIME.to_representation(row["pub_date"])
+
+
+class FastCommentSerializer(FastReviewSerializer):
+    serializer_class = CommentSerializer
+
+
+class SerializeTimingMixin:
+    """``list`` и ``retrieve`` ModelViewSet, в которых вычисление
+    ``serializer.data`` отмечено для метрик блоком ``serializing``."""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(
+            queryset if page is None else page, many=True
+        )
+        with serializing(request):
+            data = serializer.data
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_object())
+        with serializing(request):
+            data = serializer.data
+        return Response(data)
+
+
+class FastListMixin(SerializeTimingMixin):
+    """Отдаёт action ``list`` через ``fast_serializer_class``.
+
+    Отключается настройкой FAST_LIST_SERIALIZERS, тогда список
+    сериализуется обычным ``get_serializer``.
+    """
+
+    fast_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_LIST_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+        serializer = self.fast_serializer_class(self.get_fieldset())
+        rows = serializer.get_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        with serializing(request):
+            data = serializer.to_representation(rows if page is None else page)
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
@@ -0,0 +1,95 @@
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def split_names(value):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class SparseFieldsSerializerMixin:
+    """Оставляет в сериализаторе только поля из ``context["fields"]``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fieldset = self.context.get("fields")
+        if fieldset is not None:
+            for name in set(self.fields) - fieldset:
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """Выборочные поля ``?fields=`` и вложенные связи ``?expand=``.
+
+    ``fields`` перечисляет поля ответа, ``expand`` добавляет к ним
+    связи из ``select_expandable`` и ``prefetch_expandable``. Без обоих
+    параметров ответ не меняется. С ними из базы читаются только
+    колонки запрошенных полей, а незапрошенные связи не присоединяются
+    и не подгружаются. Поле, которое не совпадает с колонкой модели,
+    описывается в ``sparse_columns``.
+    """
+
+    sparse_actions = ("list", "retrieve")
+    select_expandable = ()
+    prefetch_expandable = ()
+    sparse_columns = {}
+
+    def get_fieldset(self):
+        """Имена запрошенных полей или None, если ответ полный."""
+        if self.action not in self.sparse_actions:
+            return None
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = self.parse_fieldset(self.request.query_params)
+        return self._fieldset
+
+    def parse_fieldset(self, params):
+        if FIELDS_PARAM not in params and EXPAND_PARAM not in params:
+            return None
+        available = set(self.get_serializer_class().Meta.fields)
+        relations = {*self.select_expandable, *self.prefetch_expandable}
+        if FIELDS_PARAM in params:
+            fields = split_names(params[FIELDS_PARAM])
+        else:
+            fields = available - relations
+        expand = split_names(params.get(EXPAND_PARAM, ""))
+        errors = {}
+        if fields - available:
+            errors[FIELDS_PARAM] = [
+                "Неизвестные поля: " + ", ".join(sorted(fields - available))
+            ]
+        if expand - relations:
+            errors[EXPAND_PARAM] = [
+                "Неизвестные связи: " + ", ".join(sorted(expand - relations))
+            ]
+        if errors:
+            raise ValidationError(errors)
+        return frozenset(fields | expand)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_fieldset()
+        return context
+
+    def filter_queryset(self, queryset):
+        # Здесь, а не в get_queryset: вьюсеты вложенных ресурсов
+        # переопределяют get_queryset целиком.
+        queryset = super().filter_queryset(queryset)
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return queryset
+        selected = [
+            name for name in self.select_expandable if name in fieldset
+        ]
+        prefetched = [
+            name for name in self.prefetch_expandable if name in fieldset
+        ]
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if selected:
+            queryset = queryset.select_related(*selected)
+        if prefetched:
+            queryset = queryset.prefetch_related(*prefetched)
+        columns = {queryset.model._meta.pk.name}
+        for name in fieldset - set(self.prefetch_expandable):
+            columns.update(self.sparse_columns.get(name, (name,)))
+        return queryset.only(*columns)
@@ -1,15 +1,94 @@
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.db.models.functions import Cast, NullIf
 from django_filters import CharFilter, FilterSet, NumberFilter
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
 from reviews.models import Title
+from reviews.search import rank_titles
 
 
 class TitleFilter(FilterSet):
-    """Кастомный фильтр."""
+    """Кастомный фильтр.
 
-    category = CharFilter(field_name="category__slug", lookup_expr="icontains")
-    genre = CharFilter(field_name="genre__slug", lookup_expr="icontains")
+    ``category``, ``genre`` и ``year`` сравниваются точно, ``*_prefix``
+    ищут по началу slug: оба режима используют индексы. Поиск по
+    подстроке остаётся доступным через ``*_contains``.
+    """
+
+    category = CharFilter(field_name="category__slug")
+    category_prefix = CharFilter(
+        field_name="category__slug", lookup_expr="startswith"
+    )
+    category_contains = CharFilter(
+        field_name="category__slug", lookup_expr="icontains"
+    )
+    genre = CharFilter(field_name="genre__slug")
+    genre_prefix = CharFilter(
+        field_name="genre__slug", lookup_expr="startswith", distinct=True
+    )
+    genre_contains = CharFilter(
+        field_name="genre__slug", lookup_expr="icontains", distinct=True
+    )
     name = CharFilter(field_name="name", lookup_expr="icontains")
-    year = NumberFilter(field_name="year", lookup_expr="icontains")
+    year = NumberFilter(field_name="year")
+    year_min = NumberFilter(field_name="year", lookup_expr="gte")
+    year_max = NumberFilter(field_name="year", lookup_expr="lte")
 
     class Meta:
         model = Title
         fields = "__all__"
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск по ``?search=`` с сортировкой по релевантности."""
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        if not query.strip():
+            return queryset
+        paginator = getattr(view, "paginator", None)
+        mode = getattr(paginator, "mode_query_param", None)
+        if mode and request.query_params.get(mode) == paginator.cursor_mode:
+            # Курсор листает по id и потерял бы порядок релевантности.
+            raise ValidationError(
+                {
+                    self.search_param: [
+                        "Поиск не поддерживает курсорную пагинацию."
+                    ]
+                }
+            )
+        return rank_titles(queryset, query)
+
+
+class UserStatsOrderingFilter(OrderingFilter):
+    """Сортировка пользователей ``?ordering=`` по счётчикам активности.
+
+    Средняя оценка считается в запросе из сохранённых счётчиков,
+    пользователи без отзывов при ней идут последними. При равных
+    значениях порядок задаёт username, чтобы страницы не пересекались.
+    """
+
+    expressions = {
+        "average_score": ExpressionWrapper(
+            Cast(F("scores_sum"), FloatField())
+            / NullIf(F("reviews_count"), 0),
+            output_field=FloatField(),
+        ),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        ordering = []
+        for term in super().get_ordering(request, queryset, view) or ():
+            name = term.lstrip("-")
+            expression = self.expressions.get(name)
+            if expression is None:
+                ordering.append(term)
+            elif term.startswith("-"):
+                ordering.append(expression.desc(nulls_last=True))
+            else:
+                ordering.append(expression.asc(nulls_last=True))
+        if "username" not in ordering and "-username" not in ordering:
+            ordering.append("username")
+        return ordering
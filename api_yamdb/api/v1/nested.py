@@ -0,0 +1,67 @@
+from django.shortcuts import get_object_or_404
+
+PARENT_CONTEXT = "parent"
+
+
+class NestedParentMixin:
+    """Родительские объекты вложенного маршрута из аргументов URL.
+
+    ``parent_lookups`` сопоставляет аргументы URL с путями от модели
+    ``queryset`` к родителям, например ``{"review_id": "review",
+    "title_id": "review__title"}``, а ``parent_field`` — поле,
+    в которое при создании записывается непосредственный родитель.
+
+    Выборка дочерних объектов сразу ограничена всей цепочкой
+    родителей, поэтому найденный объект или непустая страница сами
+    доказывают, что родители существуют, и отдельно родитель не
+    читается. Его загружает ``get_parent`` одним запросом, который
+    проверяет всю цепочку: при создании, для пустой страницы
+    и по требованию сериализатора вызовом ``context["parent"]()``.
+    Результат запоминается на время запроса.
+    """
+
+    parent_field = None
+    parent_lookups = {}
+
+    def get_parent_filter(self):
+        return {
+            lookup: self.kwargs[kwarg]
+            for kwarg, lookup in self.parent_lookups.items()
+        }
+
+    def get_queryset(self):
+        return super().get_queryset().filter(**self.get_parent_filter())
+
+    def get_parent(self):
+        """Непосредственный родитель или 404, если цепочка не сходится."""
+        if not hasattr(self, "_parent"):
+            field = self.queryset.model._meta.get_field(self.parent_field)
+            lookups = {}
+            for lookup, value in self.get_parent_filter().items():
+                if lookup == self.parent_field:
+                    lookups["pk"] = value
+                else:
+                    lookups[lookup.split("__", 1)[1]] = value
+            columns = [lookup.split("__")[0] for lookup in lookups]
+            self._parent = get_object_or_404(
+                field.related_model.objects.only(*columns), **lookups
+            )
+        return self._parent
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context[PARENT_CONTEXT] = self.get_parent
+        return context
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not (queryset if page is None else page):
+            # Пустой список не отличает родителя без детей
+            # от несуществующего.
+            self.get_parent()
+        return page
+
+    def perform_create(self, serializer):
+        serializer.save(
+            author=self.request.user, **{self.parent_field: self.get_parent()}
+        )
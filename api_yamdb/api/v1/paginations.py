@@ -0,0 +1,39 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """Курсорная пагинация по id без COUNT(*) и OFFSET."""
+
+    ordering = ("id",)
+    page_size_query_param = "page_size"
+
+    @property
+    def max_page_size(self):
+        return settings.CURSOR_PAGINATION_MAX_PAGE_SIZE
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """Постраничная пагинация с включаемым курсорным режимом.
+
+    Курсорный режим включается параметром ``?pagination=cursor``;
+    ссылки next/previous сохраняют его вместе с фильтрами запроса.
+    """
+
+    mode_query_param = "pagination"
+    cursor_mode = "cursor"
+    cursor_pagination_class = IdCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if request.query_params.get(self.mode_query_param) == self.cursor_mode:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -17,6 +17,17 @@ class IsAdmin(BasePermission):
         )
 
 
+class IsAdminOrModerator(BasePermission):
+    """Разрешения для Админа и Модератора."""
+
+    message = "Действие доступно только для администратора или модератора."
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (
+            request.user.is_admin or request.user.is_moderator
+        )
+
+
 class ReadOnlyOrIsAdmin(BasePermission):
     """Разрешения Админа и авторизированного пользователя."""
 
@@ -1,24 +1,41 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.contrib.auth.tokens import default_token_generator
 from rest_framework.serializers import (
     CharField,
+    ChoiceField,
+    DateTimeField,
+    DictField,
+    EmailField,
+    FloatField,
     IntegerField,
+    ListField,
     ModelSerializer,
+    Serializer,
+    SlugField,
     SlugRelatedField,
     StringRelatedField,
     ValidationError,
 )
+from rest_framework.exceptions import NotFound
 from reviews.models import Category, Comment, Genre, Review, Title
 
+from .fieldsets import SparseFieldsSerializerMixin
+
 User = get_user_model()
 
+USER_STATS_FIELDS = ("reviews_count", "comments_count", "average_score")
 
-class SignupSerializer(ModelSerializer):
-    """Сериализатор для регистрации"""
 
-    class Meta:
-        model = User
-        fields = ("username", "email")
+class SignupSerializer(Serializer):
+    """Сериализатор для регистрации.
+
+    Уникальность не проверяется здесь отдельными запросами: повторная
+    регистрация с той же парой допустима, а конфликты решает база.
+    """
+
+    username = CharField(max_length=150)
+    email = EmailField(max_length=254)
 
     def validate_username(self, value):
         if value.lower() == "me":
@@ -28,15 +45,38 @@ class SignupSerializer(ModelSerializer):
         return value
 
 
-class TokenSerializer(ModelSerializer):
+class TokenSerializer(Serializer):
     """Сериализатор для получения токена"""
 
     confirmation_code = CharField(max_length=50, required=True)
     username = CharField(required=True)
 
-    class Meta:
-        model = User
-        fields = ("username", "confirmation_code")
+    def validate(self, data):
+        # Для проверки кода и выпуска токена с правами хватает этих полей.
+        user = (
+            User.objects.only(
+                "id",
+                "password",
+                "last_login",
+                "username",
+                "role",
+                "is_staff",
+                "is_superuser",
+                "is_active",
+            )
+            .filter(username=data["username"])
+            .first()
+        )
+        if user is None:
+            raise NotFound("Пользователь не найден.")
+        if not default_token_generator.check_token(
+            user, data["confirmation_code"]
+        ):
+            raise ValidationError(
+                {"confirmation_code": ["Неверный код подтверждения."]}
+            )
+        data["user"] = user
+        return data
 
 
 class UserSerializer(ModelSerializer):
@@ -51,14 +91,25 @@ class UserSerializer(ModelSerializer):
             "last_name",
             "bio",
             "role",
+            *USER_STATS_FIELDS,
         )
+        read_only_fields = USER_STATS_FIELDS
+
+
+class UserStatsSerializer(ModelSerializer):
+    """Сериализатор счётчиков активности пользователя."""
+
+    class Meta:
+        model = User
+        fields = ("username", *USER_STATS_FIELDS)
+        read_only_fields = fields
 
 
 class ProfileSerializer(UserSerializer):
     """Сериализатор для пользователя "me"."""
 
     class Meta(UserSerializer.Meta):
-        read_only_fields = ("role",)
+        read_only_fields = ("role", *USER_STATS_FIELDS)
 
 
 class GenreSerializer(ModelSerializer):
@@ -77,12 +128,13 @@ class CategorySerializer(ModelSerializer):
         fields = ("name", "slug")
 
 
-class TitleGetSerializer(ModelSerializer):
+class TitleGetSerializer(SparseFieldsSerializerMixin, ModelSerializer):
     """GET сериализатор для произведения."""
 
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
     rating = IntegerField(read_only=True)
+    reviews_count = IntegerField(source="rating_count", read_only=True)
 
     class Meta:
         model = Title
@@ -94,9 +146,59 @@ class TitleGetSerializer(ModelSerializer):
             "genre",
             "category",
             "rating",
+            "reviews_count",
         )
 
 
+class TitleSearchSerializer(TitleGetSerializer):
+    """Сериализатор результата полнотекстового поиска."""
+
+    rank = FloatField(read_only=True)
+    highlight = DictField(child=CharField(), read_only=True)
+
+    class Meta(TitleGetSerializer.Meta):
+        fields = TitleGetSerializer.Meta.fields + ("rank", "highlight")
+
+
+class TitleTopSerializer(TitleGetSerializer):
+    """Сериализатор места в таблице лидеров."""
+
+    score = FloatField(read_only=True)
+
+    class Meta(TitleGetSerializer.Meta):
+        fields = TitleGetSerializer.Meta.fields + ("score",)
+
+
+class TopTitlesQuerySerializer(Serializer):
+    """Параметры запроса таблицы лидеров; срез задаётся одним из них."""
+
+    category = SlugField(required=False)
+    genre = SlugField(required=False)
+    year = IntegerField(required=False)
+    limit = IntegerField(required=False, min_value=1)
+    min_reviews = IntegerField(required=False, min_value=1)
+    score = ChoiceField(
+        choices=("average", "bayesian"), required=False, default="average"
+    )
+
+    def validate_limit(self, value):
+        if value > settings.LEADERBOARD_MAX_SIZE:
+            raise ValidationError(
+                f"Не больше {settings.LEADERBOARD_MAX_SIZE} произведений."
+            )
+        return value
+
+    def validate(self, data):
+        scopes = [
+            name for name in ("category", "genre", "year") if name in data
+        ]
+        if len(scopes) > 1:
+            raise ValidationError(
+                "Укажите только один срез: category, genre или year."
+            )
+        return data
+
+
 class TitlePostSerializer(ModelSerializer):
     """POST сериализатор для произведения."""
 
@@ -122,7 +224,28 @@ class TitlePostSerializer(ModelSerializer):
         return serializer.data
 
 
-class ReviewSerializer(ModelSerializer):
+class TitleBatchItemSerializer(Serializer):
+    """Элемент пакетной записи произведений; slug разрешаются пакетом."""
+
+    id = IntegerField(required=False)
+    name = CharField()
+    year = IntegerField()
+    description = CharField(required=False, allow_null=True, allow_blank=True)
+    genre = ListField(child=SlugField(), allow_empty=False)
+    category = SlugField()
+
+
+class ReviewBatchItemSerializer(Serializer):
+    """Элемент пакетного импорта отзывов."""
+
+    title = IntegerField()
+    author = CharField()
+    text = CharField()
+    score = IntegerField(min_value=1, max_value=10)
+    pub_date = DateTimeField(required=False)
+
+
+class ReviewSerializer(SparseFieldsSerializerMixin, ModelSerializer):
     """Сериализатор для отзыва."""
 
     author = StringRelatedField(read_only=True)
@@ -135,22 +258,12 @@ class ReviewSerializer(ModelSerializer):
             "author",
             "score",
             "pub_date",
+            "comments_count",
         )
-
-    def validate(self, data):
-        request = self.context.get("request")
-
-        if request.method == "POST":
-            title_id = self.context["view"].kwargs.get("title_id")
-            title = get_object_or_404(Title, pk=title_id)
-            if Review.objects.filter(
-                author=request.user, title=title
-            ).exists():
-                raise ValidationError("Вы уже оставили отзыв!")
-        return data
+        read_only_fields = ("comments_count",)
 
 
-class CommentSerializer(ModelSerializer):
+class CommentSerializer(SparseFieldsSerializerMixin, ModelSerializer):
     """Сериализатор комментариев"""
 
     author = StringRelatedField(read_only=True)
@@ -0,0 +1,157 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"sec": 1, "min": 60, "hour": 3600, "day": 86400}
+UNSAFE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+KEY = "throttle:{}:{}:{}"
+
+# Правило маршрута: область (ip, username или user), скорость вида
+# "10/min", запас на всплеск (по умолчанию равен числу запросов
+# за период) и методы, к которым правило относится (None — ко всем).
+Rule = namedtuple(
+    "Rule", ("scope", "rate", "burst", "methods"), defaults=(None, None)
+)
+
+_routes = {}
+
+
+def throttle_routes(rules):
+    """Задаёт правила ограничения по url_name маршрутов."""
+    _routes.clear()
+    _routes.update(rules)
+
+
+def parse_rate(rate):
+    """Разбирает скорость "10/min" в пару (10, 60)."""
+    count, period = rate.split("/")
+    return int(count), PERIODS[period]
+
+
+def gcra(tat, now, interval, tolerance):
+    """Маркерная корзина в виде GCRA: одно число на ключ.
+
+    tat — теоретическое время прибытия следующего запроса. Возвращает
+    новое tat и 0, если запрос пропущен, или прежнее tat и сколько
+    секунд ждать, если корзина пуста.
+    """
+    tat = max(tat or now, now)
+    wait = tat - now - tolerance
+    if wait > 0:
+        return tat, wait
+    return tat + interval, 0
+
+
+class LocalBucketStore:
+    """Корзины в памяти процесса; самые старые ключи вытесняются."""
+
+    def __init__(self, max_keys=10000):
+        self.lock = threading.Lock()
+        self.max_keys = max_keys
+        self.tats = OrderedDict()
+
+    def consume(self, key, now, interval, tolerance):
+        with self.lock:
+            tat, wait = gcra(self.tats.get(key), now, interval, tolerance)
+            if not wait:
+                self.tats[key] = tat
+                self.tats.move_to_end(key)
+                if len(self.tats) > self.max_keys:
+                    self.tats.popitem(last=False)
+            return wait
+
+    def clear(self):
+        with self.lock:
+            self.tats.clear()
+
+
+class CacheBucketStore:
+    """Корзины в общем кэше, общие для всех процессов.
+
+    Кэш с псевдонимом alias должен быть общим для воркеров (проверка
+    api.E001 в api/checks.py), иначе лимит умножается на их число.
+    Чтение и запись не атомарны: одновременные запросы с одним ключом
+    могут пройти сверх лимита на число таких запросов. Если кэш
+    недоступен, используется корзина процесса.
+    """
+
+    def __init__(self, alias, fallback):
+        self.alias = alias
+        self.fallback = fallback
+
+    def consume(self, key, now, interval, tolerance):
+        try:
+            cache = caches[self.alias]
+            tat, wait = gcra(cache.get(key), now, interval, tolerance)
+            if not wait:
+                cache.set(key, tat, timeout=int(tat - now) + 1)
+            return wait
+        except Exception:
+            return self.fallback.consume(key, now, interval, tolerance)
+
+
+local_store = LocalBucketStore()
+
+
+def get_store():
+    if settings.THROTTLE_BACKEND == "local":
+        return local_store
+    return CacheBucketStore(settings.THROTTLE_CACHE_ALIAS, local_store)
+
+
+class RouteThrottle(BaseThrottle):
+    """Ограничение запросов по правилам маршрута из throttle_routes.
+
+    Запрос проходит, если в каждой его корзине есть маркер. Проверка
+    не обращается к базе: клиент определяется по IP, по username из
+    тела запроса или по уже аутентифицированному пользователю.
+    """
+
+    def __init__(self):
+        self.wait_seconds = 0
+
+    def allow_request(self, request, view):
+        match = request.resolver_match
+        rules = _routes.get(match.url_name) if match else None
+        if not rules or not settings.THROTTLE_ENABLED:
+            return True
+        store = get_store()
+        now = time.time()
+        for rule in rules:
+            if rule.methods and request.method not in rule.methods:
+                continue
+            ident = self.get_scope_ident(rule.scope, request)
+            if ident is None:
+                continue
+            count, period = parse_rate(rule.rate)
+            interval = period / count
+            tolerance = interval * ((rule.burst or count) - 1)
+            key = KEY.format(
+                match.url_name,
+                rule.scope,
+                hashlib.md5(str(ident).encode()).hexdigest(),
+            )
+            self.wait_seconds = store.consume(key, now, interval, tolerance)
+            if self.wait_seconds:
+                return False
+        return True
+
+    def get_scope_ident(self, scope, request):
+        if scope == "ip":
+            return self.get_ident(request)
+        if scope == "username":
+            data = request.data
+            username = data.get("username") if isinstance(data, dict) else None
+            return username.lower() if isinstance(username, str) else None
+        if scope == "user":
+            user = request.user
+            return user.pk if user and user.is_authenticated else None
+        raise ValueError(f"Неизвестная область ограничения: {scope}.")
+
+    def wait(self):
+        return self.wait_seconds
@@ -1,18 +1,44 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
+from .throttling import UNSAFE_METHODS, Rule, throttle_routes
 from .views import (
     APISignup,
     CategoryViewSet,
     CommentViewSet,
     CreateToken,
+    ExportView,
     GenreViewSet,
+    ReviewBatchView,
     ReviewViewSet,
+    TitleSearchView,
     TitleViewSet,
     UserViewSet,
 )
 
 app_name = "api"
+
+# Ограничения запросов по url_name. Коды подтверждения перебираются
+# по username, регистрация ещё и рассылает письма, поэтому на эти
+# маршруты действуют и IP, и username.
+throttle_routes(
+    {
+        "signup": (
+            Rule("ip", "20/hour", burst=5),
+            Rule("username", "5/hour", burst=3),
+        ),
+        "create_token": (
+            Rule("ip", "60/hour", burst=10),
+            Rule("username", "10/hour", burst=5),
+        ),
+        "review-list": (Rule("user", "30/min", methods=UNSAFE_METHODS),),
+        "review-detail": (Rule("user", "30/min", methods=UNSAFE_METHODS),),
+        "comment-list": (Rule("user", "30/min", methods=UNSAFE_METHODS),),
+        "comment-detail": (Rule("user", "30/min", methods=UNSAFE_METHODS),),
+        "title-batch": (Rule("user", "10/min"),),
+        "review-batch": (Rule("user", "10/min"),),
+    }
+)
 router = DefaultRouter()
 
 router.register("users", UserViewSet, basename="users")
@@ -29,7 +55,15 @@ router.register(
 )
 
 urlpatterns = [
+    path("reviews/batch/", ReviewBatchView.as_view(), name="review-batch"),
     path("", include(router.urls)),
     path("auth/token/", CreateToken.as_view(), name="create_token"),
     path("auth/signup/", APISignup.as_view(), name="signup"),
+    path("search/", TitleSearchView.as_view(), name="search"),
+    re_path(
+        r"^export/(?P<resource>titles|reviews|comments)"
+        r"\.(?P<extension>ndjson|csv)$",
+        ExportView.as_view(),
+        name="export",
+    ),
 ]
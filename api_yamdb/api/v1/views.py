@@ -1,10 +1,13 @@
+from api.db import use_primary
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
-from django.shortcuts import get_object_or_404
+from django.db import IntegrityError
+from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import (
     filters,
+    generics,
     mixins,
     permissions,
     status,
@@ -12,14 +15,41 @@ from rest_framework import (
     viewsets,
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title
+from reviews.leaderboards import top_titles
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    Review,
+    Title,
+    TitleRanking,
+)
+from reviews.search import highlight_titles, search_titles
+from users.authentication import is_claims_user, token_claims
+from users.mail_queue import enqueue_mail
 from users.models import User
 
-from .filters import TitleFilter
+from .batch import save_review_batch, save_title_batch
+from .cache import CachedListMixin, CachedRetrieveMixin
+from .exports import EXPORT_FORMATS
+from .fast_serializers import (
+    FastCommentSerializer,
+    FastListMixin,
+    FastReviewSerializer,
+    FastTitleSerializer,
+)
+from .fieldsets import SparseFieldsetMixin
+from .filters import TitleFilter, TitleSearchFilter, UserStatsOrderingFilter
+from .nested import NestedParentMixin
+from .paginations import OptionalCursorPagination
 from .permissions import (
     IsAdmin,
+    IsAdminOrModerator,
     ReadOnlyOrIsAdmin,
     ReadOnlyOrIsAdminOrModeratorOrAuthor,
 )
@@ -32,8 +62,12 @@ from .serializers import (
     SignupSerializer,
     TitleGetSerializer,
     TitlePostSerializer,
+    TitleSearchSerializer,
+    TitleTopSerializer,
     TokenSerializer,
+    TopTitlesQuerySerializer,
     UserSerializer,
+    UserStatsSerializer,
 )
 
 
@@ -45,19 +79,44 @@ class APISignup(views.APIView):
     def post(self, request):
         serializer = SignupSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        username = serializer.validated_data["username"]
-        email = serializer.validated_data["email"]
-        user = User.objects.create(username=username, email=email)
+        user = self.get_or_create_user(**serializer.validated_data)
         token = default_token_generator.make_token(user)
-        send_mail(
+        enqueue_mail(
             subject="Ваш код для api-токена.",
             message=f"Код: {token}",
             from_email="test_user@yandex.ru",
             recipient_list=[user.email],
-            fail_silently=False,
         )
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def get_or_create_user(self, username, email):
+        """Идемпотентно создаёт пользователя одной вставкой.
+
+        Повтор с той же парой username/email возвращает существующего
+        пользователя, а гонка одновременных запросов не приводит
+        к IntegrityError: конфликт вставки пропускает сама база.
+        """
+        User.objects.bulk_create(
+            [User(username=username, email=email)], ignore_conflicts=True
+        )
+        try:
+            return User.objects.get(username=username, email=email)
+        except User.DoesNotExist:
+            pass
+        errors = {}
+        for taken in User.objects.filter(
+            Q(username=username) | Q(email=email)
+        ).values_list("username", "email"):
+            if taken[0] == username:
+                errors["username"] = [
+                    "Пользователь с таким username уже существует."
+                ]
+            if taken[1] == email:
+                errors["email"] = [
+                    "Пользователь с таким email уже существует."
+                ]
+        raise ValidationError(errors)
+
 
 class CreateToken(views.APIView):
     """Выдача токена"""
@@ -67,15 +126,10 @@ class CreateToken(views.APIView):
     def post(self, request):
         serializer = TokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        confirmation_code = serializer.validated_data["confirmation_code"]
-        username = serializer.validated_data["username"]
-        user = get_object_or_404(User, username=username)
-        if default_token_generator.check_token(user, confirmation_code):
-            token = AccessToken.for_user(user)
-            return Response({"token": f"{token}"}, status=status.HTTP_200_OK)
-        return Response(
-            "Confirm code invalid", status=status.HTTP_400_BAD_REQUEST
-        )
+        user = serializer.validated_data["user"]
+        token = AccessToken.for_user(user)
+        token.payload.update(token_claims(user))
+        return Response({"token": f"{token}"}, status=status.HTTP_200_OK)
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -85,6 +139,24 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = (IsAdmin,)
     lookup_field = "username"
+    filter_backends = (UserStatsOrderingFilter,)
+    ordering_fields = (
+        "username",
+        "reviews_count",
+        "comments_count",
+        "average_score",
+    )
+
+    @action(
+        methods=("get",),
+        detail=True,
+        permission_classes=(IsAdminOrModerator,),
+        serializer_class=UserStatsSerializer,
+    )
+    def stats(self, request, username=None):
+        """Счётчики активности пользователя для модераторов."""
+        serializer = self.get_serializer(self.get_object())
+        return Response(serializer.data)
 
     @action(
         methods=("get", "patch"),
@@ -94,43 +166,175 @@ class UserViewSet(viewsets.ModelViewSet):
         url_path="me",
     )
     def me(self, request, pk=None):
-        user = User.objects.get(username=request.user.username)
+        user = request.user
+        if is_claims_user(user):
+            # В токене только права, а профилю нужны все поля.
+            user = User.objects.get(pk=user.pk)
         serializer = self.get_serializer(user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(
+    SparseFieldsetMixin,
+    CachedListMixin,
+    CachedRetrieveMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     """Вьюсет для произведения."""
 
     permission_classes = (ReadOnlyOrIsAdmin,)
-    queryset = Title.objects.annotate(rating=Avg("reviews__score")).order_by(
-        "id"
+    queryset = (
+        Title.objects.select_related("category")
+        .prefetch_related("genre")
+        .order_by("id")
     )
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, TitleSearchFilter)
     filterset_class = TitleFilter
+    pagination_class = OptionalCursorPagination
+    fast_serializer_class = FastTitleSerializer
+    cache_models = (Title, Category, Genre, GenreTitle, Review, TitleRanking)
+    select_expandable = ("category",)
+    prefetch_expandable = ("genre",)
+    sparse_columns = {
+        "rating": ("rating_sum", "rating_count"),
+        "reviews_count": ("rating_count",),
+    }
 
     def get_serializer_class(self):
         if self.action in ("list", "retrieve"):
             return TitleGetSerializer
         return TitlePostSerializer
 
+    @action(methods=("post",), detail=False, url_path="batch")
+    def batch(self, request):
+        return Response(save_title_batch(request.data))
+
+    @action(methods=("get",), detail=False, url_path="top")
+    def top(self, request):
+        return self.cached_response(self.get_top, request)
+
+    def get_top(self, request):
+        """Первые места по предрассчитанной таблице лидеров."""
+        params = TopTitlesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        hits = top_titles(
+            limit=data.get("limit", settings.LEADERBOARD_DEFAULT_SIZE),
+            min_reviews=data.get(
+                "min_reviews", settings.LEADERBOARD_MIN_REVIEWS
+            ),
+            weighted=data["score"] == "bayesian",
+            category=data.get("category"),
+            genre=data.get("genre"),
+            year=data.get("year"),
+        )
+        titles = self.get_queryset().in_bulk(
+            [title_id for title_id, _, _ in hits]
+        )
+        ranked = []
+        for title_id, score, _ in hits:
+            # Произведение могли удалить между двумя запросами.
+            if title_id in titles:
+                titles[title_id].score = score
+                ranked.append(titles[title_id])
+        return Response(TitleTopSerializer(ranked, many=True).data)
 
-class ReviewViewSet(viewsets.ModelViewSet):
-    """Вюьсет отзывов"""
 
-    permission_classes = (ReadOnlyOrIsAdminOrModeratorOrAuthor,)
-    serializer_class = ReviewSerializer
+class ExportView(views.APIView):
+    """Потоковая выгрузка произведений, отзывов и комментариев."""
+
+    permission_classes = (IsAdmin,)
+
+    def get(self, request, resource, extension):
+        stream, content_type = EXPORT_FORMATS[extension]
+        response = StreamingHttpResponse(
+            stream(resource), content_type=f"{content_type}; charset=utf-8"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{resource}.{extension}"'
+        )
+        return response
 
-    def get_title(self):
-        return get_object_or_404(Title, id=self.kwargs.get("title_id"))
+
+class ReviewBatchView(views.APIView):
+    """Пакетный импорт отзывов администратором."""
+
+    permission_classes = (IsAdmin,)
+
+    def post(self, request):
+        return Response(save_review_batch(request.data))
+
+
+class TitleSearchView(generics.ListAPIView):
+    """Полнотекстовый поиск произведений с ранжированием и подсветкой."""
+
+    permission_classes = (permissions.AllowAny,)
+    serializer_class = TitleSearchSerializer
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return search_titles(self.request.query_params.get("q", ""))
+
+    def list(self, request, *args, **kwargs):
+        # Ранжирование и страница считаются без подсветки: её строят
+        # только для произведений текущей страницы.
+        hits = self.paginate_queryset(self.get_queryset())
+        title_ids = [hit.title_id for hit in hits]
+        titles = (
+            Title.objects.select_related("category")
+            .prefetch_related("genre")
+            .in_bulk(title_ids)
+        )
+        highlights = highlight_titles(
+            request.query_params.get("q", ""), title_ids
+        )
+        results = []
+        for hit in hits:
+            title = titles.get(hit.title_id)
+            if title is not None:
+                title.rank = hit.rank
+                title.highlight = highlights.get(hit.title_id, {})
+                results.append(title)
+        serializer = self.get_serializer(results, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class ReviewViewSet(
+    NestedParentMixin,
+    SparseFieldsetMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
+    """Вюьсет отзывов"""
+
+    queryset = Review.objects.select_related("author")
+    parent_field = "title"
+    parent_lookups = {"title_id": "title"}
+    permission_classes = (ReadOnlyOrIsAdminOrModeratorOrAuthor,)
+    serializer_class = ReviewSerializer
+    fast_serializer_class = FastReviewSerializer
+    pagination_class = OptionalCursorPagination
+    select_expandable = ("author",)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        # Повторный отзыв отсекает ограничение unique_author_title: без
+        # предварительной проверки и без гонки между ней и вставкой.
+        # Прочие нарушения целостности, например удаление произведения
+        # одновременно с записью, не выдаются за повтор.
+        try:
+            super().perform_create(serializer)
+        except IntegrityError:
+            with use_primary():
+                duplicate = Review.objects.filter(
+                    title=self.get_parent(), author=self.request.user
+                ).exists()
+            if not duplicate:
+                raise
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ["Вы уже оставили отзыв!"]}
+            )
 
 
 class ListCreateDesctroyViewSet(
@@ -144,7 +348,7 @@ class ListCreateDesctroyViewSet(
     pass
 
 
-class CategoryViewSet(ListCreateDesctroyViewSet):
+class CategoryViewSet(CachedListMixin, ListCreateDesctroyViewSet):
     """Вьюсет для категории произведения."""
 
     permission_classes = (ReadOnlyOrIsAdmin,)
@@ -153,9 +357,10 @@ class CategoryViewSet(ListCreateDesctroyViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ("name",)
     lookup_field = "slug"
+    cache_models = (Category,)
 
 
-class GenreViewSet(ListCreateDesctroyViewSet):
+class GenreViewSet(CachedListMixin, ListCreateDesctroyViewSet):
     """Вьюсет для жанров произведения."""
 
     permission_classes = (ReadOnlyOrIsAdmin,)
@@ -164,20 +369,22 @@ class GenreViewSet(ListCreateDesctroyViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ("name",)
     lookup_field = "slug"
+    cache_models = (Genre,)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    NestedParentMixin,
+    SparseFieldsetMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     """Вьюсет комментариев"""
 
+    queryset = Comment.objects.select_related("author")
+    parent_field = "review"
+    parent_lookups = {"title_id": "review__title", "review_id": "review"}
     permission_classes = (ReadOnlyOrIsAdminOrModeratorOrAuthor,)
     serializer_class = CommentSerializer
-
-    def get_queryset(self):
-        title_id = self.kwargs["title_id"]
-        review_id = self.kwargs["review_id"]
-        review = get_object_or_404(Review, id=review_id, title=title_id)
-        return review.comments.all()
-
-    def perform_create(self, serializer):
-        review = get_object_or_404(Review, id=self.kwargs["review_id"])
-        serializer.save(author=self.request.user, review=review)
+    fast_serializer_class = FastCommentSerializer
+    pagination_class = OptionalCursorPagination
+    select_expandable = ("author",)
@@ -4,9 +4,9 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-SECRET_KEY = (
-    os.getenv('SECRET_KEY'),
-    'my_mega_secret_code_ilz@4zqj=rq&agdol^##zgl9(vs')
+SECRET_KEY = os.getenv(
+    'SECRET_KEY',
+    default='my_mega_secret_code_ilz@4zqj=rq&agdol^##zgl9(vs')
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -32,14 +32,17 @@ INSTALLED_APPS = [
     "django_filters",
     "users.apps.UsersConfig",
     "reviews.apps.ReviewsConfig",
+    "api.apps.ApiConfig",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "api.metrics.MetricsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "api.db.ReplicaMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -76,9 +79,65 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
         'PORT': os.getenv('DB_PORT', default=5432),
+        # Секунды, которые соединение живёт между запросами процесса
+        # gunicorn; 0 — закрывать после каждого запроса.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        # Для пулера в режиме транзакций (PgBouncer) серверные курсоры
+        # .iterator() нужно отключить.
+        'DISABLE_SERVER_SIDE_CURSORS': (
+            os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', default='0') == '1'
+        ),
     }
 }
 
+# Реплики для чтения: хосты через запятую, алиасы replica1, replica2...
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', default='').split(',')), 1
+):
+    DATABASE_REPLICAS.append(f'replica{number}')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ["api.db.ReplicaRouter"]
+
+# Проверка постоянных соединений в начале запроса, если соединение
+# простояло без запросов дольше DB_HEALTH_CHECK_IDLE секунд.
+DB_HEALTH_CHECKS = os.getenv("DB_HEALTH_CHECKS", default="1") == "1"
+DB_HEALTH_CHECK_IDLE = int(os.getenv("DB_HEALTH_CHECK_IDLE", default=30))
+
+# Сколько соединений с каждым сервером базы могут держать все потоки
+# gunicorn вместе: workers * threads <= DB_MAX_CONNECTIONS (gunicorn.conf.py).
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", default=80))
+
+# Сколько секунд после записи клиент читает из основной базы.
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", default=5))
+
+
+# Cache
+
+# Версии каталога, корзины ограничения запросов и закрепление клиентов
+# за основной базой должны быть общими для всех воркеров gunicorn,
+# поэтому по умолчанию кэш — Memcached из infra/docker-compose.yaml.
+# Кэш в памяти процесса остаётся только в api_yamdb/settings_test.py:
+# при REQUIRE_SHARED_CACHE проверка api.E001 не даёт запуститься с ним.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.memcached.MemcachedCache",
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", default="memcached:11211"),
+    }
+}
+REQUIRE_SHARED_CACHE = os.getenv("REQUIRE_SHARED_CACHE", default="1") == "1"
+
+CATALOG_CACHE_ALIAS = "default"
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", default=300))
+
 
 # Password validation
 
@@ -128,17 +187,69 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.ClaimsJWTAuthentication",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_THROTTLE_CLASSES": [
+        "api.v1.throttling.RouteThrottle",
+    ],
+    # Адрес клиента берётся из X-Forwarded-For, который выставляет nginx.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", default=1)),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 5,
 }
 
+# Списки произведений, отзывов и комментариев сериализуются напрямую
+# из строк .values(), минуя поля DRF; вывод тот же.
+FAST_LIST_SERIALIZERS = os.getenv("FAST_LIST_SERIALIZERS", default="1") == "1"
+
+# Ограничение запросов: правила маршрутов заданы в api/v1/urls.py.
+# "cache" — корзины в общем кэше THROTTLE_CACHE_ALIAS с запасной
+# корзиной процесса, "local" — только в памяти процесса, что при
+# нескольких воркерах умножает лимиты на их число (проверка api.E002).
+THROTTLE_ENABLED = os.getenv("THROTTLE_ENABLED", default="1") == "1"
+THROTTLE_BACKEND = os.getenv("THROTTLE_BACKEND", default="cache")
+THROTTLE_CACHE_ALIAS = "default"
+
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", default=500))
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", default=2000))
+
+SEARCH_CONFIG = os.getenv("SEARCH_CONFIG", default="russian")
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", default=1000))
+
+LEADERBOARD_DEFAULT_SIZE = int(os.getenv("LEADERBOARD_DEFAULT_SIZE", default=10))
+LEADERBOARD_MAX_SIZE = int(os.getenv("LEADERBOARD_MAX_SIZE", default=100))
+LEADERBOARD_MIN_REVIEWS = int(os.getenv("LEADERBOARD_MIN_REVIEWS", default=1))
+# Априорные среднее и вес для байесовской оценки: пока у произведения
+# меньше LEADERBOARD_PRIOR_COUNT отзывов, оценка ближе к середине шкалы.
+LEADERBOARD_PRIOR_MEAN = float(os.getenv("LEADERBOARD_PRIOR_MEAN", default=5.5))
+LEADERBOARD_PRIOR_COUNT = int(os.getenv("LEADERBOARD_PRIOR_COUNT", default=10))
+
+CURSOR_PAGINATION_MAX_PAGE_SIZE = int(
+    os.getenv("CURSOR_PAGINATION_MAX_PAGE_SIZE", default=100)
+)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=10),
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+SERVER_TIMING = os.getenv("SERVER_TIMING", default="0") == "1"
+
+# Каталог, через который воркеры gunicorn складывают счётчики /metrics.
+METRICS_DIR = os.getenv("METRICS_DIR", default="/tmp/yamdb_metrics")
+# Как часто, в секундах, воркер записывает свои счётчики в METRICS_DIR.
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", default=5))
+
+JWT_CLAIMS_USER = os.getenv("JWT_CLAIMS_USER", default="1") == "1"
+JWT_CLAIMS_STATE_TIMEOUT = int(
+    os.getenv("JWT_CLAIMS_STATE_TIMEOUT", default=60)
+)
+
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 EMAIL_HOST = "smtp.yandex.com"
@@ -149,4 +260,17 @@ EMAIL_HOST_PASSWORD = "password@yamdb.ru"
 
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+MAIL_QUEUE_BACKEND = os.getenv(
+    "MAIL_QUEUE_BACKEND", default="users.mail_queue.DatabaseMailQueue"
+)
+MAIL_QUEUE_PATH = os.getenv(
+    "MAIL_QUEUE_PATH", default=os.path.join(BASE_DIR, "mail_queue")
+)
+MAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv("MAIL_QUEUE_MAX_ATTEMPTS", default=5))
+MAIL_QUEUE_RETRY_DELAY = int(os.getenv("MAIL_QUEUE_RETRY_DELAY", default=60))
+MAIL_QUEUE_MAX_RETRY_DELAY = int(
+    os.getenv("MAIL_QUEUE_MAX_RETRY_DELAY", default=3600)
+)
+MAIL_QUEUE_LEASE = int(os.getenv("MAIL_QUEUE_LEASE", default=300))
+
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
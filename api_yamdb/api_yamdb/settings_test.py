@@ -0,0 +1,11 @@
+"""Настройки для тестов: кэш в памяти процесса вместо Memcached."""
+
+from .settings import *  # noqa: F401,F403
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "yamdb",
+    }
+}
+REQUIRE_SHARED_CACHE = False
@@ -1,3 +1,4 @@
+from api.metrics import metrics_view
 from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import TemplateView
@@ -5,6 +6,7 @@ from django.views.generic import TemplateView
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
+    path("metrics", metrics_view, name="metrics"),
     path(
         "redoc/",
         TemplateView.as_view(template_name="redoc.html"),
@@ -0,0 +1,86 @@
+"""Настройки gunicorn.
+
+По умолчанию воркеры gthread: медленный запрос к базе занимает один
+поток, а не весь процесс. Параметры переопределяются переменными
+окружения, например GUNICORN_WORKER_CLASS=sync для прежнего режима.
+
+Каждый поток держит своё соединение с базой (CONN_MAX_AGE), поэтому
+их число ограничено бюджетом DB_MAX_CONNECTIONS:
+
+    workers * threads <= DB_MAX_CONNECTIONS
+
+Без явного GUNICORN_THREADS потоков столько, сколько помещается
+в бюджет, но не больше 8; без явного GUNICORN_WORKERS воркеров не больше
+бюджета. Бюджет должен быть меньше max_connections сервера Postgres
+(по умолчанию 100) с запасом на воркер почты, миграции и админов.
+Превышение бюджета останавливает запуск.
+
+До запуска воркеров мастер выполняет проверки Django: с ошибкой,
+например с кэшем в памяти процесса вместо общего, сервер не стартует.
+Там же очищаются счётчики /metrics прежнего запуска, а воркер при
+выходе записывает свои.
+"""
+
+import multiprocessing
+import os
+
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", default=80))
+
+bind = os.getenv("GUNICORN_BIND", default="0:8000")
+workers = int(
+    os.getenv(
+        "GUNICORN_WORKERS",
+        default=min(multiprocessing.cpu_count() * 2 + 1, DB_MAX_CONNECTIONS),
+    )
+)
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", default="gthread")
+threads = int(
+    os.getenv(
+        "GUNICORN_THREADS",
+        default=max(1, min(8, DB_MAX_CONNECTIONS // workers)),
+    )
+)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", default=30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", default=5))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", default=10000))
+max_requests_jitter = int(
+    os.getenv("GUNICORN_MAX_REQUESTS_JITTER", default=500)
+)
+
+
+def check_connection_budget(workers, threads, budget):
+    if workers * threads > budget:
+        raise RuntimeError(
+            f"{workers} воркеров по {threads} потоков держат до "
+            f"{workers * threads} соединений с базой, больше "
+            f"DB_MAX_CONNECTIONS={budget}. Уменьшите GUNICORN_WORKERS "
+            "или GUNICORN_THREADS."
+        )
+
+
+def on_starting(server):
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connections
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_yamdb.settings")
+    django.setup()
+    call_command("check")
+    # Настройки командной строки уже учтены в server.cfg.
+    check_connection_budget(
+        server.cfg.workers, server.cfg.threads, settings.DB_MAX_CONNECTIONS
+    )
+
+    from api.metrics import registry
+
+    # Счётчики прежнего запуска не должны попасть в /metrics.
+    registry.clear()
+    # Воркеры не должны унаследовать соединения мастера.
+    connections.close_all()
+
+
+def worker_exit(server, worker):
+    from api.metrics import registry
+
+    registry.flush()
@@ -5,3 +5,11 @@ class ReviewsConfig(AppConfig):
     """Название приложения."""
 
     name = "reviews"
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from . import signals  # noqa: F401
+        from .search import install_search_index
+
+        post_migrate.connect(install_search_index, sender=self)
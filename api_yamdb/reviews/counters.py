@@ -0,0 +1,24 @@
+class CounterFieldsMixin:
+    """Не перезаписывает счётчики при обычном save() изменённого объекта.
+
+    Счётчики сдвигаются только через F() в сигналах. Иначе save()
+    объекта, загруженного до конкурентного сдвига, вернул бы старое
+    значение.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            # Как и сам Django, отложенные поля .only() не сохраняются.
+            skipped = {*self.counter_fields, *self.get_deferred_fields()}
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
@@ -0,0 +1,222 @@
+import csv
+from concurrent.futures import Future
+from itertools import islice
+
+import django
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+
+from .versions import bump_version
+
+IGNORE = "ignore"
+UPSERT = "upsert"
+
+# Таблицы без своих csv, которые ссылаются на загружаемые модели.
+# Их строки пересобирает finish_bulk_load.
+DERIVED_TABLES = {"reviews.Title": ("reviews.TitleRanking",)}
+
+
+def read_batches(path, batch_size):
+    """Потоково читает csv-файл пачками словарей."""
+    with open(path, mode="r", encoding="utf-8", newline="") as csv_file:
+        reader = csv.DictReader(csv_file, delimiter=",")
+        while True:
+            batch = list(islice(reader, batch_size))
+            if not batch:
+                return
+            yield batch
+
+
+class ModelLoader:
+    """Превращает строки csv в объекты модели и пишет их пачками.
+
+    Внешние ключи проверяются по заранее загруженным множествам id,
+    поэтому на строку не приходится ни одного запроса к базе.
+    """
+
+    def __init__(self, model, columns, mode=IGNORE):
+        self.model = model
+        self.mode = mode
+        self.fields = {
+            column: model._meta.get_field(column) for column in columns
+        }
+        self.known_ids = {
+            field.attname: set(
+                field.related_model.objects.values_list("pk", flat=True)
+            )
+            for field in self.fields.values()
+            if field.is_relation
+        }
+        self.update_fields = [
+            field.attname
+            for field in self.fields.values()
+            if not field.primary_key
+        ]
+        self.skipped = 0
+
+    def build(self, row):
+        values = {}
+        for column, field in self.fields.items():
+            value = row[column]
+            if value in ("", None) and field.null:
+                value = None
+            elif field.is_relation:
+                value = field.target_field.to_python(value)
+                if value not in self.known_ids[field.attname]:
+                    return None
+            else:
+                value = field.to_python(value)
+            values[field.attname] = value
+        return self.model(**values)
+
+    def load(self, rows):
+        """Сохраняет пачку в одной транзакции, возвращает число записей."""
+        objects = []
+        for row in rows:
+            obj = self.build(row)
+            if obj is None:
+                self.skipped += 1
+            else:
+                objects.append(obj)
+        with transaction.atomic():
+            if self.mode == UPSERT:
+                self.upsert(objects)
+            else:
+                self.model.objects.bulk_create(objects, ignore_conflicts=True)
+        return len(objects)
+
+    def upsert(self, objects):
+        existing = set(
+            self.model.objects.filter(
+                pk__in=[obj.pk for obj in objects]
+            ).values_list("pk", flat=True)
+        )
+        updated = [obj for obj in objects if obj.pk in existing]
+        if updated and self.update_fields:
+            self.model.objects.bulk_update(updated, self.update_fields)
+        self.model.objects.bulk_create(
+            [obj for obj in objects if obj.pk not in existing]
+        )
+
+
+def build_stages(mapping):
+    """Раскладывает файлы по стадиям согласно внешним ключам моделей.
+
+    Модели одной стадии не ссылаются друг на друга и могут загружаться
+    одновременно; каждая стадия зависит только от предыдущих.
+    """
+    models = set(mapping.values())
+    dependencies = {
+        model: {
+            field.related_model
+            for field in model._meta.concrete_fields
+            if field.is_relation
+            and field.related_model in models
+            and field.related_model is not model
+        }
+        for model in models
+    }
+    stages = []
+    loaded = set()
+    while len(loaded) < len(models):
+        stage = [
+            (filename, model)
+            for filename, model in mapping.items()
+            if model not in loaded and dependencies[model] <= loaded
+        ]
+        if not stage:
+            raise ValueError("Циклическая зависимость между моделями.")
+        stages.append(stage)
+        loaded.update(model for _, model in stage)
+    return stages
+
+
+_loaders = {}
+
+
+def init_worker():
+    """Готовит процесс-загрузчик: своё соединение с базой на процесс."""
+    django.setup()
+    connections.close_all()
+
+
+def load_rows(stage, label, columns, rows, mode):
+    """Загружает пачку строк, возвращает (label, записано, пропущено).
+
+    Загрузчик со множествами id кэшируется в процессе до конца стадии.
+    """
+    key = (stage, label, tuple(columns), mode)
+    loader = _loaders.get(key)
+    if loader is None:
+        for stale in [k for k in _loaders if k[0] != stage]:
+            del _loaders[stale]
+        loader = _loaders[key] = ModelLoader(
+            apps.get_model(label), columns, mode
+        )
+    skipped = loader.skipped
+    written = loader.load(rows)
+    return label, written, loader.skipped - skipped
+
+
+class InlineExecutor:
+    """Исполнитель в текущем процессе, когда параллельность не нужна."""
+
+    def __init__(self):
+        # Загрузчики прошлого запуска хранят устаревшие множества id.
+        _loaders.clear()
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def truncate(model_list):
+    """Очищает таблицы одним DELETE на модель, без сигналов на строку.
+
+    Производные таблицы из DERIVED_TABLES очищаются перед таблицей,
+    на которую ссылаются.
+    """
+    ordered = []
+    for model in model_list:
+        ordered.extend(
+            apps.get_model(label)
+            for label in DERIVED_TABLES.get(model._meta.label, ())
+        )
+        ordered.append(model)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in ordered:
+            cursor.execute(
+                "DELETE FROM "
+                + connection.ops.quote_name(model._meta.db_table)
+            )
+
+
+def reset_sequences(model_list):
+    """Сдвигает автоинкременты за максимальный загруженный id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), model_list)
+    if not statements:
+        return
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def finish_bulk_load(model_list, stdout=None):
+    """Доводит базу до согласованного состояния после bulk_create.
+
+    bulk_create не отправляет сигналы: производные данные пересчитываются,
+    а версии кэша каталога сдвигаются явно.
+    """
+    model_list = list(model_list)
+    reset_sequences(model_list)
+    call_command("reconcile_counters", stdout=stdout)
+    call_command("rebuild_search_index", stdout=stdout)
+    call_command("rebuild_leaderboards", stdout=stdout)
+    for model in model_list:
+        bump_version(model)
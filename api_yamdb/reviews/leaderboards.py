@@ -0,0 +1,169 @@
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Category, Genre, GenreTitle, Title, TitleRanking
+from .versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+_pending = threading.local()
+
+
+def weighted_score(rating_sum, rating_count):
+    """Байесовская оценка: среднее, стянутое к априорному.
+
+    Произведение с парой отзывов не обгоняет в рейтинге произведения
+    с сотнями отзывов чуть более низкой средней оценкой.
+    """
+    prior_count = settings.LEADERBOARD_PRIOR_COUNT
+    return (rating_sum + settings.LEADERBOARD_PRIOR_MEAN * prior_count) / (
+        rating_count + prior_count
+    )
+
+
+def ranking_rows(titles, genre_ids):
+    """Строки таблиц лидеров для оценённых произведений."""
+    for title in titles:
+        if not title.rating_count:
+            continue
+        keys = [(TitleRanking.ALL, 0), (TitleRanking.YEAR, title.year)]
+        if title.category_id is not None:
+            keys.append((TitleRanking.CATEGORY, title.category_id))
+        keys.extend(
+            (TitleRanking.GENRE, genre_id) for genre_id in genre_ids[title.id]
+        )
+        score = title.rating_sum / title.rating_count
+        weighted = weighted_score(title.rating_sum, title.rating_count)
+        for scope, key in keys:
+            yield TitleRanking(
+                scope=scope,
+                key=key,
+                title_id=title.id,
+                rating_count=title.rating_count,
+                score=score,
+                weighted_score=weighted,
+            )
+
+
+def load_genre_ids(title_ids):
+    genre_ids = defaultdict(list)
+    for title_id, genre_id in GenreTitle.objects.filter(
+        title_id__in=title_ids
+    ).values_list("title_id", "genre_id"):
+        genre_ids[title_id].append(genre_id)
+    return genre_ids
+
+
+def refresh_rankings(title_ids):
+    """Пересобирает строки таблиц лидеров для указанных произведений.
+
+    Строки произведений блокируются, поэтому конкурентные обновления
+    одного произведения выполняются по очереди.
+    """
+    title_ids = sorted(set(title_ids))
+    if not title_ids:
+        return
+    # Внутри транзакции пакетной записи ошибка откатывает её целиком,
+    # поэтому точка сохранения не нужна. После коммита (flush_rankings)
+    # запись уже сохранена, и ошибка откатывает только пересборку.
+    with transaction.atomic(savepoint=False):
+        titles = list(
+            Title.objects.select_for_update()
+            .filter(id__in=title_ids)
+            .only("id", "year", "category_id", "rating_sum", "rating_count")
+            .order_by("id")
+        )
+        TitleRanking.objects.filter(title_id__in=title_ids).delete()
+        TitleRanking.objects.bulk_create(
+            ranking_rows(titles, load_genre_ids(title_ids))
+        )
+        bump_version(TitleRanking)
+
+
+def refresh_rankings_on_commit(title_ids):
+    """Откладывает refresh_rankings до коммита текущей транзакции.
+
+    Произведения копятся в наборе потока и пересобираются одним
+    вызовом, поэтому каскадное удаление пользователя или произведения
+    с сотней отзывов не пересобирает таблицы лидеров сотню раз. Вне
+    транзакции пересборка выполняется сразу.
+    """
+    pending = _pending.__dict__.setdefault("title_ids", set())
+    pending.update(title_ids)
+    # Колбэк регистрируется при каждом вызове: после отката он
+    # отбрасывается вместе с транзакцией. Первый выполненный забирает
+    # весь набор, остальные ничего не делают.
+    transaction.on_commit(flush_rankings)
+
+
+def flush_rankings():
+    """Пересборка после коммита: запись уже сохранена, поэтому ошибка
+    не должна превращать успешный ответ в 500. Она пишется в журнал,
+    а расхождение исправляет команда rebuild_leaderboards.
+    """
+    title_ids = _pending.__dict__.pop("title_ids", ())
+    try:
+        refresh_rankings(title_ids)
+    except Exception:
+        logger.exception(
+            "Не удалось пересобрать таблицы лидеров для произведений %s; "
+            "запустите rebuild_leaderboards.",
+            sorted(title_ids),
+        )
+
+
+def rebuild_rankings(batch_size=1000):
+    """Полностью пересобирает таблицы лидеров, возвращает число строк."""
+    total = 0
+    with transaction.atomic():
+        TitleRanking.objects.all().delete()
+        title_ids = list(Title.objects.values_list("id", flat=True))
+        for start in range(0, len(title_ids), batch_size):
+            end = start + batch_size
+            batch = title_ids[start:end]
+            titles = Title.objects.filter(id__in=batch).only(
+                "id", "year", "category_id", "rating_sum", "rating_count"
+            )
+            rows = list(ranking_rows(titles, load_genre_ids(batch)))
+            # Размер пачки вставки выбирает бэкенд: у SQLite он ограничен
+            # числом параметров запроса.
+            TitleRanking.objects.bulk_create(rows)
+            total += len(rows)
+        bump_version(TitleRanking)
+    return total
+
+
+def top_titles(
+    limit,
+    min_reviews=1,
+    weighted=False,
+    category=None,
+    genre=None,
+    year=None,
+):
+    """Первые limit мест среза: список (title_id, оценка, отзывов)."""
+    rankings = TitleRanking.objects.filter(rating_count__gte=min_reviews)
+    if category is not None:
+        rankings = rankings.filter(
+            scope=TitleRanking.CATEGORY,
+            key__in=Category.objects.filter(slug=category).values("id"),
+        )
+    elif genre is not None:
+        rankings = rankings.filter(
+            scope=TitleRanking.GENRE,
+            key__in=Genre.objects.filter(slug=genre).values("id"),
+        )
+    elif year is not None:
+        rankings = rankings.filter(scope=TitleRanking.YEAR, key=year)
+    else:
+        rankings = rankings.filter(scope=TitleRanking.ALL, key=0)
+    field = "weighted_score" if weighted else "score"
+    return list(
+        rankings.order_by(f"-{field}", "title_id").values_list(
+            "title_id", field, "rating_count"
+        )[:limit]
+    )
@@ -0,0 +1,205 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from api.benchmark import (
+    ENDPOINTS,
+    benchmark_serializers,
+    benchmark_throttle,
+    run_benchmark,
+)
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.utils import timezone
+from reviews.synthetic import DEFAULT_SCALE, generate_dataset
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк API в текущем процессе на синтетических данных. "
+        "Создаёт временную тестовую базу той же СУБД, что в настройках, "
+        "заполняет её и замеряет эндпоинты через настоящие маршруты."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_SCALE.items():
+            parser.add_argument(
+                f"--{name}",
+                type=int,
+                default=default,
+                help=f"Объём данных: {name}.",
+            )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Количество замеряемых запросов на эндпоинт.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=10,
+            help="Количество незамеряемых запросов на эндпоинт.",
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Очищать кэши перед каждым запросом.",
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            dest="endpoints",
+            choices=[name for name, _ in ENDPOINTS],
+            help="Замерять только указанные эндпоинты.",
+        )
+        parser.add_argument(
+            "--serializer-rows",
+            type=int,
+            default=500,
+            help="Строк в замере сериализаторов списков, 0 — без замера.",
+        )
+        parser.add_argument(
+            "--throttle-requests",
+            type=int,
+            default=10000,
+            help="Вызовов в замере ограничения запросов, 0 — без замера.",
+        )
+        parser.add_argument(
+            "--output", help="Файл для результатов в формате JSON."
+        )
+        parser.add_argument(
+            "--compare", help="JSON прошлого прогона для сравнения."
+        )
+
+    def handle(self, *args, **options):
+        scale = {name: options[name] for name in DEFAULT_SCALE}
+        if min(scale["users"], scale["categories"], scale["genres"]) < 1:
+            raise CommandError(
+                "Нужен хотя бы один пользователь, категория и жанр."
+            )
+        endpoints = [
+            (name, path)
+            for name, path in ENDPOINTS
+            if not options["endpoints"] or name in options["endpoints"]
+        ]
+
+        setup_test_environment()
+        # Таблицы создаются прямо по моделям, как в тестах
+        # с --nomigrations: схема всегда совпадает с текущим кодом.
+        with override_settings(
+            MIGRATION_MODULES={
+                config.label: None for config in apps.get_app_configs()
+            }
+        ):
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+        try:
+            started = time.monotonic()
+            scale = generate_dataset(
+                scale, seed=options["seed"], stdout=self.stdout
+            )
+            self.stdout.write(
+                f"Данные созданы за {time.monotonic() - started:.1f} с: "
+                + ", ".join(f"{k}={v}" for k, v in scale.items())
+            )
+            results = run_benchmark(
+                endpoints,
+                requests=options["requests"],
+                warmup=options["warmup"],
+                cold=options["cold"],
+                seed=options["seed"],
+            )
+            serializers = (
+                benchmark_serializers(rows=options["serializer_rows"])
+                if options["serializer_rows"]
+                else {}
+            )
+            throttle = (
+                benchmark_throttle(requests=options["throttle_requests"])
+                if options["throttle_requests"]
+                else {}
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "commit": current_commit(),
+            "created_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "django": django.get_version(),
+            "python": platform.python_version(),
+            "scale": scale,
+            "requests": options["requests"],
+            "cold": options["cold"],
+            "endpoints": results,
+            "serializers": serializers,
+            "throttle": throttle,
+        }
+        baseline = self.load_baseline(options["compare"])
+        for name, result in results.items():
+            self.stdout.write(self.format_result(name, result, baseline))
+        for name, result in serializers.items():
+            self.stdout.write(
+                f"Сериализация {name}: DRF {result['drf_us_per_row']} мкс "
+                f"на строку, быстрый путь {result['fast_us_per_row']} мкс "
+                f"(в {result['speedup']} раза быстрее), вывод "
+                + ("совпадает" if result["identical"] else "РАЗЛИЧАЕТСЯ")
+            )
+        for backend, result in throttle.items():
+            self.stdout.write(
+                f"Ограничение запросов ({backend}): пропуск "
+                f"{result['allowed_us']} мкс, отказ "
+                f"{result['rejected_us']} мкс на запрос"
+            )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Результаты сохранены в {options['output']}.")
+
+    def load_baseline(self, path):
+        if not path:
+            return {}
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)["endpoints"]
+
+    def format_result(self, name, result, baseline):
+        line = (
+            f"{name}: {result['rps']} запросов/с, "
+            f"p50 {result['p50_ms']} мс, p95 {result['p95_ms']} мс, "
+            f"p99 {result['p99_ms']} мс, "
+            f"запросов к базе {result['queries_mean']}"
+        )
+        if result["errors"]:
+            line += f", ошибок {result['errors']}"
+        previous = baseline.get(name)
+        if previous and previous["p50_ms"]:
+            change = (result["p50_ms"] / previous["p50_ms"] - 1) * 100
+            line += (
+                f" (p50 {change:+.0f}%, запросов к базе было "
+                f"{previous['queries_mean']})"
+            )
+        return line
@@ -0,0 +1,103 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from api.benchmark import percentile
+from django.core.management.base import BaseCommand, CommandError
+from reviews.models import Comment, Review
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочная проверка запущенного сервера: пропускная способность "
+        "и задержки на горячих эндпоинтах чтения при высокой конкурентности. "
+        "Запускается против разных GUNICORN_WORKER_CLASS для сравнения."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default="http://localhost:8000",
+            help="Адрес запущенного сервера.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=64,
+            help="Количество одновременных клиентов.",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10.0,
+            help="Длительность замера в секундах.",
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Путь для запросов; можно указать несколько раз.",
+        )
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or self.default_paths()
+        base_url = options["url"].rstrip("/")
+        deadline = time.monotonic() + options["duration"]
+        latencies = {path: [] for path in paths}
+        errors = {path: 0 for path in paths}
+        lock = threading.Lock()
+
+        def client(offset):
+            session = requests.Session()
+            # Клиенты начинают с разных путей, чтобы нагрузка смешивалась.
+            for path in itertools.islice(itertools.cycle(paths), offset, None):
+                if time.monotonic() >= deadline:
+                    return
+                started = time.monotonic()
+                try:
+                    ok = session.get(base_url + path).status_code == 200
+                except requests.RequestException:
+                    ok = False
+                elapsed = time.monotonic() - started
+                with lock:
+                    if ok:
+                        latencies[path].append(elapsed)
+                    else:
+                        errors[path] += 1
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            list(pool.map(client, range(options["concurrency"])))
+        elapsed = time.monotonic() - started
+
+        total = sum(len(values) for values in latencies.values())
+        self.stdout.write(
+            f"Клиентов: {options['concurrency']}, "
+            f"запросов: {total}, {total / elapsed:.1f} запросов/с"
+        )
+        for path in paths:
+            values = latencies[path]
+            self.stdout.write(
+                f"{path}: {len(values)} ок, {errors[path]} ошибок, "
+                f"p50 {percentile(values, 0.5) * 1000:.1f} мс, "
+                f"p95 {percentile(values, 0.95) * 1000:.1f} мс, "
+                f"p99 {percentile(values, 0.99) * 1000:.1f} мс"
+            )
+
+    def default_paths(self):
+        comment = Comment.objects.select_related("review").first()
+        review = comment.review if comment else Review.objects.first()
+        if review is None:
+            raise CommandError(
+                "В базе нет отзывов: загрузите данные populate_from_csv "
+                "или укажите --path."
+            )
+        title_url = f"/api/v1/titles/{review.title_id}/"
+        return [
+            "/api/v1/titles/",
+            title_url,
+            f"{title_url}reviews/",
+            f"{title_url}reviews/{review.id}/comments/",
+        ]
@@ -0,0 +1,101 @@
+import csv
+import os
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from .populate_from_csv import DATA_PATH, MODEL_FILENAME_MAPPING
+
+FILE_COLUMNS = {
+    "users.csv": (
+        "id",
+        "username",
+        "email",
+        "role",
+        "bio",
+        "first_name",
+        "last_name",
+    ),
+    "category.csv": ("id", "name", "slug"),
+    "genre.csv": ("id", "name", "slug"),
+    "titles.csv": ("id", "name", "year", "category"),
+    "genre_title.csv": ("id", "title_id", "genre_id"),
+    "review.csv": ("id", "title_id", "text", "author", "score", "pub_date"),
+    "comments.csv": ("id", "review_id", "text", "author", "pub_date"),
+}
+
+
+def format_value(value):
+    """Приводит значение к виду, в котором оно хранится в static/data."""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        value = value.astimezone(timezone.utc)
+        return value.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+    return value
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгрузка базы данных в csv файлы формата static/data, "
+        "совместимые с populate_from_csv."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--data-path",
+            help=(
+                "Каталог, в который записываются csv файлы. По умолчанию "
+                "новый каталог static/dump-<дата>-<время>."
+            ),
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Перезаписать уже существующие csv файлы.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Количество строк, читаемых из базы за один раз.",
+        )
+
+    def handle(self, *args, **options):
+        data_path = options["data_path"] or os.path.join(
+            os.path.dirname(os.path.dirname(DATA_PATH)),
+            timezone.now().strftime("dump-%Y%m%d-%H%M%S"),
+        )
+        # Без --force не затираем, в частности, исходные static/data.
+        existing = [
+            filename
+            for filename in MODEL_FILENAME_MAPPING
+            if os.path.exists(os.path.join(data_path, filename))
+        ]
+        if existing and not options["force"]:
+            raise CommandError(
+                f"В {data_path} уже есть {', '.join(existing)}; "
+                "укажите другой --data-path или --force."
+            )
+        os.makedirs(data_path, exist_ok=True)
+        for filename, model in MODEL_FILENAME_MAPPING.items():
+            columns = FILE_COLUMNS[filename]
+            attnames = [
+                model._meta.get_field(column).attname for column in columns
+            ]
+            rows = (
+                model.objects.order_by("id")
+                .values_list(*attnames)
+                .iterator(chunk_size=options["chunk_size"])
+            )
+            filepath = os.path.join(data_path, filename)
+            with open(filepath, "w", encoding="utf-8", newline="") as file:
+                writer = csv.writer(file, lineterminator="\n")
+                writer.writerow(columns)
+                count = 0
+                for row in rows:
+                    writer.writerow([format_value(value) for value in row])
+                    count += 1
+            self.stdout.write(f"{filename}: {count} строк")
+        self.stdout.write(f"Выгрузка данных в {data_path} завершена.")
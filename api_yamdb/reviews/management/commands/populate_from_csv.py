@@ -1,7 +1,21 @@
-import csv
 import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from reviews.csv_import import (
+    IGNORE,
+    UPSERT,
+    InlineExecutor,
+    build_stages,
+    finish_bulk_load,
+    init_worker,
+    load_rows,
+    read_batches,
+    truncate,
+)
 from reviews.models import (
     Category,
     Comment,
@@ -21,34 +35,160 @@ DATA_PATH = os.path.join(APP_PATH, "static/data/")
 
 
 class Command(BaseCommand):
-    help = "Наполнение базы данных данными из csv файлов."
+    help = (
+        "Наполнение базы данных данными из csv файлов. "
+        "Файлы читаются потоково и сохраняются пачками через bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество строк в одной транзакции.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help=(
+                "Количество процессов-загрузчиков, по умолчанию по числу "
+                "ядер. Для SQLite всегда 1."
+            ),
+        )
+        parser.add_argument(
+            "--data-path",
+            default=DATA_PATH,
+            help="Каталог с csv файлами.",
+        )
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
+            "--truncate",
+            action="store_true",
+            help=(
+                "Очистить таблицы каталога, отзывов и комментариев перед "
+                "импортом. Пользователи не удаляются."
+            ),
+        )
+        mode.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Обновлять уже существующие строки с теми же id.",
+        )
 
     def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
         self.stdout.write("Начат импорт данных...")
+        if options["truncate"]:
+            truncate(
+                model
+                for model in reversed(list(MODEL_FILENAME_MAPPING.values()))
+                if model is not User
+            )
 
-        for filename, model in MODEL_FILENAME_MAPPING.items():
-            filepath = os.path.join(DATA_PATH, filename)
+        mode = UPSERT if options["upsert"] else IGNORE
+        executor = self.get_executor(options["workers"])
+        try:
+            for number, stage in enumerate(
+                build_stages(MODEL_FILENAME_MAPPING)
+            ):
+                self.load_stage(executor, number, stage, options, mode)
+        finally:
+            executor.shutdown()
 
-            with open(filepath, mode="r", encoding="utf-8") as csv_file:
-                reader = csv.DictReader(csv_file, delimiter=",")
-                self.stdout.write(f"Создание объектов модели {model.__name__}")
+        finish_bulk_load(MODEL_FILENAME_MAPPING.values(), stdout=self.stdout)
 
-                for row in reader:
-                    if "category" in row:
-                        category = Category.objects.get(id=row["category"])
-                        row["category"] = category
+        self.stdout.write("Импорт данных завершён.")
 
-                    if "genre" in row:
-                        genre = Genre.objects.get(id=row["genre"])
-                        row["genre"] = genre
+    def get_executor(self, workers):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers > 1 and connection.vendor == "sqlite":
+            self.stderr.write(
+                "SQLite не поддерживает параллельную запись, "
+                "импорт выполняется в одном процессе."
+            )
+            workers = 1
+        self.workers = workers
+        if workers == 1:
+            return InlineExecutor()
+        # Дочерние процессы не должны унаследовать открытые соединения.
+        connections.close_all()
+        return ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker
+        )
 
-                    if "author" in row:
-                        author = User.objects.get(id=row["author"])
-                        row["author"] = author
+    def load_stage(self, executor, number, stage, options, mode):
+        names = ", ".join(model.__name__ for _, model in stage)
+        self.stdout.write(f"Стадия {number + 1}: {names}")
+        started = time.monotonic()
+        written = Counter()
+        skipped = Counter()
+        pending = set()
 
-                    model.objects.get_or_create(**row)
+        def collect(futures):
+            for future in futures:
+                label, count, missed = future.result()
+                written[label] += count
+                skipped[label] += missed
+                if self.verbosity > 1:
+                    self.report(label, written[label], started)
 
-        self.stdout.write("Импорт данных завершён.")
+        readers = [
+            (
+                model._meta.label,
+                read_batches(
+                    os.path.join(options["data_path"], filename),
+                    options["batch_size"],
+                ),
+            )
+            for filename, model in stage
+        ]
+        # Пачки независимых файлов чередуются, чтобы процессы загружали
+        # их одновременно; большой файл делится между всеми процессами.
+        for label, rows in interleave(readers):
+            if len(pending) >= self.workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(
+                executor.submit(
+                    load_rows, number, label, list(rows[0]), rows, mode
+                )
+            )
+        collect(wait(pending).done)
+
+        if self.verbosity == 1:
+            for _, model in stage:
+                self.report(
+                    model._meta.label, written[model._meta.label], started
+                )
+        for label, count in skipped.items():
+            if count:
+                self.stderr.write(
+                    f"{label}: пропущено строк со ссылками на "
+                    f"несуществующие объекты: {count}"
+                )
+
+    def report(self, label, total, started):
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else total
+        self.stdout.write(
+            f"{label}: {total} строк за {elapsed:.1f} с "
+            f"({rate:.0f} строк/с)"
+        )
+
+
+def interleave(readers):
+    """Поочерёдно выдаёт (label, пачка) из нескольких файлов."""
+    readers = list(readers)
+    while readers:
+        for reader in list(readers):
+            label, batches = reader
+            rows = next(batches, None)
+            if rows is None:
+                readers.remove(reader)
+            else:
+                yield label, rows
 
 
 MODEL_FILENAME_MAPPING = {
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from reviews.leaderboards import rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        "Полная перестройка таблиц лидеров по сохранённым рейтингам. "
+        "Нужна после смены LEADERBOARD_PRIOR_* и после массового импорта."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество произведений, обрабатываемых за раз.",
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild_rankings(options["batch_size"])
+        self.stdout.write(f"Строк в таблицах лидеров: {total}.")
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+from reviews.models import Review, Title
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчёт сохранённых рейтингов произведений по отзывам. "
+        "С флагом --check только проверяет расхождения."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только проверить счётчики, ничего не изменяя.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Сначала блокировки: отзыв, записанный после них, дождётся
+            # коммита и сдвинет уже пересчитанные счётчики, а записанный
+            # до них войдёт в агрегат.
+            titles = list(
+                Title.objects.select_for_update().only(
+                    "id", "rating_sum", "rating_count"
+                )
+            )
+            expected = {
+                row["title_id"]: (row["total"], row["count"])
+                for row in Review.objects.values("title_id")
+                .annotate(total=Sum("score"), count=Count("id"))
+                .order_by()
+            }
+            stale = []
+            for title in titles:
+                total, count = expected.get(title.id, (0, 0))
+                if (title.rating_sum, title.rating_count) != (total, count):
+                    title.rating_sum, title.rating_count = total, count
+                    stale.append(title)
+
+            if options["check"]:
+                if stale:
+                    raise CommandError(
+                        "Рейтинг расходится с отзывами у произведений: "
+                        + ", ".join(str(title.id) for title in stale)
+                    )
+                self.stdout.write("Рейтинги произведений согласованы.")
+                return
+
+            Title.objects.bulk_update(
+                stale, ["rating_sum", "rating_count"], batch_size=500
+            )
+        self.stdout.write(f"Пересчитано рейтингов: {len(stale)}.")
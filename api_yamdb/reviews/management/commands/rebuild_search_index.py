@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from reviews.models import Title
+from reviews.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Полная перестройка поискового индекса произведений."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество произведений, индексируемых за один запрос.",
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        batch_size = options["batch_size"]
+        title_ids = list(Title.objects.values_list("id", flat=True))
+        with transaction.atomic(), connection.cursor() as cursor:
+            backend.install(cursor)
+            cursor.execute(f"DELETE FROM {backend.table}")
+            for start in range(0, len(title_ids), batch_size):
+                end = start + batch_size
+                backend.index(cursor, title_ids[start:end])
+        self.stdout.write(f"Проиндексировано произведений: {len(title_ids)}.")
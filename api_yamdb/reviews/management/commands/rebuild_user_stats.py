@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+from reviews.models import Comment, Review
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчёт счётчиков активности пользователей: отзывов, суммы "
+        "оценок и комментариев. С флагом --check только проверяет "
+        "расхождения."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только проверить счётчики, ничего не изменяя.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Блокировки до агрегатов, как в rebuild_ratings.
+            users = list(
+                User.objects.select_for_update().only(
+                    "id", "username", *User.counter_fields
+                )
+            )
+            reviews = {
+                row["author_id"]: (row["count"], row["total"])
+                for row in Review.objects.values("author_id")
+                .annotate(count=Count("id"), total=Sum("score"))
+                .order_by()
+            }
+            comments = dict(
+                Comment.objects.values("author_id")
+                .annotate(count=Count("id"))
+                .order_by()
+                .values_list("author_id", "count")
+            )
+            stale = []
+            for user in users:
+                expected = (
+                    *reviews.get(user.id, (0, 0)),
+                    comments.get(user.id, 0),
+                )
+                fields = dict(zip(User.counter_fields, expected))
+                if any(
+                    getattr(user, name) != value
+                    for name, value in fields.items()
+                ):
+                    for name, value in fields.items():
+                        setattr(user, name, value)
+                    stale.append(user)
+
+            if options["check"]:
+                if stale:
+                    raise CommandError(
+                        "Счётчики активности расходятся у пользователей: "
+                        + ", ".join(user.username for user in stale)
+                    )
+                self.stdout.write("Счётчики активности согласованы.")
+                return
+
+            User.objects.bulk_update(
+                stale, User.counter_fields, batch_size=500
+            )
+        self.stdout.write(f"Пересчитано счётчиков активности: {len(stale)}.")
@@ -0,0 +1,60 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from reviews.models import Comment, Review
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверка счётчиков отзывов у произведений, комментариев у отзывов "
+        "и активности пользователей с фактическими данными. С флагом "
+        "--check только проверяет расхождения."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только проверить счётчики, ничего не изменяя.",
+        )
+
+    def handle(self, *args, **options):
+        # Количество отзывов хранится в rating_count вместе с суммой оценок.
+        call_command(
+            "rebuild_ratings", check=options["check"], stdout=self.stdout
+        )
+        call_command(
+            "rebuild_user_stats", check=options["check"], stdout=self.stdout
+        )
+        with transaction.atomic():
+            # Блокировки до агрегата, как в rebuild_ratings.
+            reviews = list(
+                Review.objects.select_for_update().only("id", "comments_count")
+            )
+            expected = dict(
+                Comment.objects.values("review_id")
+                .annotate(count=Count("id"))
+                .order_by()
+                .values_list("review_id", "count")
+            )
+            stale = []
+            for review in reviews:
+                count = expected.get(review.id, 0)
+                if review.comments_count != count:
+                    review.comments_count = count
+                    stale.append(review)
+
+            if options["check"]:
+                if stale:
+                    raise CommandError(
+                        "Счётчик комментариев расходится у отзывов: "
+                        + ", ".join(str(review.id) for review in stale)
+                    )
+                self.stdout.write("Счётчики комментариев согласованы.")
+                return
+
+            Review.objects.bulk_update(
+                stale, ["comments_count"], batch_size=500
+            )
+        self.stdout.write(f"Пересчитано счётчиков комментариев: {len(stale)}.")
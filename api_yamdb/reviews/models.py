@@ -1,8 +1,10 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
+from .counters import CounterFieldsMixin
+
 User = get_user_model()
 
 
@@ -38,7 +40,7 @@ class Genre(models.Model):
         return self.name
 
 
-class Title(models.Model):
+class Title(CounterFieldsMixin, models.Model):
     """Модель произведения."""
 
     name = models.TextField("Название произведения")
@@ -50,17 +52,37 @@ class Title(models.Model):
     genre = models.ManyToManyField(
         to=Genre, through="GenreTitle", related_name="titles"
     )
+    rating_sum = models.PositiveIntegerField(
+        "Сумма оценок", default=0, editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        "Количество оценок", default=0, editable=False
+    )
+
+    counter_fields = ("rating_sum", "rating_count")
 
     class Meta:
         verbose_name = "Произведение"
         verbose_name_plural = "Произведения"
         ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["category", "year"], name="title_category_year_idx"
+            )
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        """Средняя оценка по сохранённым счётчикам отзывов."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
 
-class Review(models.Model):
+
+class Review(CounterFieldsMixin, models.Model):
     """Модель отзыва"""
 
     text = models.TextField("Отзыв произведения")
@@ -74,6 +96,11 @@ class Review(models.Model):
     title = models.ForeignKey(
         Title, on_delete=models.CASCADE, related_name="reviews"
     )
+    comments_count = models.PositiveIntegerField(
+        "Количество комментариев", default=0, editable=False
+    )
+
+    counter_fields = ("comments_count",)
 
     class Meta:
         verbose_name = "Отзыв"
@@ -88,6 +115,25 @@ class Review(models.Model):
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "score" in field_names:
+            if "title_id" in field_names:
+                instance._loaded_rating = (instance.title_id, instance.score)
+            if "author_id" in field_names:
+                instance._loaded_activity = (
+                    instance.author_id,
+                    instance.score,
+                )
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Отзыв, счётчики рейтинга произведения и активности автора
+        # меняются в одной транзакции.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
 
 class GenreTitle(models.Model):
     """Модель связи жанра и произведения."""
@@ -101,6 +147,11 @@ class GenreTitle(models.Model):
                 fields=["genre", "title"], name="unique_genre_title"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["title", "genre"], name="genretitle_title_genre_idx"
+            )
+        ]
         verbose_name = "Соответствие жанра и произведения"
         verbose_name_plural = "Таблица соответствия жанров и произведений"
 
@@ -108,6 +159,57 @@ class GenreTitle(models.Model):
         return f"{self.genre} {self.title}"
 
 
+class TitleRanking(models.Model):
+    """Строка предрассчитанной таблицы лидеров.
+
+    У каждого оценённого произведения есть строка в общем рейтинге,
+    в рейтинге своего года, категории и каждого из жанров, поэтому
+    первые k мест любого среза читаются по индексу без сортировки.
+    """
+
+    ALL = "all"
+    CATEGORY = "category"
+    GENRE = "genre"
+    YEAR = "year"
+    SCOPE_CHOICES = (
+        (ALL, "Все произведения"),
+        (CATEGORY, "Категория"),
+        (GENRE, "Жанр"),
+        (YEAR, "Год"),
+    )
+
+    scope = models.CharField("Срез", max_length=8, choices=SCOPE_CHOICES)
+    key = models.IntegerField("Id категории, жанра или год")
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name="rankings"
+    )
+    rating_count = models.PositiveIntegerField("Количество оценок")
+    score = models.FloatField("Средняя оценка")
+    weighted_score = models.FloatField("Байесовская оценка")
+
+    class Meta:
+        verbose_name = "Место в рейтинге"
+        verbose_name_plural = "Таблицы лидеров"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "key", "title"], name="unique_ranking"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["scope", "key", "-score", "title"],
+                name="ranking_score_idx",
+            ),
+            models.Index(
+                fields=["scope", "key", "-weighted_score", "title"],
+                name="ranking_weighted_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key} {self.title_id}"
+
+
 class Comment(models.Model):
     """Модель комментариев."""
 
@@ -124,3 +226,18 @@ class Comment(models.Model):
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
         ordering = ["id"]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "review_id" in field_names:
+            instance._loaded_review_id = instance.review_id
+        if "author_id" in field_names:
+            instance._loaded_author_id = instance.author_id
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Комментарий, счётчики отзыва и автора меняются в одной
+        # транзакции.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
@@ -0,0 +1,337 @@
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+SearchHit = namedtuple("SearchHit", ("title_id", "rank"))
+
+HIGHLIGHT_START = "<b>"
+HIGHLIGHT_STOP = "</b>"
+# База отмечает совпадения символами из области частного использования,
+# а разметка подставляется уже после экранирования текста.
+MARK_START = "\ue000"
+MARK_STOP = "\ue001"
+
+
+class RawSubquery(RawSQL):
+    """RawSQL без собственных скобок для подзапроса в ``__in``.
+
+    Скобки вокруг подзапроса ставит сам lookup, а вторые превратили бы
+    его в скалярное выражение.
+    """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+class PostgresSearchBackend:
+    """Индекс на tsvector с GIN, ранжирование через ts_rank."""
+
+    table = "reviews_title_search"
+
+    install_sql = (
+        f"CREATE TABLE IF NOT EXISTS {table} ("
+        " title_id integer PRIMARY KEY"
+        " REFERENCES reviews_title (id) ON DELETE CASCADE"
+        " DEFERRABLE INITIALLY DEFERRED,"
+        " document tsvector NOT NULL)",
+        f"CREATE INDEX IF NOT EXISTS {table}_document_idx"
+        f" ON {table} USING GIN (document)",
+    )
+
+    index_sql = (
+        f"INSERT INTO {table} (title_id, document)"
+        " SELECT t.id,"
+        " setweight(to_tsvector(%(config)s, t.name), 'A')"
+        " || setweight(to_tsvector(%(config)s,"
+        " coalesce(t.description, '')), 'B')"
+        " || setweight(to_tsvector(%(config)s,"
+        " coalesce(string_agg(g.name, ' '), '')), 'C')"
+        " || setweight(to_tsvector(%(config)s,"
+        " coalesce(c.name, '')), 'C')"
+        " FROM reviews_title t"
+        " LEFT JOIN reviews_category c ON c.id = t.category_id"
+        " LEFT JOIN reviews_genretitle gt ON gt.title_id = t.id"
+        " LEFT JOIN reviews_genre g ON g.id = gt.genre_id"
+        " WHERE t.id = ANY(%(ids)s)"
+        " GROUP BY t.id, c.name"
+        " ON CONFLICT (title_id) DO UPDATE SET document = EXCLUDED.document"
+    )
+
+    search_sql = (
+        "SELECT s.title_id, ts_rank(s.document, q) AS rank"
+        f" FROM {table} s, websearch_to_tsquery(%(config)s, %(query)s) q"
+        " WHERE s.document @@ q"
+        " ORDER BY rank DESC, s.title_id"
+        " LIMIT %(limit)s"
+    )
+
+    # Подзапросы для выборки произведений: совпадения идут через GIN,
+    # ранг считается только для строк, прошедших фильтр.
+    match_sql = (
+        f"SELECT title_id FROM {table}"
+        " WHERE document @@ websearch_to_tsquery(%s, %s)"
+    )
+    rank_sql = (
+        "SELECT ts_rank(document, websearch_to_tsquery(%s, %s))"
+        f" FROM {table} WHERE title_id = reviews_title.id"
+    )
+
+    highlight_sql = (
+        "SELECT t.id,"
+        " ts_headline(%(config)s, t.name, q, %(options)s),"
+        " ts_headline(%(config)s, coalesce(t.description, ''), q,"
+        " %(options)s)"
+        " FROM reviews_title t, websearch_to_tsquery(%(config)s, %(query)s) q"
+        " WHERE t.id = ANY(%(ids)s)"
+    )
+
+    def install(self, cursor):
+        for sql in self.install_sql:
+            cursor.execute(sql)
+
+    def remove(self, cursor, title_ids):
+        cursor.execute(
+            f"DELETE FROM {self.table} WHERE title_id = ANY(%s)",
+            [list(title_ids)],
+        )
+
+    def index(self, cursor, title_ids):
+        cursor.execute(
+            self.index_sql,
+            {"config": settings.SEARCH_CONFIG, "ids": list(title_ids)},
+        )
+
+    def query_params(self, query):
+        return [settings.SEARCH_CONFIG, query]
+
+    def search(self, cursor, query, limit):
+        cursor.execute(
+            self.search_sql,
+            {"config": settings.SEARCH_CONFIG, "query": query, "limit": limit},
+        )
+        return [SearchHit(*row) for row in cursor.fetchall()]
+
+    def highlight(self, cursor, query, title_ids):
+        cursor.execute(
+            self.highlight_sql,
+            {
+                "config": settings.SEARCH_CONFIG,
+                "options": (
+                    f"StartSel={MARK_START}, StopSel={MARK_STOP},"
+                    " HighlightAll=TRUE"
+                ),
+                "query": query,
+                "ids": list(title_ids),
+            },
+        )
+        return cursor.fetchall()
+
+
+class SqliteSearchBackend:
+    """Запасной вариант для локальной разработки на SQLite FTS5."""
+
+    table = "reviews_title_fts"
+
+    install_sql = (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+        "name, description, genres, category, tokenize='unicode61')",
+    )
+
+    index_sql = (
+        f"INSERT INTO {table} (rowid, name, description, genres, category)"
+        " SELECT t.id, t.name, coalesce(t.description, ''),"
+        " coalesce(group_concat(g.name, ' '), ''), coalesce(c.name, '')"
+        " FROM reviews_title t"
+        " LEFT JOIN reviews_category c ON c.id = t.category_id"
+        " LEFT JOIN reviews_genretitle gt ON gt.title_id = t.id"
+        " LEFT JOIN reviews_genre g ON g.id = gt.genre_id"
+        " WHERE t.id IN ({})"
+        " GROUP BY t.id"
+    )
+
+    # Веса колонок bm25: name, description, genres, category.
+    rank_expression = f"-bm25({table}, 10.0, 4.0, 2.0, 2.0)"
+
+    search_sql = (
+        f"SELECT rowid, {rank_expression} AS rank"
+        f" FROM {table} WHERE {table} MATCH %s"
+        " ORDER BY rank DESC, rowid"
+        " LIMIT %s"
+    )
+
+    match_sql = f"SELECT rowid FROM {table} WHERE {table} MATCH %s"
+    rank_sql = (
+        f"SELECT {rank_expression} FROM {table}"
+        f" WHERE {table} MATCH %s AND rowid = reviews_title.id"
+    )
+
+    highlight_sql = (
+        f"SELECT rowid, highlight({table}, 0, %s, %s),"
+        f" highlight({table}, 1, %s, %s)"
+        f" FROM {table} WHERE {table} MATCH %s AND rowid IN ({{}})"
+    )
+
+    def install(self, cursor):
+        for sql in self.install_sql:
+            cursor.execute(sql)
+
+    def remove(self, cursor, title_ids):
+        title_ids = list(title_ids)
+        cursor.execute(
+            f"DELETE FROM {self.table} WHERE rowid IN"
+            f" ({', '.join(['%s'] * len(title_ids))})",
+            title_ids,
+        )
+
+    def index(self, cursor, title_ids):
+        title_ids = list(title_ids)
+        self.remove(cursor, title_ids)
+        cursor.execute(
+            self.index_sql.format(", ".join(["%s"] * len(title_ids))),
+            title_ids,
+        )
+
+    def query_params(self, query):
+        # Синтаксис MATCH не должен зависеть от ввода пользователя:
+        # каждое слово ищется как префикс.
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return None
+        return [" ".join(f'"{term}"*' for term in terms)]
+
+    def search(self, cursor, query, limit):
+        params = self.query_params(query)
+        if params is None:
+            return []
+        cursor.execute(self.search_sql, params + [limit])
+        return [SearchHit(*row) for row in cursor.fetchall()]
+
+    def highlight(self, cursor, query, title_ids):
+        params = self.query_params(query)
+        if params is None:
+            return []
+        title_ids = list(title_ids)
+        marks = [MARK_START, MARK_STOP]
+        cursor.execute(
+            self.highlight_sql.format(", ".join(["%s"] * len(title_ids))),
+            marks + marks + params + title_ids,
+        )
+        return cursor.fetchall()
+
+
+SEARCH_BACKENDS = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SqliteSearchBackend,
+}
+
+
+def get_search_backend(vendor=None):
+    vendor = vendor or connection.vendor
+    try:
+        return SEARCH_BACKENDS[vendor]()
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Полнотекстовый поиск не поддерживается для {vendor}."
+        )
+
+
+def install_search_index(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Создаёт структуры индекса и заполняет его, если он новый."""
+    from .models import Title
+
+    db = connections[using]
+    backend = get_search_backend(db.vendor)
+    created = backend.table not in db.introspection.table_names()
+    with db.cursor() as cursor:
+        backend.install(cursor)
+        if not created:
+            return
+        title_ids = list(
+            Title.objects.using(using).values_list("id", flat=True)
+        )
+        if title_ids:
+            backend.index(cursor, title_ids)
+
+
+def reindex_titles(title_ids):
+    title_ids = list(title_ids)
+    if not title_ids:
+        return
+    with connection.cursor() as cursor:
+        get_search_backend().index(cursor, title_ids)
+
+
+def remove_titles(title_ids):
+    title_ids = list(title_ids)
+    if not title_ids:
+        return
+    with connection.cursor() as cursor:
+        get_search_backend().remove(cursor, title_ids)
+
+
+def search_titles(query, limit=None):
+    """Возвращает найденные произведения по убыванию релевантности.
+
+    Результат содержит только id и ранг; подсветку для нужной страницы
+    даёт highlight_titles.
+    """
+    query = query.strip()
+    if not query:
+        return []
+    with connection.cursor() as cursor:
+        return get_search_backend().search(
+            cursor, query, limit or settings.SEARCH_MAX_RESULTS
+        )
+
+
+def highlight_titles(query, title_ids):
+    """Подсветка совпадений в названии и описании указанных произведений.
+
+    Возвращает словарь {title_id: {"name": ..., "description": ...}}.
+    Подсветка — самая дорогая часть поиска, поэтому её запрашивают
+    только для уже отобранной страницы.
+    """
+    query = query.strip()
+    title_ids = list(title_ids)
+    if not query or not title_ids:
+        return {}
+    with connection.cursor() as cursor:
+        rows = get_search_backend().highlight(cursor, query, title_ids)
+    return {
+        title_id: {"name": mark_up(name), "description": mark_up(text)}
+        for title_id, name, text in rows
+    }
+
+
+def mark_up(text):
+    """Экранирует текст произведения и размечает найденные слова."""
+    return (
+        escape(text)
+        .replace(MARK_START, HIGHLIGHT_START)
+        .replace(MARK_STOP, HIGHLIGHT_STOP)
+    )
+
+
+def rank_titles(queryset, query):
+    """Оставляет в выборке найденные произведения по убыванию ранга.
+
+    Ранг доступен как аннотация ``search_rank``. Совпадения и ранг
+    считаются подзапросами к индексу в том же SQL, поэтому выборку можно
+    дальше фильтровать и разбивать на страницы.
+    """
+    query = query.strip()
+    backend = get_search_backend(connections[queryset.db].vendor)
+    params = backend.query_params(query) if query else None
+    if params is None:
+        return queryset.none()
+    return (
+        queryset.filter(pk__in=RawSubquery(backend.match_sql, params))
+        .annotate(search_rank=RawSQL(backend.rank_sql, params))
+        .order_by(F("search_rank").desc(), "id")
+    )
@@ -0,0 +1,251 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .leaderboards import refresh_rankings_on_commit
+from .models import Category, Comment, Genre, GenreTitle, Review, Title
+from .search import reindex_titles, remove_titles
+from .versions import bump_version
+
+User = get_user_model()
+
+
+def change_rating(title_id, score_delta, count_delta):
+    """Атомарно сдвигает счётчики рейтинга произведения."""
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F("rating_sum") + score_delta,
+        rating_count=F("rating_count") + count_delta,
+    )
+
+
+def refresh_titles(title_ids):
+    """Обновляет поисковый индекс и таблицы лидеров произведений."""
+    title_ids = list(title_ids)
+    reindex_titles(title_ids)
+    refresh_rankings_on_commit(title_ids)
+
+
+@receiver(pre_save, sender=Review)
+def remember_loaded_rating(sender, instance, raw, **kwargs):
+    if (
+        raw
+        or instance.pk is None
+        or "_loaded_rating" in instance.__dict__
+        and "_loaded_activity" in instance.__dict__
+    ):
+        return
+    loaded = (
+        Review.objects.filter(pk=instance.pk)
+        .values_list("title_id", "score", "author_id")
+        .first()
+    )
+    instance._loaded_rating = loaded and loaded[:2]
+    instance._loaded_activity = loaded and (loaded[2], loaded[1])
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        # Фикстуры загружаются вместе с уже посчитанными счётчиками.
+        return
+    previous = None if created else instance.__dict__.get("_loaded_rating")
+    if previous is None:
+        change_rating(instance.title_id, instance.score, 1)
+    elif previous[0] == instance.title_id:
+        if previous[1] == instance.score:
+            return
+        change_rating(instance.title_id, instance.score - previous[1], 0)
+    else:
+        change_rating(previous[0], -previous[1], -1)
+        change_rating(instance.title_id, instance.score, 1)
+    refresh_rankings_on_commit(
+        {instance.title_id, previous[0] if previous else instance.title_id}
+    )
+    instance._loaded_rating = (instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    title_id, score = instance.__dict__.get(
+        "_loaded_rating", (instance.title_id, instance.score)
+    )
+    change_rating(title_id, -score, -1)
+    refresh_rankings_on_commit([title_id])
+
+
+def change_activity(user_id, reviews=0, scores=0, comments=0):
+    """Атомарно сдвигает счётчики активности пользователя."""
+    User.objects.filter(pk=user_id).update(
+        reviews_count=F("reviews_count") + reviews,
+        scores_sum=F("scores_sum") + scores,
+        comments_count=F("comments_count") + comments,
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_activity_on_review_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = None if created else instance.__dict__.get("_loaded_activity")
+    if previous is None:
+        change_activity(instance.author_id, reviews=1, scores=instance.score)
+    elif previous[0] == instance.author_id:
+        if previous[1] == instance.score:
+            return
+        change_activity(
+            instance.author_id, scores=instance.score - previous[1]
+        )
+    else:
+        change_activity(previous[0], reviews=-1, scores=-previous[1])
+        change_activity(instance.author_id, reviews=1, scores=instance.score)
+    instance._loaded_activity = (instance.author_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def update_activity_on_review_delete(sender, instance, **kwargs):
+    author_id, score = instance.__dict__.get(
+        "_loaded_activity", (instance.author_id, instance.score)
+    )
+    change_activity(author_id, reviews=-1, scores=-score)
+
+
+def change_comments_count(review_id, delta):
+    """Атомарно сдвигает счётчик комментариев отзыва."""
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F("comments_count") + delta
+    )
+
+
+@receiver(pre_save, sender=Comment)
+def remember_loaded_review(sender, instance, raw, **kwargs):
+    if (
+        raw
+        or instance.pk is None
+        or "_loaded_review_id" in instance.__dict__
+        and "_loaded_author_id" in instance.__dict__
+    ):
+        return
+    loaded = Comment.objects.filter(pk=instance.pk).values_list(
+        "review_id", "author_id"
+    ).first() or (None, None)
+    instance._loaded_review_id, instance._loaded_author_id = loaded
+
+
+@receiver(post_save, sender=Comment)
+def update_comments_count_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = None if created else instance.__dict__.get("_loaded_review_id")
+    if previous is None:
+        change_comments_count(instance.review_id, 1)
+    elif previous != instance.review_id:
+        change_comments_count(previous, -1)
+        change_comments_count(instance.review_id, 1)
+    instance._loaded_review_id = instance.review_id
+
+
+@receiver(post_delete, sender=Comment)
+def update_comments_count_on_delete(sender, instance, **kwargs):
+    change_comments_count(
+        instance.__dict__.get("_loaded_review_id", instance.review_id), -1
+    )
+
+
+@receiver(post_save, sender=Comment)
+def update_activity_on_comment_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = None if created else instance.__dict__.get("_loaded_author_id")
+    if previous is None:
+        change_activity(instance.author_id, comments=1)
+    elif previous != instance.author_id:
+        change_activity(previous, comments=-1)
+        change_activity(instance.author_id, comments=1)
+    instance._loaded_author_id = instance.author_id
+
+
+@receiver(post_delete, sender=Comment)
+def update_activity_on_comment_delete(sender, instance, **kwargs):
+    change_activity(
+        instance.__dict__.get("_loaded_author_id", instance.author_id),
+        comments=-1,
+    )
+
+
+@receiver((post_save, post_delete), sender=Category)
+@receiver((post_save, post_delete), sender=Genre)
+@receiver((post_save, post_delete), sender=Title)
+@receiver((post_save, post_delete), sender=GenreTitle)
+@receiver((post_save, post_delete), sender=Review)
+def bump_catalog_version(sender, **kwargs):
+    bump_version(sender)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_genre_links_version(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump_version(GenreTitle)
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, raw, created, **kwargs):
+    if raw:
+        return
+    reindex_titles([instance.pk])
+    if not created or instance.rating_count:
+        # Мог смениться год или категория.
+        refresh_rankings_on_commit([instance.pk])
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title(sender, instance, **kwargs):
+    remove_titles([instance.pk])
+
+
+@receiver((post_save, post_delete), sender=GenreTitle)
+def index_genre_link(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_titles([instance.title_id])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def index_genre_links(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            refresh_titles([instance.pk])
+        return
+    if action == "pre_clear":
+        instance._search_title_ids = list(
+            instance.titles.values_list("id", flat=True)
+        )
+    elif action == "post_clear":
+        refresh_titles(instance.__dict__.pop("_search_title_ids", ()))
+    elif action.startswith("post_"):
+        refresh_titles(pk_set)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+def index_related_titles(sender, instance, raw, created, **kwargs):
+    if not raw and not created:
+        reindex_titles(instance.titles.values_list("id", flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_titles(sender, instance, **kwargs):
+    # После удаления категории у произведений уже NULL в category_id.
+    instance._search_title_ids = list(
+        instance.titles.values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Category)
+def index_category_titles(sender, instance, **kwargs):
+    refresh_titles(instance.__dict__.pop("_search_title_ids", ()))
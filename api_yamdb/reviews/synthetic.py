@@ -0,0 +1,152 @@
+import random
+from datetime import timedelta
+from itertools import islice
+
+from django.utils import timezone
+
+from .csv_import import finish_bulk_load
+from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+
+WORDS = (
+    "звезда",
+    "война",
+    "мир",
+    "ночь",
+    "город",
+    "море",
+    "тайна",
+    "дорога",
+    "любовь",
+    "время",
+    "остров",
+    "песня",
+    "тень",
+    "огонь",
+    "сад",
+    "север",
+)
+
+DEFAULT_SCALE = {
+    "users": 200,
+    "categories": 5,
+    "genres": 20,
+    "titles": 1000,
+    "reviews": 10000,
+    "comments": 20000,
+}
+
+
+def phrase(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def bulk_insert(model, objects, batch_size):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return
+        model.objects.bulk_create(batch)
+
+
+def generate_dataset(scale, seed=0, batch_size=1000, stdout=None):
+    """Заполняет пустую базу синтетическими данными заданного объёма.
+
+    Id назначаются явно, начиная с 1, поэтому связи строятся без
+    чтения из базы, а одинаковый seed даёт одинаковые данные.
+    Отзывов не больше, чем пар пользователь-произведение.
+    """
+    rng = random.Random(seed)
+    scale = {**DEFAULT_SCALE, **scale}
+    users, titles = scale["users"], scale["titles"]
+    scale["reviews"] = min(scale["reviews"], users * titles)
+    if scale["reviews"] == 0:
+        scale["comments"] = 0
+    now = timezone.now()
+
+    bulk_insert(
+        User,
+        (
+            User(id=i, username=f"user{i}", email=f"user{i}@yamdb.fake")
+            for i in range(1, users + 1)
+        ),
+        batch_size,
+    )
+    bulk_insert(
+        Category,
+        (
+            Category(id=i, name=f"Категория {i}", slug=f"category-{i}")
+            for i in range(1, scale["categories"] + 1)
+        ),
+        batch_size,
+    )
+    bulk_insert(
+        Genre,
+        (
+            Genre(id=i, name=f"Жанр {i}", slug=f"genre-{i}")
+            for i in range(1, scale["genres"] + 1)
+        ),
+        batch_size,
+    )
+    bulk_insert(
+        Title,
+        (
+            Title(
+                id=i,
+                name=f"{phrase(rng, 2).capitalize()} {i}",
+                year=rng.randint(1900, 2022),
+                description=phrase(rng, 12),
+                category_id=rng.randint(1, scale["categories"]),
+            )
+            for i in range(1, titles + 1)
+        ),
+        batch_size,
+    )
+    bulk_insert(
+        GenreTitle,
+        (
+            GenreTitle(title_id=title_id, genre_id=genre_id)
+            for title_id in range(1, titles + 1)
+            for genre_id in rng.sample(
+                range(1, scale["genres"] + 1),
+                rng.randint(1, min(3, scale["genres"])),
+            )
+        ),
+        batch_size,
+    )
+    # Для отзыва i произведение — i % titles, а автор сдвигается
+    # на каждом круге по произведениям, так что пары не повторяются.
+    bulk_insert(
+        Review,
+        (
+            Review(
+                id=i + 1,
+                title_id=i % titles + 1,
+                author_id=(i // titles + i % titles) % users + 1,
+                text=phrase(rng, 20),
+                score=rng.randint(1, 10),
+                pub_date=now - timedelta(minutes=i),
+            )
+            for i in range(scale["reviews"])
+        ),
+        batch_size,
+    )
+    bulk_insert(
+        Comment,
+        (
+            Comment(
+                id=i,
+                review_id=rng.randint(1, scale["reviews"]),
+                author_id=rng.randint(1, users),
+                text=phrase(rng, 10),
+                pub_date=now - timedelta(seconds=i),
+            )
+            for i in range(1, scale["comments"] + 1)
+        ),
+        batch_size,
+    )
+    finish_bulk_load(
+        (User, Category, Genre, Title, GenreTitle, Review, Comment),
+        stdout=stdout,
+    )
+    return scale
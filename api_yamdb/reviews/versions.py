@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+VERSION_KEY = "catalog:version:{}"
+
+
+def get_catalog_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def get_versions(models):
+    """Возвращает текущие счётчики версий моделей каталога."""
+    cache = get_catalog_cache()
+    keys = [VERSION_KEY.format(model._meta.label_lower) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Счётчик мог быть вытеснен из кэша: начинаем со значения,
+            # которое не совпадёт ни с одной из прежних версий.
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _incr(key):
+    cache = get_catalog_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def bump_version(model):
+    """Сдвигает версию модели сразу и ещё раз после коммита.
+
+    Второй сдвиг отбрасывает ответы, закэшированные конкурентными
+    запросами до того, как изменения стали видны.
+    """
+    key = VERSION_KEY.format(model._meta.label_lower)
+    _incr(key)
+    transaction.on_commit(lambda: _incr(key))
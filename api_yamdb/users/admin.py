@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutgoingEmail, User
 
 
 @admin.register(User)
@@ -12,3 +12,12 @@ class UserAdmin(admin.ModelAdmin):
     list_filter = ("role",)
     search_fields = ("username",)
     empty_value_display = "-пусто-"
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """Админка для очереди писем."""
+
+    list_display = ("subject", "recipients", "attempts", "next_attempt_at")
+    list_filter = ("failed",)
+    search_fields = ("recipients",)
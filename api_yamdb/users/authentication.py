@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+AUTH_STATE_KEY = "auth:user:{}"
+CLAIMS = ("username", "role", "is_staff", "is_superuser")
+
+
+def auth_state(user):
+    """Сводка полей, от которых зависят права пользователя."""
+    return (
+        f"{user.role}:{user.is_staff:d}{user.is_superuser:d}{user.is_active:d}"
+    )
+
+
+def get_auth_state(user_id):
+    """Текущая сводка прав из кэша, при промахе — одним узким запросом.
+
+    Кэш живёт JWT_CLAIMS_STATE_TIMEOUT секунд, поэтому понижение прав
+    вступает в силу не позже этого срока даже в других процессах.
+    """
+    key = AUTH_STATE_KEY.format(user_id)
+    state = cache.get(key)
+    if state is None:
+        user = (
+            User.objects.only("role", "is_staff", "is_superuser", "is_active")
+            .filter(pk=user_id)
+            .first()
+        )
+        state = auth_state(user) if user else ""
+        cache.set(key, state, timeout=settings.JWT_CLAIMS_STATE_TIMEOUT)
+    return state
+
+
+def forget_auth_state(user_id):
+    cache.delete(AUTH_STATE_KEY.format(user_id))
+
+
+def token_claims(user):
+    """Утверждения, которые CreateToken добавляет в access-токен."""
+    claims = {name: getattr(user, name) for name in CLAIMS}
+    claims["auth_state"] = auth_state(user)
+    return claims
+
+
+def is_claims_user(user):
+    return getattr(user, "from_claims", False)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без загрузки пользователя из базы.
+
+    Если токен несёт роль и флаги, а сводка прав в кэше с ними совпадает,
+    request.user собирается из утверждений токена. Такой объект годится
+    для проверки прав и как значение внешнего ключа, но не для save():
+    остальные поля у него пустые. Старые токены и токены с устаревшими
+    правами проходят обычную проверку по базе.
+    """
+
+    def get_user(self, validated_token):
+        if not settings.JWT_CLAIMS_USER or any(
+            name not in validated_token for name in (*CLAIMS, "auth_state")
+        ):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if get_auth_state(user_id) != validated_token["auth_state"]:
+            return super().get_user(validated_token)
+        user = User(
+            id=user_id,
+            **{name: validated_token[name] for name in CLAIMS},
+        )
+        user._state.adding = False
+        user.from_claims = True
+        return user
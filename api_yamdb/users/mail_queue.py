@@ -0,0 +1,235 @@
+import json
+import os
+import time
+import uuid
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+QueuedMail = namedtuple(
+    "QueuedMail",
+    (
+        "id",
+        "subject",
+        "body",
+        "from_email",
+        "recipients",
+        "attempts",
+        "last_error",
+    ),
+    defaults=("",),
+)
+
+
+def retry_delay(attempts):
+    """Экспоненциальная пауза перед следующей попыткой, в секундах."""
+    return min(
+        settings.MAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.MAIL_QUEUE_MAX_RETRY_DELAY,
+    )
+
+
+class DatabaseMailQueue:
+    """Очередь в таблице OutgoingEmail.
+
+    Выбранные письма арендуются сдвигом next_attempt_at, поэтому
+    несколько воркеров не отправят одно письмо дважды, а письма
+    упавшего воркера вернутся в очередь по истечении аренды.
+    """
+
+    def enqueue(self, subject, body, from_email, recipients):
+        from .models import OutgoingEmail
+
+        OutgoingEmail.objects.create(
+            subject=subject,
+            body=body,
+            from_email=from_email,
+            recipients=",".join(recipients),
+        )
+
+    def claim(self, batch_size):
+        from .models import OutgoingEmail
+
+        now = timezone.now()
+        with transaction.atomic():
+            messages = list(
+                OutgoingEmail.objects.select_for_update(skip_locked=True)
+                .filter(failed=False, next_attempt_at__lte=now)
+                .order_by("next_attempt_at", "id")[:batch_size]
+            )
+            OutgoingEmail.objects.filter(
+                id__in=[message.id for message in messages]
+            ).update(
+                next_attempt_at=now
+                + timedelta(seconds=settings.MAIL_QUEUE_LEASE)
+            )
+        return [
+            QueuedMail(
+                message.id,
+                message.subject,
+                message.body,
+                message.from_email,
+                message.recipients.split(","),
+                message.attempts,
+                message.last_error,
+            )
+            for message in messages
+        ]
+
+    def mark_sent(self, message):
+        from .models import OutgoingEmail
+
+        OutgoingEmail.objects.filter(id=message.id).delete()
+
+    def mark_failed(self, message, error):
+        from .models import OutgoingEmail
+
+        attempts = message.attempts + 1
+        OutgoingEmail.objects.filter(id=message.id).update(
+            attempts=attempts,
+            last_error=error,
+            failed=attempts >= settings.MAIL_QUEUE_MAX_ATTEMPTS,
+            next_attempt_at=timezone.now()
+            + timedelta(seconds=retry_delay(attempts)),
+        )
+
+
+class FileMailQueue:
+    """Очередь в каталоге MAIL_QUEUE_PATH, по файлу на письмо.
+
+    Имя файла начинается со времени следующей попытки, так что порядок
+    каталога совпадает с порядком отправки. Письмо арендуется атомарным
+    переносом в processing/, недоставленные окончательно — в failed/.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or settings.MAIL_QUEUE_PATH
+        self.pending = os.path.join(self.path, "pending")
+        self.processing = os.path.join(self.path, "processing")
+        self.failed = os.path.join(self.path, "failed")
+        for directory in (self.pending, self.processing, self.failed):
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, directory, data, delay=0):
+        due = time.time_ns() + int(delay * 1e9)
+        name = f"{due:020d}-{uuid.uuid4().hex}"
+        temporary = os.path.join(self.path, f".{name}.tmp")
+        with open(temporary, mode="w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False)
+        os.replace(temporary, os.path.join(directory, f"{name}.json"))
+
+    def enqueue(self, subject, body, from_email, recipients):
+        self.write(
+            self.pending,
+            {
+                "subject": subject,
+                "body": body,
+                "from_email": from_email,
+                "recipients": list(recipients),
+                "attempts": 0,
+            },
+        )
+
+    def release_expired(self):
+        deadline = time.time() - settings.MAIL_QUEUE_LEASE
+        for name in os.listdir(self.processing):
+            path = os.path.join(self.processing, name)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.rename(path, os.path.join(self.pending, name))
+            except FileNotFoundError:
+                continue
+
+    def claim(self, batch_size):
+        self.release_expired()
+        now = f"{time.time_ns():020d}"
+        messages = []
+        for name in sorted(os.listdir(self.pending)):
+            if len(messages) >= batch_size or name > now:
+                break
+            path = os.path.join(self.processing, name)
+            try:
+                os.rename(os.path.join(self.pending, name), path)
+            except FileNotFoundError:
+                # Письмо забрал другой воркер.
+                continue
+            os.utime(path)
+            with open(path, encoding="utf-8") as file:
+                messages.append(QueuedMail(id=name, **json.load(file)))
+        return messages
+
+    def mark_sent(self, message):
+        os.remove(os.path.join(self.processing, message.id))
+
+    def mark_failed(self, message, error):
+        attempts = message.attempts + 1
+        data = message._asdict()
+        del data["id"]
+        data.update(attempts=attempts, last_error=error)
+        if attempts >= settings.MAIL_QUEUE_MAX_ATTEMPTS:
+            self.write(self.failed, data)
+        else:
+            self.write(self.pending, data, delay=retry_delay(attempts))
+        os.remove(os.path.join(self.processing, message.id))
+
+
+def get_mail_queue():
+    return import_string(settings.MAIL_QUEUE_BACKEND)()
+
+
+def enqueue_mail(subject, message, recipient_list, from_email=None):
+    """Ставит письмо в очередь вместо отправки внутри запроса."""
+    get_mail_queue().enqueue(
+        subject,
+        message,
+        from_email or settings.DEFAULT_FROM_EMAIL,
+        recipient_list,
+    )
+
+
+def defer_batch(queue, messages, error):
+    """Откладывает всю пачку, если соединение не удалось открыть.
+
+    Каждое письмо получает попытку, ошибку и паузу, как при неудачной
+    отправке, а аренда снимается. Возвращает число отложенных писем.
+    """
+    reason = f"{type(error).__name__}: {error}"
+    for message in messages:
+        queue.mark_failed(message, reason)
+    return len(messages)
+
+
+def send_batch(queue, messages, connection):
+    """Отправляет пачку через одно открытое соединение.
+
+    Возвращает (отправлено, ошибок). После ошибки соединение
+    переоткрывается, чтобы остальные письма пачки не упали следом.
+    """
+    sent = 0
+    for message in messages:
+        email = EmailMessage(
+            subject=message.subject,
+            body=message.body,
+            from_email=message.from_email,
+            to=message.recipients,
+            connection=connection,
+        )
+        try:
+            connection.send_messages([email])
+        except Exception as error:
+            queue.mark_failed(message, f"{type(error).__name__}: {error}")
+            connection.close()
+            try:
+                connection.open()
+            except Exception:
+                # Следующая отправка сама попробует открыть соединение.
+                pass
+        else:
+            queue.mark_sent(message)
+            sent += 1
+    return sent, len(messages) - sent
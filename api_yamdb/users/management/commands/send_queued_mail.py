@@ -0,0 +1,73 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from users.mail_queue import defer_batch, get_mail_queue, send_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Отправляет письма из очереди пачками через одно соединение "
+        "с почтовым сервером; неудачные откладываются с нарастающей паузой."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Количество писем, забираемых из очереди за раз.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Не завершаться, а ждать новых писем.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Пауза между опросами пустой очереди в секундах.",
+        )
+
+    def handle(self, *args, **options):
+        queue = get_mail_queue()
+        total_sent = total_failed = 0
+        connection = get_connection(fail_silently=False)
+        try:
+            while True:
+                messages = queue.claim(options["batch_size"])
+                if not messages:
+                    # Простаивающее соединение сервер всё равно закроет.
+                    connection.close()
+                    if not options["loop"]:
+                        break
+                    time.sleep(options["interval"])
+                    continue
+                try:
+                    connection.open()
+                except Exception as error:
+                    # Сбой или отказ в авторизации почтового сервера
+                    # откладывает пачку, а не роняет воркер.
+                    total_failed += defer_batch(queue, messages, error)
+                    self.stderr.write(
+                        f"Почтовый сервер недоступен: {error}; "
+                        f"отложено писем: {len(messages)}."
+                    )
+                    connection.close()
+                    if not options["loop"]:
+                        break
+                    time.sleep(options["interval"])
+                    continue
+                sent, failed = send_batch(queue, messages, connection)
+                total_sent += sent
+                total_failed += failed
+                if options["verbosity"] > 1:
+                    self.stdout.write(
+                        f"Отправлено: {sent}, отложено: {failed}."
+                    )
+        finally:
+            connection.close()
+        self.stdout.write(
+            f"Отправлено писем: {total_sent}, отложено: {total_failed}."
+        )
@@ -2,6 +2,8 @@ from dataclasses import dataclass
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
+from reviews.counters import CounterFieldsMixin
 
 
 @dataclass
@@ -20,7 +22,7 @@ ROLE_CHOICES = (
 )
 
 
-class User(AbstractUser):
+class User(CounterFieldsMixin, AbstractUser):
     """Описание модели Юзера."""
 
     username = models.CharField(
@@ -46,6 +48,17 @@ class User(AbstractUser):
         default=UserRole.DEFAULT_USER,
         help_text="Роль пользователя",
     )
+    reviews_count = models.PositiveIntegerField(
+        "Количество отзывов", default=0, editable=False
+    )
+    scores_sum = models.PositiveIntegerField(
+        "Сумма оценок в отзывах", default=0, editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        "Количество комментариев", default=0, editable=False
+    )
+
+    counter_fields = ("reviews_count", "scores_sum", "comments_count")
 
     @property
     def is_admin(self):
@@ -57,6 +70,13 @@ class User(AbstractUser):
     def is_moderator(self):
         return self.role == UserRole.MODERATOR
 
+    @property
+    def average_score(self):
+        """Средняя оценка в отзывах пользователя по счётчикам."""
+        if not self.reviews_count:
+            return None
+        return self.scores_sum / self.reviews_count
+
     class Meta:
         """Мета класс для модели."""
 
@@ -67,3 +87,38 @@ class User(AbstractUser):
     def __str__(self) -> str:
         """Возвращает удобное для человека представление."""
         return self.username
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    subject = models.CharField("Тема", max_length=255)
+    body = models.TextField("Текст")
+    from_email = models.CharField("Отправитель", max_length=254)
+    recipients = models.TextField(
+        "Получатели", help_text="Адреса через запятую"
+    )
+    attempts = models.PositiveSmallIntegerField("Попытки", default=0)
+    next_attempt_at = models.DateTimeField(
+        "Следующая попытка", default=timezone.now
+    )
+    last_error = models.TextField("Последняя ошибка", blank=True)
+    failed = models.BooleanField("Не доставлено", default=False)
+    created_at = models.DateTimeField("Создано", auto_now_add=True)
+
+    class Meta:
+        """Мета класс для модели."""
+
+        ordering = ("next_attempt_at", "id")
+        indexes = [
+            models.Index(
+                fields=("failed", "next_attempt_at"),
+                name="outgoingemail_due_idx",
+            ),
+        ]
+        verbose_name = "Письмо в очереди"
+        verbose_name_plural = "Очередь писем"
+
+    def __str__(self) -> str:
+        """Возвращает удобное для человека представление."""
+        return f"{self.subject} → {self.recipients}"
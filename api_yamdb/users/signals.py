@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_auth_state
+from .models import User
+
+
+@receiver((post_save, post_delete), sender=User)
+def reset_auth_state(sender, instance, **kwargs):
+    """Сбрасывает сводку прав сразу и ещё раз после коммита.
+
+    Второй сброс убирает сводку, закэшированную конкурентным запросом
+    до того, как изменения стали видны.
+    """
+    forget_auth_state(instance.pk)
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_auth_state(user_id))
@@ -0,0 +1,48 @@
+import pytest
+
+
+@pytest.fixture
+def catalog(django_user_model):
+    """Каталог, в котором каждое произведение связано со всеми объектами."""
+    from reviews.models import Category, Comment, Genre, Review, Title
+
+    categories = [
+        Category.objects.create(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(3)
+    ]
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(4)
+    ]
+    authors = [
+        django_user_model.objects.create_user(
+            username=f'author{i}', email=f'author{i}@yamdb.fake'
+        )
+        for i in range(6)
+    ]
+    titles = []
+    for i in range(8):
+        title = Title.objects.create(
+            name=f'Произведение {i}',
+            year=1990 + i,
+            description=f'Описание {i}',
+            category=categories[i % len(categories)],
+        )
+        title.genre.set(genres[: 1 + i % len(genres)])
+        titles.append(title)
+    reviews = [
+        Review.objects.create(
+            title=titles[0], author=author, text='Отзыв', score=1 + i
+        )
+        for i, author in enumerate(authors)
+    ]
+    for author in authors:
+        Comment.objects.create(
+            review=reviews[0], author=author, text='Комментарий'
+        )
+    return {
+        'categories': categories,
+        'genres': genres,
+        'titles': titles,
+        'reviews': reviews,
+    }
@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from rest_framework.test import APIClient
+
+from users.models import OutgoingEmail, User
+
+THREADS = 12
+
+
+@pytest.fixture(autouse=True)
+def no_throttling(settings):
+    # Здесь проверяются гонки, а не лимиты на число запросов.
+    settings.THROTTLE_ENABLED = False
+
+
+def hammer(url, payload):
+    """Шлёт один и тот же запрос из нескольких потоков одновременно."""
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+        pytest.skip('SQLite в памяти блокирует таблицы между потоками')
+    barrier = threading.Barrier(THREADS)
+
+    def post(_):
+        try:
+            barrier.wait()
+            return APIClient().post(url, payload, format='json')
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        return list(pool.map(post, range(THREADS)))
+
+
+@pytest.mark.django_db(transaction=True)
+class TestSignupConcurrency:
+
+    url = '/api/v1/auth/signup/'
+
+    def test_concurrent_retries_create_one_user(self):
+        payload = {'username': 'racer', 'email': 'racer@yamdb.fake'}
+        responses = hammer(self.url, payload)
+        assert [r.status_code for r in responses] == [200] * THREADS
+        assert User.objects.filter(username='racer').count() == 1
+        # Каждый повтор перевыпускает код.
+        assert OutgoingEmail.objects.count() == THREADS
+
+    def test_conflicting_pair_is_rejected(self):
+        User.objects.create(username='taken', email='taken@yamdb.fake')
+        responses = hammer(
+            self.url, {'username': 'taken', 'email': 'other@yamdb.fake'}
+        )
+        assert {r.status_code for r in responses} == {400}
+        assert 'username' in responses[0].json()
+        assert User.objects.count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTokenConcurrency:
+
+    url = '/api/v1/auth/token/'
+
+    def test_concurrent_token_requests(self):
+        user = User.objects.create(username='racer', email='racer@yamdb.fake')
+        code = default_token_generator.make_token(user)
+        responses = hammer(
+            self.url, {'username': 'racer', 'confirmation_code': code}
+        )
+        assert [r.status_code for r in responses] == [200] * THREADS
+        assert all(r.json()['token'] for r in responses)
+
+
+@pytest.mark.django_db
+class TestToken:
+
+    url = '/api/v1/auth/token/'
+
+    def test_single_query(self, client, django_assert_num_queries):
+        user = User.objects.create(username='solo', email='solo@yamdb.fake')
+        code = default_token_generator.make_token(user)
+        with django_assert_num_queries(1):
+            response = client.post(
+                self.url, {'username': 'solo', 'confirmation_code': code}
+            )
+        assert response.status_code == 200
+
+    def test_unknown_user_and_bad_code(self, client):
+        User.objects.create(username='solo', email='solo@yamdb.fake')
+        missing = client.post(
+            self.url, {'username': 'nobody', 'confirmation_code': 'x'}
+        )
+        assert missing.status_code == 404
+        wrong = client.post(
+            self.url, {'username': 'solo', 'confirmation_code': 'x'}
+        )
+        assert wrong.status_code == 400
@@ -0,0 +1,91 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestTitleBatch:
+
+    url = '/api/v1/titles/batch/'
+
+    def test_admin_only(self, user_client):
+        assert user_client.post(self.url, [], format='json').status_code == 403
+
+    def test_create_update_and_errors(self, admin_client, catalog):
+        title = catalog['titles'][0]
+        payload = [
+            {
+                'name': 'Новое', 'year': 2001, 'category': 'category-0',
+                'genre': ['genre-1', 'genre-2'],
+            },
+            {
+                'id': title.id, 'name': 'Переименовано', 'year': 1990,
+                'category': 'category-2', 'genre': ['genre-3'],
+            },
+            {
+                'name': 'Ошибка', 'year': 2001, 'category': 'nope',
+                'genre': ['genre-1'],
+            },
+            {'name': 'Без года', 'category': 'category-0', 'genre': ['genre-1']},
+        ]
+        response = admin_client.post(self.url, payload, format='json')
+        assert response.status_code == 200
+        results = response.json()
+        assert [item['status'] for item in results] == [
+            'created', 'updated', 'error', 'error'
+        ]
+        assert 'category' in results[2]['errors']
+        assert 'year' in results[3]['errors']
+
+        created = admin_client.get(f'/api/v1/titles/{results[0]["id"]}/').json()
+        assert [genre['slug'] for genre in created['genre']] == ['genre-1', 'genre-2']
+        updated = admin_client.get(f'/api/v1/titles/{title.id}/').json()
+        assert updated['name'] == 'Переименовано'
+        assert updated['category']['slug'] == 'category-2'
+        assert [genre['slug'] for genre in updated['genre']] == ['genre-3']
+
+    def test_slugs_resolved_once_per_batch(
+        self, admin_client, catalog, django_assert_max_num_queries
+    ):
+        payload = [
+            {
+                'id': title.id, 'name': title.name, 'year': title.year,
+                'category': 'category-1', 'genre': ['genre-0', 'genre-1'],
+            }
+            for title in catalog['titles']
+        ]
+        # Авторизация, категории, жанры, произведения, bulk_update,
+        # сверка, удаление и вставка связей, переиндексация, savepoint
+        # и пересборка таблиц лидеров (блокировка, жанры, удаление,
+        # вставка) — всё на пакет, а не на произведение.
+        with django_assert_max_num_queries(16):
+            response = admin_client.post(self.url, payload, format='json')
+        assert {item['status'] for item in response.json()} == {'updated'}
+
+    def test_batch_size_limit(self, admin_client, settings):
+        settings.BATCH_MAX_SIZE = 1
+        response = admin_client.post(self.url, [{}, {}], format='json')
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestReviewBatch:
+
+    url = '/api/v1/reviews/batch/'
+
+    def test_unique_author_title(self, admin_client, catalog, user):
+        title, other = catalog['titles'][0], catalog['titles'][1]
+        taken_author = catalog['reviews'][0].author.username
+        payload = [
+            {'title': other.id, 'author': user.username, 'text': 'a', 'score': 4},
+            {'title': other.id, 'author': user.username, 'text': 'b', 'score': 6},
+            {'title': title.id, 'author': taken_author, 'text': 'c', 'score': 1},
+            {'title': other.id, 'author': 'ghost', 'text': 'd', 'score': 1},
+        ]
+        response = admin_client.post(self.url, payload, format='json')
+        assert response.status_code == 200
+        results = response.json()
+        assert [item['status'] for item in results] == [
+            'created', 'error', 'error', 'error'
+        ]
+        assert results[0]['id']
+        rating = admin_client.get(f'/api/v1/titles/{other.id}/').json()['rating']
+        assert rating == 4
@@ -0,0 +1,59 @@
+import pytest
+from django.core.management import call_command
+
+from api.benchmark import ENDPOINTS, percentile, run_benchmark
+from reviews.models import (
+    Category, Comment, Genre, GenreTitle, Review, Title,
+)
+from reviews.synthetic import generate_dataset
+
+SCALE = {
+    'users': 5, 'categories': 2, 'genres': 4,
+    'titles': 6, 'reviews': 40, 'comments': 20,
+}
+
+
+@pytest.mark.django_db
+class TestSyntheticDataset:
+
+    def test_generated_data_is_consistent(self):
+        scale = generate_dataset(SCALE, seed=1)
+        # Отзывов не может быть больше, чем пар автор-произведение.
+        assert scale['reviews'] == 30
+        assert Review.objects.count() == 30
+        assert Comment.objects.count() == 20
+        assert Title.objects.count() == 6
+        assert GenreTitle.objects.count() >= 6
+        # Рейтинги и поисковый индекс собраны после bulk_create.
+        call_command('rebuild_ratings', check=True)
+        title = Title.objects.get(id=1)
+        assert title.rating_count == 5
+
+    def test_seed_is_reproducible(self, django_user_model):
+        def snapshot():
+            return (
+                list(Title.objects.values_list('name', 'year', 'category')),
+                list(Review.objects.values_list('author', 'title', 'score')),
+            )
+
+        generate_dataset(SCALE, seed=7)
+        first = snapshot()
+        for model in (Title, Category, Genre, django_user_model):
+            model.objects.all().delete()
+        generate_dataset(SCALE, seed=7)
+        assert snapshot() == first
+
+    def test_run_benchmark_hits_every_endpoint(self):
+        generate_dataset(SCALE)
+        results = run_benchmark(requests=3, warmup=1)
+        assert set(results) == {name for name, _ in ENDPOINTS}
+        for name, result in results.items():
+            assert result['requests'] == 3, name
+            assert result['errors'] == 0, name
+            assert result['p50_ms'] <= result['p99_ms']
+
+
+def test_percentile():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([3, 1, 2, 4], 0.5) == 3
+    assert percentile([1, 2, 3], 0.99) == 3
@@ -0,0 +1,41 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+
+    def test_hit_skips_database(
+        self, client, catalog, django_assert_num_queries
+    ):
+        first = client.get('/api/v1/titles/?genre=genre-0')
+        with django_assert_num_queries(0):
+            second = client.get('/api/v1/titles/?genre=genre-0')
+        assert second.json() == first.json()
+
+    def test_not_modified(self, client, catalog, django_assert_num_queries):
+        etag = client.get('/api/v1/categories/')['ETag']
+        with django_assert_num_queries(0):
+            response = client.get(
+                '/api/v1/categories/', HTTP_IF_NONE_MATCH=etag
+            )
+        assert response.status_code == 304
+
+    def test_review_invalidates_rating(self, user_client, client, catalog):
+        title = catalog['titles'][1]
+        url = f'/api/v1/titles/{title.id}/'
+        etag = client.get(url)['ETag']
+        assert client.get(url).json()['rating'] is None
+        user_client.post(
+            f'{url}reviews/', data={'text': 'Отзыв', 'score': 7}
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()['rating'] == 7
+
+    def test_genre_links_invalidate_titles(self, client, catalog):
+        title = catalog['titles'][0]
+        url = f'/api/v1/titles/{title.id}/'
+        before = client.get(url).json()['genre']
+        title.genre.add(*catalog['genres'])
+        after = client.get(url).json()['genre']
+        assert len(after) == len(catalog['genres']) != len(before)
@@ -0,0 +1,87 @@
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from rest_framework.test import APIClient
+
+
+def issue_token(user):
+    response = APIClient().post(
+        '/api/v1/auth/token/',
+        {
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        },
+    )
+    assert response.status_code == 200
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}')
+    return client
+
+
+def user_queries(client, method, url, data=None):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data, format='json')
+    queries = [q['sql'] for q in context.captured_queries if 'users_user' in q['sql']]
+    return response, queries
+
+
+@pytest.mark.django_db
+class TestClaimsAuthentication:
+
+    def test_permission_check_without_user_query(self, admin):
+        client = issue_token(admin)
+        # Первый запрос заполняет кэш сводки прав.
+        client.post('/api/v1/categories/', {'name': 'Кино', 'slug': 'kino'})
+        response, queries = user_queries(
+            client, 'post', '/api/v1/categories/',
+            {'name': 'Книги', 'slug': 'books'},
+        )
+        assert response.status_code == 201
+        assert queries == []
+
+    def test_demotion_takes_effect(self, admin):
+        client = issue_token(admin)
+        payload = {'name': 'Кино', 'slug': 'kino'}
+        assert client.post('/api/v1/categories/', payload).status_code == 201
+        admin.role = 'user'
+        admin.save()
+        payload = {'name': 'Книги', 'slug': 'books'}
+        assert client.post('/api/v1/categories/', payload).status_code == 403
+
+    def test_deactivated_user_rejected(self, user):
+        client = issue_token(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        user.is_active = False
+        user.save()
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    def test_me_returns_full_profile(self, user):
+        user.bio = 'Люблю кино'
+        user.save()
+        client = issue_token(user)
+        response = client.get('/api/v1/users/me/')
+        assert response.json()['bio'] == 'Люблю кино'
+        response = client.patch('/api/v1/users/me/', {'first_name': 'Иван'})
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert (user.first_name, user.bio, user.email) == (
+            'Иван', 'Люблю кино', 'testuser@yamdb.fake'
+        )
+
+    def test_review_author_from_claims(self, user, catalog):
+        client = issue_token(user)
+        title = catalog['titles'][1]
+        response = client.post(
+            f'/api/v1/titles/{title.id}/reviews/', {'text': 'Хорошо', 'score': 8}
+        )
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
+        review_id = response.json()['id']
+        response = client.patch(
+            f'/api/v1/titles/{title.id}/reviews/{review_id}/', {'score': 9}
+        )
+        assert response.status_code == 200
+
+    def test_plain_token_still_works(self, user_client):
+        assert user_client.get('/api/v1/users/me/').status_code == 200
@@ -0,0 +1,75 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from reviews.models import Comment, Review, Title
+
+
+def counts(title):
+    title.refresh_from_db()
+    return title.rating_count
+
+
+@pytest.mark.django_db
+class TestCounters:
+
+    def test_exposed_in_api(self, client, catalog):
+        title = catalog['titles'][0]
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['reviews_count'] == 6
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        by_id = {item['id']: item for item in response.json()['results']}
+        assert by_id[catalog['reviews'][0].id]['comments_count'] == 6
+        assert by_id[catalog['reviews'][1].id]['comments_count'] == 0
+
+    def test_api_create_and_delete(self, user_client, user, catalog):
+        title = catalog['titles'][1]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, {'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 201, response.content
+        assert response.json()['comments_count'] == 0
+        assert counts(title) == 1
+        review_url = f'{url}{response.json()["id"]}/'
+        response = user_client.post(f'{review_url}comments/', {'text': 'Да'})
+        assert response.status_code == 201, response.content
+        review = Review.objects.get(title=title)
+        assert review.comments_count == 1
+        response = user_client.delete(
+            f'{review_url}comments/{response.json()["id"]}/'
+        )
+        assert response.status_code == 204
+        review.refresh_from_db()
+        assert review.comments_count == 0
+        assert user_client.delete(review_url).status_code == 204
+        assert counts(title) == 0
+
+    def test_cascades(self, catalog, django_user_model):
+        title = catalog['titles'][0]
+        review = catalog['reviews'][1]
+        author = django_user_model.objects.get(username='author0')
+        Comment.objects.create(review=review, author=author, text='.')
+        author.delete()
+        review.refresh_from_db()
+        assert review.comments_count == 0
+        assert counts(title) == 5
+        call_command('reconcile_counters', check=True)
+
+    def test_save_keeps_concurrent_counters(self, catalog):
+        review = Review.objects.get(pk=catalog['reviews'][0].pk)
+        title = Title.objects.get(pk=review.title_id)
+        Comment.objects.create(review=review, author=review.author, text='.')
+        review.text = 'Изменённый отзыв'
+        review.save()
+        title.name = 'Новое название'
+        title.save()
+        call_command('reconcile_counters', check=True)
+
+    def test_reconcile_fixes_drift(self, catalog):
+        Review.objects.update(comments_count=42)
+        Title.objects.update(rating_count=0, rating_sum=0)
+        with pytest.raises(CommandError):
+            call_command('reconcile_counters', check=True)
+        call_command('reconcile_counters')
+        call_command('reconcile_counters', check=True)
+        assert counts(catalog['titles'][0]) == 6
+        assert Review.objects.get(pk=catalog['reviews'][0].pk).comments_count == 6
@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+import os
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+def _content(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_admin_only(self, client, user_client):
+        assert client.get('/api/v1/export/titles.csv').status_code == 401
+        assert user_client.get('/api/v1/export/titles.csv').status_code == 403
+
+    def test_titles_ndjson(self, admin_client, catalog):
+        response = admin_client.get('/api/v1/export/titles.ndjson')
+        assert response.status_code == 200
+        rows = [json.loads(line) for line in _content(response).splitlines()]
+        assert [row['id'] for row in rows] == [t.id for t in catalog['titles']]
+        first = rows[0]
+        api = admin_client.get(f'/api/v1/titles/{first["id"]}/').json()
+        assert first['rating'] == api['rating']
+        assert first['genre'] == [genre['slug'] for genre in api['genre']]
+        assert first['category'] == api['category']['slug']
+
+    def test_reviews_csv(self, admin_client, catalog):
+        response = admin_client.get('/api/v1/export/reviews.csv')
+        rows = list(csv.DictReader(io.StringIO(_content(response))))
+        assert len(rows) == len(catalog['reviews'])
+        assert rows[0]['author'] == catalog['reviews'][0].author.username
+
+
+@pytest.mark.django_db
+class TestDumpToCsv:
+
+    def test_round_trip(self, tmp_path):
+        from reviews.management.commands.populate_from_csv import DATA_PATH
+
+        call_command('populate_from_csv')
+        call_command('dump_to_csv', '--data-path', str(tmp_path))
+        for filename in ('users.csv', 'titles.csv', 'review.csv'):
+            with open(f'{DATA_PATH}{filename}', encoding='utf-8') as source:
+                expected = sorted(csv.reader(source))
+            with open(tmp_path / filename, encoding='utf-8') as dumped:
+                assert sorted(csv.reader(dumped)) == expected
+
+    def test_refuses_to_overwrite(self, tmp_path):
+        existing = tmp_path / 'titles.csv'
+        existing.write_text('id\n', encoding='utf-8')
+        with pytest.raises(CommandError, match='titles.csv'):
+            call_command('dump_to_csv', '--data-path', str(tmp_path))
+        assert existing.read_text(encoding='utf-8') == 'id\n'
+        call_command('dump_to_csv', '--data-path', str(tmp_path), '--force')
+        assert existing.read_text(encoding='utf-8').startswith('id,name')
+
+    def test_default_is_new_directory(self, tmp_path, monkeypatch):
+        from reviews.management.commands import dump_to_csv
+
+        data_path = f'{tmp_path / "static" / "data"}/'
+        monkeypatch.setattr(dump_to_csv, 'DATA_PATH', data_path)
+        call_command('dump_to_csv')
+        dump, = os.listdir(tmp_path / 'static')
+        assert dump.startswith('dump-')
+        assert 'titles.csv' in os.listdir(tmp_path / 'static' / dump)
@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from api.benchmark import benchmark_serializers
+from api.renderers import FastJSONRenderer
+from reviews.models import Comment, Review, Title
+
+URLS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/?page=2',
+    '/api/v1/titles/?pagination=cursor&page_size=3',
+    '/api/v1/titles/?genre=genre-1',
+    '/api/v1/titles/?fields=id,rating&expand=genre',
+    '/api/v1/titles/?expand=category',
+    '/api/v1/titles/{title}/reviews/',
+    '/api/v1/titles/{title}/reviews/?fields=author,pub_date',
+    '/api/v1/titles/{title}/reviews/{review}/comments/',
+)
+
+
+@pytest.fixture
+def odd_rows(catalog):
+    """Строки с пустыми полями и символами, которые экранирует DRF."""
+    title = Title.objects.create(name='Без\u2028категории', year=2000)
+    review = catalog['reviews'][0]
+    Comment.objects.create(
+        review=review, author=review.author, text='Строка\u2029"кавычки"'
+    )
+    return title
+
+
+def fetch(client, settings, url, fast):
+    settings.FAST_LIST_SERIALIZERS = fast
+    for cache in caches.all():
+        cache.clear()
+    response = client.get(url)
+    assert response.status_code == 200, response.content
+    return response.content
+
+
+@pytest.mark.django_db
+class TestFastListSerializers:
+
+    @pytest.mark.parametrize('url', URLS)
+    def test_output_is_byte_identical(
+        self, client, settings, catalog, odd_rows, url
+    ):
+        review = catalog['reviews'][0]
+        url = url.format(title=review.title_id, review=review.id)
+        assert fetch(client, settings, url, True) == fetch(
+            client, settings, url, False
+        )
+
+    def test_query_count(
+        self, client, settings, catalog, django_assert_num_queries
+    ):
+        settings.FAST_LIST_SERIALIZERS = True
+        # COUNT, страница и жанры страницы.
+        with django_assert_num_queries(3):
+            client.get('/api/v1/titles/')
+        title_id = catalog['titles'][0].id
+        # COUNT и страница, произведение отдельно не читается.
+        with django_assert_num_queries(2):
+            client.get(f'/api/v1/titles/{title_id}/reviews/')
+
+    def test_benchmark_reports_identical_output(self, catalog, odd_rows):
+        results = benchmark_serializers(rows=50, repeat=1)
+        assert set(results) == {'titles', 'reviews'}
+        assert results['titles']['rows'] == Title.objects.count()
+        assert results['reviews']['rows'] == Review.objects.count()
+        for result in results.values():
+            assert result['identical']
+            assert result['fast_us_per_row'] > 0
+
+
+class TestFastJSONRenderer:
+
+    @pytest.mark.parametrize('data', [
+        {'id': 1, 'name': 'Имя\u2028', 'items': [1.5, None, True]},
+        {'when': datetime(2022, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)},
+        {'price': Decimal('1.10'), 'label': gettext_lazy('Отзыв'), 1: 'x'},
+        [],
+    ])
+    def test_same_bytes_as_drf(self, data):
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_indent_falls_back(self):
+        data = {'a': [1, 2]}
+        media_type = 'application/json; indent=4'
+        assert FastJSONRenderer().render(data, media_type) == (
+            JSONRenderer().render(data, media_type)
+        )
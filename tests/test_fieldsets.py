@@ -0,0 +1,80 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def get(client, url, params):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    assert response.status_code == 200, response.content
+    return response.json(), [query['sql'] for query in queries]
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+
+    def test_default_response_unchanged(self, client, catalog):
+        data, _ = get(client, '/api/v1/titles/', {})
+        assert set(data['results'][0]) == {
+            'id', 'name', 'year', 'description', 'genre', 'category',
+            'rating', 'reviews_count',
+        }
+
+    def test_fields_defer_columns_and_relations(self, client, catalog):
+        data, queries = get(client, '/api/v1/titles/', {'fields': 'id,name'})
+        assert [set(item) for item in data['results']] == [{'id', 'name'}] * 5
+        assert len(queries) == 2
+        assert not any('description' in sql for sql in queries)
+        assert not any('reviews_category' in sql for sql in queries)
+
+    def test_fields_with_rating(self, client, catalog):
+        title = catalog['titles'][0]
+        data, _ = get(
+            client, f'/api/v1/titles/{title.id}/', {'fields': 'rating,reviews_count'}
+        )
+        assert data == {'rating': 3, 'reviews_count': 6}
+
+    def test_expand(self, client, catalog):
+        data, queries = get(client, '/api/v1/titles/', {'expand': 'category'})
+        item = data['results'][0]
+        assert 'genre' not in item
+        assert item['category'] == {'name': 'Категория 0', 'slug': 'category-0'}
+        assert 'description' in item
+        assert len(queries) == 2
+
+        data, queries = get(
+            client, '/api/v1/titles/', {'fields': 'name', 'expand': 'genre'}
+        )
+        assert set(data['results'][0]) == {'name', 'genre'}
+        assert len(queries) == 3
+
+    def test_unknown_names(self, client, catalog):
+        response = client.get(
+            '/api/v1/titles/', {'fields': 'name,secret', 'expand': 'reviews'}
+        )
+        assert response.status_code == 400
+        assert set(response.json()) == {'fields', 'expand'}
+
+    def test_reviews_and_comments(self, client, catalog):
+        review = catalog['reviews'][0]
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        data, queries = get(client, url, {'fields': 'id,score'})
+        assert set(data['results'][0]) == {'id', 'score'}
+        assert not any('users_user' in sql for sql in queries), queries
+
+        data, _ = get(client, url, {'fields': 'id', 'expand': 'author'})
+        assert data['results'][0] == {'id': review.id, 'author': 'author0'}
+
+        data, _ = get(
+            client, f'{url}{review.id}/comments/', {'fields': 'text'}
+        )
+        assert data['results'][0] == {'text': 'Комментарий'}
+
+    def test_write_ignores_fieldset(self, user_client, catalog):
+        title = catalog['titles'][1]
+        response = user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/?fields=id',
+            {'text': 'Отзыв', 'score': 5},
+        )
+        assert response.status_code == 201, response.content
+        assert response.json()['score'] == 5
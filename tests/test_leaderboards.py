@@ -0,0 +1,135 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, TitleRanking
+
+
+@pytest.fixture
+def rated(catalog, django_user_model):
+    """titles[0]: 6 отзывов, средняя 3.5; titles[1]: один отзыв на 10;
+    titles[2]: три отзыва по 9."""
+    authors = list(django_user_model.objects.filter(username__startswith='author'))
+    titles = catalog['titles']
+    Review.objects.create(title=titles[1], author=authors[0], text='.', score=10)
+    for author in authors[:3]:
+        Review.objects.create(title=titles[2], author=author, text='.', score=9)
+    return titles
+
+
+def top(client, **params):
+    response = client.get('/api/v1/titles/top/', params)
+    assert response.status_code == 200, response.content
+    return [(item['id'], item['score']) for item in response.json()]
+
+
+def ranking_snapshot():
+    return sorted(
+        TitleRanking.objects.values_list(
+            'scope', 'key', 'title_id', 'rating_count', 'score'
+        )
+    )
+
+
+# Таблицы лидеров пересобираются после коммита записи.
+@pytest.mark.django_db(transaction=True)
+class TestTopTitles:
+
+    def test_average_and_min_reviews(self, client, rated):
+        assert top(client) == [(rated[1].id, 10), (rated[2].id, 9), (rated[0].id, 3.5)]
+        assert [item[0] for item in top(client, min_reviews=2)] == [
+            rated[2].id, rated[0].id
+        ]
+        assert [item[0] for item in top(client, limit=1)] == [rated[1].id]
+
+    def test_bayesian_prefers_more_reviews(self, client, rated):
+        ids = [item[0] for item in top(client, score='bayesian')]
+        assert ids == [rated[2].id, rated[1].id, rated[0].id]
+
+    def test_scopes(self, client, rated):
+        assert [i for i, _ in top(client, genre='genre-1')] == [rated[1].id, rated[2].id]
+        assert [i for i, _ in top(client, category='category-0')] == [rated[0].id]
+        assert [i for i, _ in top(client, year=1991)] == [rated[1].id]
+        assert top(client, genre='missing') == []
+        response = client.get('/api/v1/titles/top/', {'genre': 'genre-1', 'year': 1991})
+        assert response.status_code == 400
+
+    def test_incremental_updates(self, client, admin_client, rated):
+        review = Review.objects.get(title=rated[1])
+        review.score = 2
+        review.save()
+        assert top(client)[0] == (rated[2].id, 9)
+        review.delete()
+        assert rated[1].id not in [i for i, _ in top(client)]
+
+        response = admin_client.patch(
+            f'/api/v1/titles/{rated[2].id}/', {'genre': ['genre-3'], 'year': 2005}
+        )
+        assert response.status_code == 200
+        assert [i for i, _ in top(client, genre='genre-3')] == [rated[2].id]
+        assert top(client, genre='genre-1') == []
+        assert [i for i, _ in top(client, year=2005)] == [rated[2].id]
+
+    def test_refresh_failure_keeps_review(
+        self, user_client, rated, monkeypatch, caplog
+    ):
+        from reviews import leaderboards
+
+        def refresh(title_ids):
+            raise RuntimeError('refresh failed')
+
+        monkeypatch.setattr(leaderboards, 'refresh_rankings', refresh)
+        response = user_client.post(
+            f'/api/v1/titles/{rated[3].id}/reviews/', {'text': '.', 'score': 7}
+        )
+        assert response.status_code == 201
+        assert Review.objects.filter(title=rated[3]).exists()
+        assert 'rebuild_leaderboards' in caplog.text
+
+    def test_rebuild_invalidates_cached_top(self, client, rated):
+        from reviews.models import Title
+
+        assert top(client)[0] == (rated[1].id, 10)
+        # Рейтинг меняется в обход сигналов, кэш об этом не знает.
+        Title.objects.filter(pk=rated[1].pk).update(rating_sum=1)
+        assert top(client)[0] == (rated[1].id, 10)
+        call_command('rebuild_leaderboards')
+        assert top(client)[0] == (rated[2].id, 9)
+
+    def test_rebuild_matches_incremental(self, rated):
+        incremental = ranking_snapshot()
+        call_command('rebuild_leaderboards')
+        assert ranking_snapshot() == incremental
+
+    def test_batch_reviews_update_rankings(self, admin_client, rated):
+        response = admin_client.post(
+            '/api/v1/reviews/batch/',
+            [{'title': rated[3].id, 'author': 'author0', 'text': '.', 'score': 10}],
+            format='json',
+        )
+        assert response.json()[0]['status'] == 'created'
+        assert TitleRanking.objects.filter(
+            title=rated[3], scope=TitleRanking.ALL, score=10
+        ).exists()
+
+    def test_cascade_refreshes_once(self, rated, django_user_model):
+        author = django_user_model.objects.get(username='author0')
+        for title in rated[3:8]:
+            Review.objects.create(title=title, author=author, text='.', score=5)
+        with CaptureQueriesContext(connection) as captured:
+            author.delete()
+        rankings = [
+            query for query in captured if 'reviews_titleranking' in query['sql']
+        ]
+        # Одно удаление и одна вставка строк на все затронутые произведения.
+        assert len(rankings) == 2
+        assert not TitleRanking.objects.filter(
+            title__in=[rated[1], *rated[3:8]]
+        ).exists()
+        assert TitleRanking.objects.filter(title=rated[2], rating_count=2).exists()
+
+    def test_read_is_index_lookup(self, client, rated, django_assert_max_num_queries):
+        # Места, произведения с категориями и жанры.
+        with django_assert_max_num_queries(3):
+            top(client, genre='genre-1')
@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from users.mail_queue import FileMailQueue, enqueue_mail
+from users.models import OutgoingEmail
+
+
+class CountingBackend(EmailBackend):
+    """locmem-бэкенд, считающий открытия соединения и падающий по адресу."""
+
+    opened = 0
+    connected = False
+
+    def open(self):
+        if self.connected:
+            return False
+        self.connected = True
+        CountingBackend.opened += 1
+        return True
+
+    def close(self):
+        self.connected = False
+
+    def send_messages(self, messages):
+        if any('broken@' in address for m in messages for address in m.to):
+            raise ConnectionError('SMTP недоступен')
+        return super().send_messages(messages)
+
+
+class UnreachableBackend(CountingBackend):
+    """Бэкенд, не способный открыть соединение."""
+
+    def open(self):
+        raise ConnectionRefusedError('SMTP не отвечает')
+
+
+@pytest.fixture
+def counting_backend(settings):
+    settings.EMAIL_BACKEND = 'tests.test_mail_queue.CountingBackend'
+    CountingBackend.opened = 0
+    return CountingBackend
+
+
+@pytest.mark.django_db
+class TestMailQueue:
+
+    def test_signup_only_enqueues(self, client):
+        response = client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'newbie', 'email': 'newbie@yamdb.fake'},
+        )
+        assert response.status_code == 200
+        assert mail.outbox == []
+        queued = OutgoingEmail.objects.get()
+        assert queued.recipients == 'newbie@yamdb.fake'
+
+        call_command('send_queued_mail')
+        assert [message.to for message in mail.outbox] == [
+            ['newbie@yamdb.fake']
+        ]
+        assert not OutgoingEmail.objects.exists()
+
+    def test_batch_reuses_connection(self, counting_backend):
+        for index in range(5):
+            enqueue_mail('Тема', 'Текст', [f'user{index}@yamdb.fake'])
+        call_command('send_queued_mail', batch_size=2)
+        assert len(mail.outbox) == 5
+        # Одно открытие на весь прогон, а не на каждое письмо.
+        assert counting_backend.opened == 1
+
+    def test_failure_is_retried_with_backoff(self, counting_backend, settings):
+        settings.MAIL_QUEUE_MAX_ATTEMPTS = 2
+        enqueue_mail('Тема', 'Текст', ['broken@yamdb.fake'])
+        enqueue_mail('Тема', 'Текст', ['ok@yamdb.fake'])
+
+        call_command('send_queued_mail')
+        assert [message.to for message in mail.outbox] == [['ok@yamdb.fake']]
+        queued = OutgoingEmail.objects.get()
+        assert queued.attempts == 1
+        assert not queued.failed
+        assert 'SMTP недоступен' in queued.last_error
+        assert queued.next_attempt_at > timezone.now() + timedelta(seconds=30)
+
+        # Пока пауза не истекла, письмо не отправляется повторно.
+        call_command('send_queued_mail')
+        assert OutgoingEmail.objects.get().attempts == 1
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_queued_mail')
+        queued = OutgoingEmail.objects.get()
+        assert queued.attempts == 2
+        assert queued.failed
+
+    def test_connection_failure_defers_batch(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_mail_queue.UnreachableBackend'
+        for index in range(3):
+            enqueue_mail('Тема', 'Текст', [f'user{index}@yamdb.fake'])
+
+        call_command('send_queued_mail', batch_size=2)
+        assert mail.outbox == []
+        deferred = OutgoingEmail.objects.filter(attempts=1)
+        assert deferred.count() == 2
+        for queued in deferred:
+            assert 'SMTP не отвечает' in queued.last_error
+            assert queued.next_attempt_at > timezone.now() + timedelta(
+                seconds=30
+            )
+        # Третье письмо не забиралось и ждёт следующего прогона.
+        assert OutgoingEmail.objects.get(attempts=0)
+
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        call_command('send_queued_mail')
+        assert len(mail.outbox) == 1
+
+
+class TestFileMailQueue:
+
+    def test_deliver_and_retry(self, tmp_path, settings, counting_backend):
+        settings.MAIL_QUEUE_BACKEND = 'users.mail_queue.FileMailQueue'
+        settings.MAIL_QUEUE_PATH = str(tmp_path)
+        settings.MAIL_QUEUE_RETRY_DELAY = 0
+        settings.MAIL_QUEUE_MAX_ATTEMPTS = 2
+        enqueue_mail('Тема', 'Текст', ['ok@yamdb.fake'])
+        enqueue_mail('Тема', 'Текст', ['broken@yamdb.fake'])
+
+        call_command('send_queued_mail')
+        assert [message.to for message in mail.outbox] == [['ok@yamdb.fake']]
+        queue = FileMailQueue()
+        assert len(list((tmp_path / 'failed').iterdir())) == 1
+        assert queue.claim(10) == []
+        assert not list((tmp_path / 'processing').iterdir())
@@ -0,0 +1,120 @@
+import os
+import re
+import shutil
+
+import pytest
+
+from api.metrics import registry
+
+
+@pytest.fixture(autouse=True)
+def clean_registry(settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    registry.clear()
+
+
+def metric(text, name, **labels):
+    selector = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    found = re.search(
+        rf'^{re.escape(name)}{{{re.escape(selector)}}} (\S+)$', text, re.M
+    )
+    assert found, f'{name}{{{selector}}} не найдена'
+    return float(found.group(1))
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_routes_are_counted(self, client, catalog):
+        title = catalog['titles'][0]
+        for _ in range(3):
+            assert client.get('/api/v1/titles/').status_code == 200
+        client.get(f'/api/v1/titles/{title.id}/reviews/')
+        client.get('/api/v1/titles/999999/')
+        client.get('/nowhere/')
+
+        text = client.get('/metrics').content.decode()
+        assert metric(
+            text, 'yamdb_http_requests_total',
+            route='title-list', method='GET', status='200',
+        ) == 3
+        assert metric(
+            text, 'yamdb_http_requests_total',
+            route='title-detail', method='GET', status='404',
+        ) == 1
+        assert metric(
+            text, 'yamdb_http_requests_total',
+            route='unmatched', method='GET', status='404',
+        ) == 1
+        assert metric(
+            text, 'yamdb_http_request_duration_seconds_count',
+            route='title-list',
+        ) == 3
+        assert metric(
+            text, 'yamdb_http_request_duration_seconds_bucket',
+            route='title-list', le='+Inf',
+        ) == 3
+        assert metric(text, 'yamdb_db_queries_total', route='review-list') > 0
+        assert metric(
+            text, 'yamdb_render_duration_seconds_total', route='title-list'
+        ) > 0
+
+    def test_server_timing_is_optional(self, client, settings):
+        assert 'Server-Timing' not in client.get('/api/v1/genres/')
+        settings.SERVER_TIMING = True
+        header = client.get('/api/v1/genres/')['Server-Timing']
+        assert re.fullmatch(
+            r'app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", '
+            r'serialize;dur=[\d.]+, render;dur=[\d.]+',
+            header,
+        )
+
+    def test_workers_are_summed(self, client, settings):
+        client.get('/api/v1/genres/')
+        registry.flush()
+        own, = os.listdir(settings.METRICS_DIR)
+        # Файл другого воркера, в том числе уже завершившегося.
+        shutil.copy(
+            os.path.join(settings.METRICS_DIR, own),
+            os.path.join(settings.METRICS_DIR, 'other.json'),
+        )
+        client.get('/api/v1/genres/')
+        text = client.get('/metrics').content.decode()
+        assert metric(
+            text, 'yamdb_http_requests_total',
+            route='genre-list', method='GET', status='200',
+        ) == 3
+        assert metric(
+            text, 'yamdb_http_request_duration_seconds_count',
+            route='genre-list',
+        ) == 3
+
+    def test_requests_do_not_touch_files(self, client, settings):
+        for _ in range(3):
+            client.get('/api/v1/genres/')
+        assert os.listdir(settings.METRICS_DIR) == []
+        text = client.get('/metrics').content.decode()
+        assert metric(
+            text, 'yamdb_http_requests_total',
+            route='genre-list', method='GET', status='200',
+        ) == 3
+        assert len(os.listdir(settings.METRICS_DIR)) == 1
+
+    @pytest.mark.parametrize('fast', [True, False])
+    def test_serialize_is_timed(self, client, catalog, settings, fast):
+        settings.FAST_LIST_SERIALIZERS = fast
+        settings.SERVER_TIMING = True
+        response = client.get('/api/v1/titles/')
+        assert 'serialize;dur=' in response['Server-Timing']
+        client.get(f'/api/v1/titles/{catalog["titles"][0].id}/')
+        text = client.get('/metrics').content.decode()
+        assert metric(
+            text, 'yamdb_serialize_duration_seconds_count', route='title-list'
+        ) == 1
+        assert metric(
+            text, 'yamdb_serialize_duration_seconds_sum', route='title-list'
+        ) > 0
+        assert metric(
+            text, 'yamdb_serialize_duration_seconds_count',
+            route='title-detail',
+        ) == 1
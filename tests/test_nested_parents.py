@@ -0,0 +1,80 @@
+import pytest
+
+from api.v1.views import CommentViewSet
+from reviews.models import Comment, Title
+
+
+def comments_url(title_id, review_id, comment_id=None):
+    url = f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    return url if comment_id is None else f'{url}{comment_id}/'
+
+
+@pytest.fixture
+def foreign(catalog):
+    """Отзыв и произведение, которому отзыв не принадлежит."""
+    review = catalog['reviews'][0]
+    other = next(
+        title for title in catalog['titles'] if title.id != review.title_id
+    )
+    return review, other
+
+
+@pytest.mark.django_db
+class TestNestedParents:
+
+    def test_detail_checks_chain_in_one_query(
+        self, client, catalog, django_assert_num_queries
+    ):
+        review = catalog['reviews'][0]
+        comment = review.comments.first()
+        with django_assert_num_queries(1):
+            response = client.get(
+                comments_url(review.title_id, review.id, comment.id)
+            )
+        assert response.status_code == 200
+
+    def test_comment_list_skips_parent_lookup(
+        self, client, catalog, django_assert_num_queries
+    ):
+        review = catalog['reviews'][0]
+        with django_assert_num_queries(2):
+            response = client.get(comments_url(review.title_id, review.id))
+        assert len(response.json()['results']) == 5
+
+    @pytest.mark.parametrize('method', ['get', 'delete'])
+    def test_detail_under_wrong_title(self, admin_client, foreign, method):
+        review, other = foreign
+        comment = review.comments.first()
+        url = comments_url(other.id, review.id, comment.id)
+        assert getattr(admin_client, method)(url).status_code == 404
+        assert Comment.objects.filter(id=comment.id).exists()
+
+    def test_empty_list(self, client, django_assert_num_queries):
+        title = Title.objects.create(name='Без отзывов', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        # COUNT и проверка произведения, страница пуста без запроса.
+        with django_assert_num_queries(2):
+            response = client.get(url)
+        assert response.json()['results'] == []
+        assert client.get('/api/v1/titles/0/reviews/').status_code == 404
+
+    def test_empty_list_under_wrong_title(self, client, foreign):
+        review, other = foreign
+        url = comments_url(other.id, review.id)
+        assert client.get(url).status_code == 404
+        response = client.get(f'{url}?pagination=cursor')
+        assert response.status_code == 404
+
+    def test_parent_is_shared(self, rf, catalog, django_assert_num_queries):
+        review = catalog['reviews'][0]
+        view = CommentViewSet(
+            kwargs={'title_id': review.title_id, 'review_id': review.id},
+            request=rf.get('/'),
+            format_kwarg=None,
+            action='create',
+        )
+        with django_assert_num_queries(1):
+            assert view.get_parent() == review
+            assert view.get_serializer_context()['parent']() is (
+                view.get_parent()
+            )
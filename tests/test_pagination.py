@@ -0,0 +1,51 @@
+import pytest
+
+
+def _walk(client, url):
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        assert 'count' not in data, 'Курсорный режим не должен считать COUNT(*)'
+        ids.extend(item['id'] for item in data['results'])
+        url = data['next']
+    return ids
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def test_titles_walk(self, client, catalog):
+        ids = _walk(client, '/api/v1/titles/?pagination=cursor')
+        assert ids == sorted(title.id for title in catalog['titles'])
+
+    def test_titles_walk_keeps_filter(self, client, catalog):
+        ids = _walk(
+            client, '/api/v1/titles/?pagination=cursor&genre=genre-3&page_size=1'
+        )
+        expected = [
+            title.id for title in catalog['titles']
+            if title.genre.filter(slug='genre-3').exists()
+        ]
+        assert ids == expected
+
+    def test_max_page_size(self, client, catalog, settings):
+        settings.CURSOR_PAGINATION_MAX_PAGE_SIZE = 2
+        response = client.get('/api/v1/titles/?pagination=cursor&page_size=50')
+        assert len(response.json()['results']) == 2
+
+    def test_reviews_without_count_query(
+        self, client, catalog, django_assert_num_queries
+    ):
+        review = catalog['reviews'][0]
+        url = f'/api/v1/titles/{review.title_id}/reviews/?pagination=cursor'
+        # Только страница: непустой ответ сам доказывает, что
+        # произведение есть.
+        with django_assert_num_queries(1):
+            response = client.get(url)
+        assert len(response.json()['results']) == 5
+
+    def test_page_number_by_default(self, client, catalog):
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == len(catalog['titles'])
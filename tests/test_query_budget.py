@@ -0,0 +1,98 @@
+import pytest
+
+# Максимальное число SQL-запросов на один ответ. Бюджет не зависит от
+# размера страницы: рост означает вернувшийся N+1.
+TITLE_LIST_BUDGET = 3
+TITLE_DETAIL_BUDGET = 2
+REVIEW_LIST_BUDGET = 3
+REVIEW_DETAIL_BUDGET = 2
+COMMENT_LIST_BUDGET = 3
+COMMENT_DETAIL_BUDGET = 2
+SLUG_LIST_BUDGET = 2
+USER_LIST_BUDGET = 3
+USER_DETAIL_BUDGET = 2
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+
+    def test_title_list(self, client, catalog, django_assert_max_num_queries):
+        with django_assert_max_num_queries(TITLE_LIST_BUDGET):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 5
+
+    def test_title_list_filtered(
+        self, client, catalog, django_assert_max_num_queries
+    ):
+        with django_assert_max_num_queries(TITLE_LIST_BUDGET):
+            response = client.get('/api/v1/titles/?genre=genre-0')
+        assert response.status_code == 200
+
+    def test_title_detail(self, client, catalog, django_assert_max_num_queries):
+        title = catalog['titles'][-1]
+        with django_assert_max_num_queries(TITLE_DETAIL_BUDGET):
+            response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 200
+        assert len(response.json()['genre']) == title.genre.count()
+
+    def test_review_list(self, client, catalog, django_assert_max_num_queries):
+        title = catalog['titles'][0]
+        with django_assert_max_num_queries(REVIEW_LIST_BUDGET):
+            response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 5
+
+    def test_review_detail(
+        self, client, catalog, django_assert_max_num_queries
+    ):
+        review = catalog['reviews'][0]
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+        with django_assert_max_num_queries(REVIEW_DETAIL_BUDGET):
+            response = client.get(url)
+        assert response.status_code == 200
+
+    def test_comment_list(
+        self, client, catalog, django_assert_max_num_queries
+    ):
+        review = catalog['reviews'][0]
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/'
+        with django_assert_max_num_queries(COMMENT_LIST_BUDGET):
+            response = client.get(url)
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 5
+
+    def test_comment_detail(
+        self, client, catalog, django_assert_max_num_queries
+    ):
+        review = catalog['reviews'][0]
+        comment = review.comments.first()
+        url = (
+            f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+            f'/comments/{comment.id}/'
+        )
+        with django_assert_max_num_queries(COMMENT_DETAIL_BUDGET):
+            response = client.get(url)
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize('url', ['/api/v1/categories/', '/api/v1/genres/'])
+    def test_slug_list(
+        self, client, catalog, django_assert_max_num_queries, url
+    ):
+        with django_assert_max_num_queries(SLUG_LIST_BUDGET):
+            response = client.get(url)
+        assert response.status_code == 200
+
+    def test_user_list(
+        self, admin_client, catalog, django_assert_max_num_queries
+    ):
+        with django_assert_max_num_queries(USER_LIST_BUDGET):
+            response = admin_client.get('/api/v1/users/')
+        assert response.status_code == 200
+
+    def test_user_detail(
+        self, admin_client, user, django_assert_max_num_queries
+    ):
+        with django_assert_max_num_queries(USER_DETAIL_BUDGET):
+            response = admin_client.get(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 200
@@ -0,0 +1,56 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from reviews.models import Title
+
+
+def rating(title):
+    title.refresh_from_db()
+    return title.rating_sum, title.rating_count
+
+
+@pytest.mark.django_db
+class TestRatingCounters:
+
+    def test_score_change(self, user_client, catalog):
+        title = catalog['titles'][1]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review_id = user_client.post(url, {'text': '.', 'score': 4}).json()['id']
+        assert rating(title) == (4, 1)
+        response = user_client.patch(f'{url}{review_id}/', {'score': 9})
+        assert response.status_code == 200
+        assert rating(title) == (9, 1)
+        assert user_client.get(f'/api/v1/titles/{title.id}/').json()[
+            'rating'
+        ] == 9
+
+    def test_review_delete(self, admin_client, catalog):
+        review = catalog['reviews'][5]
+        title = catalog['titles'][0]
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        assert admin_client.delete(url).status_code == 204
+        assert rating(title) == (1 + 2 + 3 + 4 + 5, 5)
+
+    def test_user_cascade(self, catalog):
+        title = catalog['titles'][0]
+        catalog['reviews'][2].author.delete()
+        assert rating(title) == (1 + 2 + 4 + 5 + 6, 5)
+        call_command('rebuild_ratings', check=True)
+
+    def test_title_cascade(self, catalog):
+        kept = catalog['titles'][1]
+        catalog['reviews'][0].author.reviews.create(
+            title=kept, text='.', score=7
+        )
+        catalog['titles'][0].delete()
+        assert rating(kept) == (7, 1)
+        call_command('rebuild_ratings', check=True)
+
+    def test_rebuild_fixes_drift(self, catalog):
+        title = catalog['titles'][0]
+        Title.objects.filter(pk=title.pk).update(rating_sum=0, rating_count=0)
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', check=True)
+        call_command('rebuild_ratings')
+        assert rating(title) == (21, 6)
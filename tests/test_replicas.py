@@ -0,0 +1,163 @@
+import pytest
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from api.db import PIN_COOKIE
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def replica(settings):
+    """Второй алиас на ту же тестовую базу, как реплика с нулевым лагом."""
+    connections.databases['replica'] = dict(connections['default'].settings_dict)
+    settings.DATABASE_REPLICAS = ['replica']
+    yield connections['replica']
+    connections['replica'].close()
+    del connections['replica']
+    del connections.databases['replica']
+
+
+def aliases_used(client, method, url, **kwargs):
+    """Алиасы, на которых выполнялись запросы, и ответ."""
+    with CaptureQueriesContext(connections['default']) as primary:
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(client, method)(url, **kwargs)
+    used = {
+        alias
+        for alias, queries in (('default', primary), ('replica', replica))
+        if len(queries)
+    }
+    return used, response
+
+
+class TestReplicaRouting:
+
+    def test_safe_reads_go_to_replica(self, client, catalog, replica):
+        review = catalog['reviews'][0]
+        used, response = aliases_used(
+            client, 'get', f'/api/v1/titles/{review.title_id}/reviews/'
+        )
+        assert response.status_code == 200
+        assert used == {'replica'}
+
+    def test_cache_fill_reads_primary(self, client, catalog, replica):
+        used, response = aliases_used(client, 'get', '/api/v1/titles/')
+        assert response.status_code == 200
+        assert used == {'default'}
+
+    def test_writes_pin_client_to_primary(
+        self, user_client, catalog, replica
+    ):
+        title = catalog['titles'][1]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        used, response = aliases_used(
+            user_client, 'post', url, data={'text': 'Отзыв', 'score': 4}
+        )
+        assert response.status_code == 201
+        assert used == {'default'}
+        assert PIN_COOKIE in response.cookies
+
+        used, response = aliases_used(user_client, 'get', url)
+        assert used == {'default'}
+        assert len(response.json()['results']) == 1
+
+        # Без cookie закрепление находится по ключу в кэше, но сам
+        # пользователь при аутентификации ещё читается с реплики.
+        user_client.cookies.clear()
+        used, _ = aliases_used(user_client, 'get', url)
+        assert 'default' in used
+
+    def test_other_clients_stay_on_replica(
+        self, client, user_client, catalog, replica
+    ):
+        title = catalog['titles'][1]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        user_client.post(url, data={'text': 'Отзыв', 'score': 4})
+        used, _ = aliases_used(client, 'get', url)
+        assert used == {'replica'}
+
+    def test_failed_write_does_not_pin(self, user_client, catalog, replica):
+        title = catalog['titles'][1]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, data={'text': 'Отзыв', 'score': 11})
+        assert response.status_code == 400
+        assert PIN_COOKIE not in response.cookies
+
+    def test_without_replicas_everything_reads_primary(
+        self, client, catalog, replica, settings
+    ):
+        settings.DATABASE_REPLICAS = []
+        review = catalog['reviews'][0]
+        used, _ = aliases_used(
+            client, 'get', f'/api/v1/titles/{review.title_id}/reviews/'
+        )
+        assert used == {'default'}
+
+
+class TestHealthChecks:
+
+    @pytest.fixture
+    def calls(self, replica, monkeypatch):
+        """Проверки и закрытия соединения реплики, которое не отвечает."""
+        calls = []
+        replica.ensure_connection()
+        monkeypatch.setattr(
+            replica, 'is_usable', lambda: calls.append('ping') or False
+        )
+        # Соединение с базой в памяти SQLite само не закрывается.
+        monkeypatch.setattr(replica, 'close', lambda: calls.append('close'))
+        return calls
+
+    def test_idle_connection_is_checked(self, calls):
+        request_started.send(sender=None)
+        assert calls == ['ping', 'close']
+
+    def test_recently_used_connection_is_not_checked(self, calls):
+        request_finished.send(sender=None)
+        request_started.send(sender=None)
+        assert calls == []
+
+    def test_idle_threshold(self, calls, settings):
+        request_finished.send(sender=None)
+        settings.DB_HEALTH_CHECK_IDLE = -1
+        request_started.send(sender=None)
+        assert calls == ['ping', 'close']
+
+
+def gunicorn_config(monkeypatch, **env):
+    import os
+    import runpy
+
+    for name in ('GUNICORN_WORKERS', 'GUNICORN_THREADS', 'DB_MAX_CONNECTIONS'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    path = os.path.join(
+        os.path.dirname(__file__), '..', 'api_yamdb', 'gunicorn.conf.py'
+    )
+    return runpy.run_path(path)
+
+
+class TestConnectionBudget:
+
+    def test_threads_fit_budget(self, monkeypatch):
+        config = gunicorn_config(
+            monkeypatch, GUNICORN_WORKERS='17', DB_MAX_CONNECTIONS='80'
+        )
+        assert config['threads'] == 4
+        assert config['workers'] * config['threads'] <= 80
+
+    def test_workers_capped_by_budget(self, monkeypatch):
+        config = gunicorn_config(monkeypatch, DB_MAX_CONNECTIONS='2')
+        assert config['workers'] * config['threads'] <= 2
+
+    def test_explicit_overflow_fails(self, monkeypatch):
+        config = gunicorn_config(
+            monkeypatch, GUNICORN_WORKERS='17', GUNICORN_THREADS='8'
+        )
+        with pytest.raises(RuntimeError, match='DB_MAX_CONNECTIONS=80'):
+            config['check_connection_budget'](
+                config['workers'], config['threads'], 80
+            )
@@ -0,0 +1,73 @@
+import pytest
+from django.db import IntegrityError, transaction
+
+from reviews.models import Review
+
+DUPLICATE = {'non_field_errors': ['Вы уже оставили отзыв!']}
+
+
+@pytest.mark.django_db
+class TestReviewConflicts:
+
+    def test_duplicate_review(self, user_client, catalog):
+        url = f'/api/v1/titles/{catalog["titles"][1].id}/reviews/'
+        data = {'text': 'Отзыв', 'score': 4}
+        assert user_client.post(url, data).status_code == 201
+        response = user_client.post(url, data)
+        assert response.status_code == 400
+        assert response.json() == DUPLICATE
+        assert Review.objects.filter(title=catalog['titles'][1]).count() == 1
+
+    def test_duplicate_keeps_transaction_usable(
+        self, user_client, user, catalog
+    ):
+        title = catalog['titles'][1]
+        Review.objects.create(title=title, author=user, text='.', score=1)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with transaction.atomic():
+            response = user_client.post(url, {'text': '.', 'score': 2})
+            assert response.status_code == 400
+            assert Review.objects.filter(title=title).count() == 1
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (1, 1)
+
+    def test_other_integrity_error_is_not_duplicate(
+        self, user_client, catalog, monkeypatch
+    ):
+        def save(*args, **kwargs):
+            raise IntegrityError('FOREIGN KEY constraint failed')
+
+        monkeypatch.setattr(Review, 'save', save)
+        url = f'/api/v1/titles/{catalog["titles"][1].id}/reviews/'
+        with pytest.raises(IntegrityError, match='FOREIGN KEY'):
+            user_client.post(url, {'text': '.', 'score': 4})
+
+    @pytest.mark.django_db(transaction=True)
+    def test_write_queries(
+        self, user_client, catalog, django_assert_num_queries
+    ):
+        title = catalog['titles'][1]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        # Пользователь, произведение, BEGIN, вставка, рейтинг, счётчики
+        # автора; после коммита BEGIN и четыре запроса пересборки
+        # таблиц лидеров.
+        with django_assert_num_queries(11):
+            response = user_client.post(url, {'text': '.', 'score': 2})
+        assert response.status_code == 201
+        review_id = response.json()['id']
+        # Пользователь, отзыв, BEGIN, вставка, счётчик комментариев,
+        # счётчики автора.
+        with django_assert_num_queries(6):
+            response = user_client.post(
+                f'{url}{review_id}/comments/', {'text': '.'}
+            )
+        assert response.status_code == 201
+
+    def test_comment_under_wrong_title(self, user_client, catalog):
+        review = catalog['reviews'][0]
+        other = next(
+            title for title in catalog['titles'] if title.id != review.title_id
+        )
+        url = f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/'
+        assert user_client.post(url, {'text': '.'}).status_code == 404
+        assert user_client.get(url).status_code == 404
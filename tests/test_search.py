@@ -0,0 +1,116 @@
+import pytest
+
+
+@pytest.fixture
+def library(catalog):
+    from reviews.models import Genre, Title
+
+    titles = catalog['titles']
+    titles[2].name = 'Побег из Шоушенка'
+    titles[2].save()
+    titles[5].description = 'История о побеге из тюрьмы'
+    titles[5].save()
+    thriller = Genre.objects.create(name='Триллер', slug='thriller')
+    titles[6].genre.add(thriller)
+    return {'titles': titles, 'thriller': thriller, 'Title': Title}
+
+
+@pytest.mark.django_db
+class TestSearch:
+
+    def test_ranked_with_highlight(self, client, library):
+        response = client.get('/api/v1/search/?q=побег')
+        assert response.status_code == 200
+        results = response.json()['results']
+        titles = library['titles']
+        assert [item['id'] for item in results] == [titles[2].id, titles[5].id]
+        assert '<b>Побег</b>' in results[0]['highlight']['name']
+        assert results[0]['rank'] >= results[1]['rank']
+
+    def test_genre_names_are_indexed(self, client, library):
+        response = client.get('/api/v1/search/?q=триллер')
+        assert [item['id'] for item in response.json()['results']] == [
+            library['titles'][6].id
+        ]
+        library['thriller'].name = 'Нуар'
+        library['thriller'].save()
+        assert client.get('/api/v1/search/?q=триллер').json()['count'] == 0
+        assert client.get('/api/v1/search/?q=нуар').json()['count'] == 1
+
+    def test_deleted_title_leaves_index(self, client, library):
+        library['titles'][2].delete()
+        response = client.get('/api/v1/search/?q=Шоушенка')
+        assert response.json()['count'] == 0
+
+    def test_titles_search_param(self, client, library):
+        titles = library['titles']
+        response = client.get(
+            f'/api/v1/titles/?search=побег&year_min={titles[5].year}'
+        )
+        assert [item['id'] for item in response.json()['results']] == [
+            titles[5].id
+        ]
+
+    def test_empty_query(self, client, library):
+        assert client.get('/api/v1/search/?q=').json()['count'] == 0
+        assert client.get('/api/v1/titles/?search=*').json()['count'] == 0
+
+    def test_highlight_only_for_page(self, client, library, monkeypatch):
+        from reviews import search
+
+        titles = library['titles']
+        for title in titles:
+            title.description = 'Побег'
+            title.save()
+        highlighted = []
+        backend = search.get_search_backend()
+        highlight = backend.highlight
+
+        def spy(cursor, query, title_ids):
+            highlighted.append(list(title_ids))
+            return highlight(cursor, query, title_ids)
+
+        monkeypatch.setattr(backend, 'highlight', spy)
+        monkeypatch.setattr(search, 'get_search_backend', lambda: backend)
+        response = client.get('/api/v1/search/?q=побег')
+        results = response.json()['results']
+        assert response.json()['count'] == len(titles)
+        assert highlighted == [[item['id'] for item in results]]
+        assert len(results) < len(titles)
+        assert all(
+            '<b>Побег</b>' in item['highlight']['description']
+            for item in results
+        )
+
+    def test_titles_search_in_one_query(self, client, library):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/?search=побег')
+        titles = library['titles']
+        assert [item['id'] for item in response.json()['results']] == [
+            titles[2].id, titles[5].id
+        ]
+        search_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'reviews_title_fts' in query['sql']
+        ]
+        assert search_queries
+        assert all('FROM "reviews_title"' in sql for sql in search_queries)
+
+    def test_highlight_escapes_content(self, client, library):
+        title = library['titles'][3]
+        title.name = 'Полёт <script>alert(1)</script>'
+        title.save()
+        results = client.get('/api/v1/search/?q=полёт').json()['results']
+        assert results[0]['highlight']['name'] == (
+            '<b>Полёт</b> &lt;script&gt;alert(1)&lt;/script&gt;'
+        )
+
+    def test_search_rejects_cursor_pagination(self, client, library):
+        response = client.get('/api/v1/titles/?search=побег&pagination=cursor')
+        assert response.status_code == 400
+        assert 'search' in response.json()
+        response = client.get('/api/v1/titles/?pagination=cursor')
+        assert response.status_code == 200
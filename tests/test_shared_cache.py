@@ -0,0 +1,49 @@
+from api.checks import shared_cache_check
+
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+MEMCACHED = 'django.core.cache.backends.memcached.MemcachedCache'
+
+
+def cache(backend):
+    return {'default': {'BACKEND': backend, 'LOCATION': 'yamdb'}}
+
+
+class TestSharedCacheCheck:
+
+    def test_process_local_cache_fails(self, settings):
+        settings.REQUIRE_SHARED_CACHE = True
+        settings.CACHES = cache(LOCMEM)
+        assert [error.id for error in shared_cache_check(None)] == [
+            'api.E001'
+        ]
+
+    def test_shared_cache_passes(self, settings):
+        settings.REQUIRE_SHARED_CACHE = True
+        settings.CACHES = cache(MEMCACHED)
+        assert shared_cache_check(None) == []
+
+    def test_can_be_disabled(self, settings):
+        settings.REQUIRE_SHARED_CACHE = False
+        settings.CACHES = cache(LOCMEM)
+        assert shared_cache_check(None) == []
+
+    def test_throttle_cache_must_be_shared(self, settings):
+        settings.REQUIRE_SHARED_CACHE = True
+        settings.CACHES = {
+            **cache(MEMCACHED),
+            'throttle': {'BACKEND': LOCMEM, 'LOCATION': 'throttle'},
+        }
+        settings.THROTTLE_BACKEND = 'cache'
+        settings.THROTTLE_CACHE_ALIAS = 'throttle'
+        assert [error.id for error in shared_cache_check(None)] == [
+            'api.E001'
+        ]
+
+    def test_local_throttle_fails(self, settings):
+        settings.REQUIRE_SHARED_CACHE = True
+        settings.CACHES = cache(MEMCACHED)
+        settings.THROTTLE_ENABLED = True
+        settings.THROTTLE_BACKEND = 'local'
+        assert [error.id for error in shared_cache_check(None)] == [
+            'api.E002'
+        ]
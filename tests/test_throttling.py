@@ -0,0 +1,103 @@
+import pytest
+from django.core.cache import cache
+
+from api.benchmark import benchmark_throttle
+from api.v1 import throttling
+from api.v1.throttling import UNSAFE_METHODS, Rule, gcra
+
+SIGNUP = '/api/v1/auth/signup/'
+TOKEN = '/api/v1/auth/token/'
+
+
+def signup(client, number, **extra):
+    return client.post(
+        SIGNUP,
+        {'username': f'user{number}', 'email': f'user{number}@yamdb.fake'},
+        **extra,
+    )
+
+
+class TestGcra:
+
+    def test_burst_then_steady_rate(self):
+        tat = None
+        for _ in range(3):
+            tat, wait = gcra(tat, 100.0, 10.0, 20.0)
+            assert wait == 0
+        _, wait = gcra(tat, 100.0, 10.0, 20.0)
+        assert wait == pytest.approx(10.0)
+        tat, wait = gcra(tat, 110.0, 10.0, 20.0)
+        assert wait == 0
+
+
+@pytest.mark.django_db
+class TestRouteThrottle:
+
+    def test_signup_per_ip(self, client, django_assert_num_queries):
+        for number in range(5):
+            assert signup(client, number).status_code == 200
+        with django_assert_num_queries(0):
+            response = signup(client, 5)
+        assert response.status_code == 429
+        assert int(response['Retry-After']) > 0
+        # Клиент за nginx с другим адресом не затронут.
+        response = signup(client, 6, HTTP_X_FORWARDED_FOR='10.1.1.1')
+        assert response.status_code == 200
+
+    def test_confirmation_code_per_username(
+        self, client, django_user_model, django_assert_num_queries
+    ):
+        django_user_model.objects.create_user(
+            username='victim', email='victim@yamdb.fake'
+        )
+        for number in range(5):
+            response = client.post(
+                TOKEN,
+                {'username': 'victim', 'confirmation_code': str(number)},
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{number}',
+            )
+            assert response.status_code == 400
+        with django_assert_num_queries(0):
+            response = client.post(
+                TOKEN,
+                {'username': 'VICTIM', 'confirmation_code': 'x'},
+                HTTP_X_FORWARDED_FOR='10.0.0.99',
+            )
+        assert response.status_code == 429
+
+    def test_per_user_writes(self, monkeypatch, user_client, admin_client, catalog):
+        monkeypatch.setitem(
+            throttling._routes,
+            'comment-list',
+            (Rule('user', '2/min', methods=UNSAFE_METHODS),),
+        )
+        review = catalog['reviews'][0]
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/'
+        for _ in range(2):
+            assert user_client.post(url, {'text': '.'}).status_code == 201
+        assert user_client.post(url, {'text': '.'}).status_code == 429
+        assert user_client.get(url).status_code == 200
+        assert admin_client.post(url, {'text': '.'}).status_code == 201
+
+    def test_cache_failure_falls_back_to_process(self, client, monkeypatch):
+        def broken(*args, **kwargs):
+            raise ConnectionError('кэш недоступен')
+
+        monkeypatch.setattr(cache, 'get', broken)
+        monkeypatch.setattr(cache, 'set', broken)
+        statuses = [signup(client, number).status_code for number in range(6)]
+        assert statuses == [200] * 5 + [429]
+
+    def test_disabled(self, client, settings):
+        settings.THROTTLE_ENABLED = False
+        for number in range(7):
+            assert signup(client, number).status_code == 200
+
+
+@pytest.mark.django_db
+def test_benchmark_throttle():
+    results = benchmark_throttle(requests=50)
+    assert set(results) == {'local', 'cache'}
+    for result in results.values():
+        assert result['allowed_us'] > 0
+        assert result['rejected_us'] > 0
@@ -0,0 +1,31 @@
+import pytest
+
+
+def _ids(client, query):
+    response = client.get(f'/api/v1/titles/?{query}&pagination=cursor&page_size=50')
+    assert response.status_code == 200
+    return {item['id'] for item in response.json()['results']}
+
+
+@pytest.mark.django_db
+class TestTitleFilter:
+
+    def test_slug_exact_and_prefix(self, client, catalog):
+        titles = catalog['titles']
+        in_category_1 = {t.id for t in titles if t.category.slug == 'category-1'}
+        assert _ids(client, 'category=category-1') == in_category_1
+        assert _ids(client, 'category=category') == set()
+        assert _ids(client, 'category_prefix=category') == {t.id for t in titles}
+        assert _ids(client, 'category_contains=ORY-1') == in_category_1
+
+    def test_genre_prefix_is_distinct(self, client, catalog):
+        response = client.get('/api/v1/titles/?genre_prefix=genre')
+        assert response.json()['count'] == len(catalog['titles'])
+
+    def test_year_exact_and_range(self, client, catalog):
+        by_year = {t.year: t.id for t in catalog['titles']}
+        assert _ids(client, 'year=1991') == {by_year[1991]}
+        assert _ids(client, 'year=199') == set()
+        assert _ids(client, 'year_min=1993&year_max=1994') == {
+            by_year[1993], by_year[1994]
+        }
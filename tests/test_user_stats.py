@@ -0,0 +1,148 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import Comment, Review, Title
+
+USERS = '/api/v1/users/'
+
+
+def stats(user):
+    user.refresh_from_db()
+    return user.reviews_count, user.scores_sum, user.comments_count
+
+
+@pytest.fixture
+def moderator_client(django_user_model):
+    moderator = django_user_model.objects.create_user(
+        username='moderator', email='moderator@yamdb.fake', role='moderator'
+    )
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(moderator)}'
+    )
+    return client
+
+
+@pytest.mark.django_db
+class TestUserStats:
+
+    def test_api_writes(self, user_client, user, catalog):
+        title = catalog['titles'][1]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review_id = user_client.post(url, {'text': '.', 'score': 7}).json()['id']
+        review_url = f'{url}{review_id}/'
+        assert stats(user) == (1, 7, 0)
+        user_client.patch(review_url, {'score': 3})
+        assert stats(user) == (1, 3, 0)
+        comment_id = user_client.post(
+            f'{review_url}comments/', {'text': '.'}
+        ).json()['id']
+        assert stats(user) == (1, 3, 1)
+        user_client.delete(f'{review_url}comments/{comment_id}/')
+        assert stats(user) == (1, 3, 0)
+        user_client.delete(review_url)
+        assert stats(user) == (0, 0, 0)
+
+    def test_moved_and_cascaded(self, catalog, user):
+        review = Review.objects.get(pk=catalog['reviews'][0].pk)
+        old_author = review.author
+        review.author = user
+        review.save()
+        assert stats(old_author) == (0, 0, 1)
+        assert stats(user) == (1, 1, 0)
+        catalog['titles'][0].delete()
+        assert stats(old_author) == (0, 0, 0)
+        assert stats(user) == (0, 0, 0)
+        call_command('rebuild_user_stats', check=True)
+
+    def test_profile_save_keeps_concurrent_counters(self, user_client, user):
+        stale = type(user).objects.get(pk=user.pk)
+        title = Title.objects.create(name='.', year=2000)
+        Review.objects.create(title=title, author=user, text='.', score=5)
+        stale.bio = 'Новая биография'
+        stale.save()
+        response = user_client.patch(f'{USERS}me/', {'first_name': 'Имя'})
+        assert response.status_code == 200
+        assert response.json()['reviews_count'] == 1
+        assert stats(user) == (1, 5, 0)
+
+    def test_batch_insert(self, admin_client, user, catalog):
+        payload = [
+            {'title': title.id, 'author': user.username, 'text': '.',
+             'score': score}
+            for title, score in zip(catalog['titles'][1:4], (2, 4, 9))
+        ]
+        response = admin_client.post(
+            '/api/v1/reviews/batch/', payload, format='json'
+        )
+        assert response.status_code == 200
+        assert stats(user) == (3, 15, 0)
+
+    def test_endpoint(self, moderator_client, user_client, catalog):
+        author = catalog['reviews'][2].author
+        response = moderator_client.get(f'{USERS}{author.username}/stats/')
+        assert response.status_code == 200
+        assert response.json() == {
+            'username': 'author2',
+            'reviews_count': 1,
+            'comments_count': 1,
+            'average_score': 3.0,
+        }
+        url = f'{USERS}{author.username}/stats/'
+        assert user_client.get(url).status_code == 403
+        assert moderator_client.get(USERS).status_code == 403
+
+    @pytest.mark.parametrize('ordering, expected', [
+        ('-average_score', ['author5', 'author4', 'author3']),
+        ('average_score', ['author0', 'author1', 'author2']),
+        ('-comments_count,username', ['author0', 'author1', 'author2']),
+    ])
+    def test_list_ordering(
+        self, admin_client, catalog, django_assert_num_queries, ordering,
+        expected
+    ):
+        # Пользователь из токена, COUNT и страница.
+        with django_assert_num_queries(3):
+            response = admin_client.get(USERS, {'ordering': ordering})
+        results = response.json()['results']
+        assert [item['username'] for item in results[:3]] == expected
+
+    def test_users_without_reviews_sort_last(self, admin_client, catalog):
+        response = admin_client.get(
+            USERS, {'ordering': '-average_score', 'page': 2}
+        )
+        assert [
+            item['average_score'] for item in response.json()['results']
+        ] == [1.0, None]
+
+    def test_unknown_ordering_is_ignored(self, admin_client, catalog):
+        response = admin_client.get(USERS, {'ordering': 'password'})
+        default = admin_client.get(USERS).json()['results']
+        assert response.json()['results'] == default
+
+
+@pytest.mark.django_db
+class TestRebuildUserStats:
+
+    def test_check_and_rebuild(self, catalog, django_user_model):
+        author = catalog['reviews'][0].author
+        django_user_model.objects.filter(pk=author.pk).update(
+            reviews_count=0, comments_count=9
+        )
+        with pytest.raises(CommandError, match='author0'):
+            call_command('reconcile_counters', check=True)
+        call_command('rebuild_user_stats')
+        assert stats(author) == (1, 1, 1)
+        call_command('reconcile_counters', check=True)
+
+    def test_bulk_comments_fixed_by_reconcile(self, catalog):
+        review = catalog['reviews'][0]
+        Comment.objects.bulk_create(
+            Comment(review=review, author=review.author, text='.')
+            for _ in range(2)
+        )
+        call_command('reconcile_counters')
+        assert stats(review.author) == (1, 1, 3)